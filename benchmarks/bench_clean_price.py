@@ -0,0 +1,77 @@
+# benchmarks/bench_clean_price.py
+"""Reconstruction du prix: boucle iterrows historique vs version vectorisée.
+
+    python benchmarks/bench_clean_price.py --rows 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from clean_listings import extract_first_num, extract_price  # noqa: E402
+
+SOURCES = ["price", "details", "title", "tags", "price_shekels"]
+
+# Formats réellement rencontrés + cas limites (séparateurs mixtes, prix absent, NaN)
+PRICES = ["₪ 4 350 000", "₪ 2,900,000", "3.850.000 ₪", "1.234,5 ש\"ח", "ש״ח 980,000",
+          "לא צוין מחיר", "", None, "₪ 12.5.2024"]
+DETAILS = ["5 חדרים • קומה קרקע • 202 מ״ר", "4 חדרים • קומה 2 • 150 מ״ר",
+           "מחיר 1,750,000 • 3 חדרים", None]
+TITLES = ["השריג 35", "גרגר הנחלים 13", "דירה 2,100,000 ש״ח", None]
+
+def make_raw(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # prix à forte cardinalité (comme un vrai scrape) + formats limites tirés de PRICES
+    amounts = rng.integers(500, 9_000, n) * 1_000
+    price = pd.Series(amounts).map("₪ {:,}".format).astype(object)
+    odd = rng.random(n) < 0.3
+    price[odd] = rng.choice(np.array(PRICES, dtype=object), odd.sum())
+    title = pd.Series(rng.integers(1, 200, n)).map("הרצל {}".format).astype(object)
+    odd = rng.random(n) < 0.3
+    title[odd] = rng.choice(np.array(TITLES, dtype=object), odd.sum())
+    return pd.DataFrame({
+        "title": title,
+        "price": price,
+        "details": rng.choice(np.array(DETAILS, dtype=object), n),
+        "tags": rng.choice(np.array(["ממ\"ד, חניה", "מעלית", None], dtype=object), n),
+        "price_shekels": np.nan,
+    })
+
+def legacy_price(df, sources):
+    """Copie conforme de l'ancien chemin (référence pour l'égalité des sorties)."""
+    vals = []
+    for _, row in df.iterrows():
+        val = np.nan
+        for col in sources:
+            v = row.get(col, "")
+            val = extract_first_num(v)
+            if not np.isnan(val):
+                break
+        vals.append(val)
+    return pd.Series(vals, index=df.index)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = ap.parse_args()
+
+    for n in args.rows:
+        df = make_raw(n)
+
+        t0 = time.perf_counter()
+        new = extract_price(df, SOURCES)
+        t_new = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        old = legacy_price(df, SOURCES)
+        t_old = time.perf_counter() - t0
+
+        np.testing.assert_array_equal(new.to_numpy(), old.to_numpy())
+        print(f"{n:>9,} rows | iterrows {t_old:8.2f}s | vectorized {t_new:6.2f}s | x{t_old / t_new:5.1f} | identical ✅")
+
+if __name__ == "__main__":
+    main()
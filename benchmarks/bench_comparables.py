@@ -0,0 +1,84 @@
+# benchmarks/bench_comparables.py
+"""Comparables (k plus proches voisins): scan du DataFrame par requête vs index
+cKDTree par ville (comparables.py).
+
+Données: scrape synthétique (make_synthetic.py) passé par clean_listings.clean.
+Mesures: construction de l'index, aller-retour du cache disque, latence d'une
+requête (médiane et p99: nearest, find_comparables avec son DataFrame), débit en lot;
+vérifie que les deux méthodes renvoient les mêmes distances.
+
+    python benchmarks/bench_comparables.py --rows 100000 1000000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+import comparables  # noqa: E402
+from clean_listings import clean  # noqa: E402
+from make_synthetic import make_raw  # noqa: E402
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def scan(df, scale, city, x, k):
+    """Ancienne façon: filtre de la ville + distance à toutes ses lignes + nsmallest."""
+    block = df[df["city"] == city]
+    d = np.sqrt((((block[comparables.FEATURES] - x) / scale) ** 2).sum(axis=1))
+    return d.nsmallest(k).to_numpy()
+
+def percentiles_ms(times):
+    return 1000 * np.median(times), 1000 * np.percentile(times, 99)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("-k", type=int, default=comparables.K)
+    ap.add_argument("--queries", type=int, default=1000)
+    ap.add_argument("--scan-queries", type=int, default=50, help="requêtes du scan (lent)")
+    args = ap.parse_args()
+
+    for n in args.rows:
+        df = clean(make_raw(n, dup_rate=0))
+        ix, t_build = timed(lambda: comparables.build_comparables(df))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ix.joblib"
+            joblib.dump(ix, path)
+            _, t_load = timed(lambda: joblib.load(path))
+
+        # requêtes: annonces tirées au hasard, perturbées (pas de distance nulle)
+        rng = np.random.default_rng(0)
+        src = ix.frame.iloc[rng.integers(0, len(ix.frame), args.queries)].reset_index(drop=True)
+        q = src[["city"] + comparables.FEATURES].copy()
+        q[comparables.FEATURES] *= rng.uniform(0.9, 1.1, (len(q), len(comparables.FEATURES)))
+
+        # valeurs extraites hors chrono: on mesure la requête, pas l'accès à q
+        rows = list(zip(q["city"], *(q[c].tolist() for c in comparables.FEATURES)))
+        single = [timed(lambda r=r: comparables.nearest(ix, *r, k=args.k))[1] for r in rows]
+        framed = [timed(lambda r=r: comparables.find_comparables(ix, *r, k=args.k))[1] for r in rows]
+        (pos, dist), t_batch = timed(lambda: comparables.query_batch(ix, q, args.k))
+
+        scans, same = [], True
+        for r in range(args.scan_queries):
+            x = np.array(rows[r][1:], dtype=float)
+            d, t = timed(lambda: scan(ix.frame, ix.scale, rows[r][0], x, args.k))
+            scans.append(t)
+            same &= np.allclose(d, dist[r, :len(d)])
+
+        (s_med, s_p99), (f_med, f_p99), (n_med, n_p99) = map(percentiles_ms, (single, framed, scans))
+        print(f"{len(ix.frame):>9,} listings, {len(ix.trees)} cities | build {t_build:5.2f}s, "
+              f"cache load {t_load:4.2f}s | query k={args.k}: tree {s_med:.3f} ms (p99 {s_p99:.3f}), "
+              f"with frame {f_med:.3f} ms (p99 {f_p99:.3f}), scan {n_med:6.2f} ms (p99 {n_p99:6.2f}) | "
+              f"batch {len(q) / t_batch:,.0f} queries/s | same distances: {same}")
+
+if __name__ == "__main__":
+    main()
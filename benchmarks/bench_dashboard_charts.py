@@ -0,0 +1,65 @@
+# benchmarks/bench_dashboard_charts.py
+"""Données envoyées au navigateur par les graphiques du dashboard, avant/après.
+
+Streamlit sérialise les DataFrames des graphiques en Arrow IPC: on mesure la taille
+de ce payload et le temps pour le produire.
+
+- before: une barre par annonce (st.bar_chart(f["price_shekels"])), scatter de toutes
+  les lignes filtrées
+- after:  np.histogram sur bornes en cache, scatter échantillonné par ville ou agrégé
+  sur une grille au-delà de SCATTER_MAX_POINTS
+
+    python benchmarks/bench_dashboard_charts.py --rows 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "dashboard"))
+from bench_listings_store import make_processed  # noqa: E402
+from charts import bin_edges, grid_aggregate, histogram, stratified_sample  # noqa: E402
+
+SCATTER_COLS = ["area_sqm", "price_shekels", "rooms", "city"]
+
+def arrow_bytes(df):
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+def measure(fn):
+    t0 = time.perf_counter()
+    data = fn()
+    size = arrow_bytes(data)
+    return time.perf_counter() - t0, size, len(data)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = ap.parse_args()
+
+    for n in args.rows:
+        f = make_processed(n)[SCATTER_COLS + ["price_per_sqm"]]
+        f["city"] = f["city"].astype("category")
+        edges = bin_edges(f["price_shekels"])
+        ranges = [tuple(np.nanpercentile(f[c], [0.5, 99.5])) for c in ("area_sqm", "price_shekels")]
+        cases = {
+            "histogram before": lambda: f[["price_shekels"]],
+            "histogram after": lambda: histogram(f["price_shekels"], edges),
+            "scatter before": lambda: f[SCATTER_COLS],
+            "scatter sample": lambda: stratified_sample(f[SCATTER_COLS], "city"),
+            "scatter grid": lambda: grid_aggregate(f, "area_sqm", "price_shekels", "city", ranges),
+        }
+        print(f"{n:>9,} rows")
+        for name, fn in cases.items():
+            dt, size, points = measure(fn)
+            print(f"  {name:<17} | {points:>9,} points | {size / 2**10:9.1f} KiB | {dt * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
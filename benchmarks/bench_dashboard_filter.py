@@ -0,0 +1,88 @@
+# benchmarks/bench_dashboard_filter.py
+"""Travail fait par le dashboard à chaque rerun (slider / multiselect), avant et après
+l'index de filtrage.
+
+- before: st.cache_data renvoie une copie du DataFrame (unpickle), puis options du
+  sidebar (unique/min/max), 3 masques chaînés, KPIs, groupby("city").mean(), médianes
+- after:  index en cache_resource (pas de copie), searchsorted par ville + sommes préfixes
+
+Vérifie que les deux chemins donnent les mêmes lignes et KPIs.
+
+    python benchmarks/bench_dashboard_filter.py --rows 100000 1000000
+"""
+import argparse
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "dashboard"))
+from bench_listings_store import make_processed  # noqa: E402
+from filter_index import build_index, query  # noqa: E402
+
+COLUMNS = ["city", "rooms", "area_sqm", "floor", "price_shekels", "price_per_sqm"]
+
+def before(blob, city_sel, rooms_range, area_range):
+    df = pickle.loads(blob)
+    sorted(df["city"].dropna().unique().tolist())
+    float(df["rooms"].min()), float(df["rooms"].max())
+    float(df["area_sqm"].min()), float(df["area_sqm"].max())
+    f = df[df["city"].isin(city_sel)]
+    f = f[(f["rooms"] >= rooms_range[0]) & (f["rooms"] <= rooms_range[1])]
+    f = f[(f["area_sqm"] >= area_range[0]) & (f["area_sqm"] <= area_range[1])]
+    kpis = [len(f), int(f["price_shekels"].mean()) if len(f) else 0,
+            int(f["price_per_sqm"].mean()) if len(f) else 0,
+            int(f["area_sqm"].median()) if len(f) else 0]
+    by_city = f.groupby("city", observed=True)["price_shekels"].mean()
+    [df[c].median() for c in ["area_sqm", "rooms", "floor"]]
+    return f, kpis, by_city
+
+def after(ix, city_sel, rooms_range, area_range):
+    pos, k = query(ix, city_sel, rooms_range, area_range)
+    f = ix.df.take(pos)
+    kpis = [k["n"], int(k["avg_price"]), int(k["avg_ppsqm"]), int(k["median_area"])]
+    return f, kpis, k["avg_price_by_city"]
+
+def timed(fn, reps, *args):
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--reps", type=int, default=5)
+    args = ap.parse_args()
+
+    for n in args.rows:
+        df = make_processed(n)[COLUMNS]
+        df["city"] = df["city"].astype("category")
+        blob = pickle.dumps(df)
+        t0 = time.perf_counter()
+        ix = build_index(df)
+        t_build = time.perf_counter() - t0
+        cities = ix.cities
+        (r0, r1), (a0, a1) = ix.bounds["rooms"], ix.bounds["area"]
+        scenarios = {
+            "default (3 cities)": (cities[:3], (r0, r1), (a0, a1)),
+            "all cities": (cities, (r0, r1), (a0, a1)),
+            "rooms 3-4": (cities[:3], (3.0, 4.0), (a0, a1)),
+            "rooms+area": (cities, (2.5, 5.0), (60.0, 150.0)),
+        }
+        print(f"{n:>9,} rows | index build {t_build * 1000:7.1f} ms (once per dataset version)")
+        for name, params in scenarios.items():
+            tb, (fb, kb, cb) = timed(before, args.reps, blob, *params)
+            ta, (fa, ka, ca) = timed(after, args.reps, ix, *params)
+            same = (kb == ka and len(fb) == len(fa)
+                    and np.allclose(cb.to_numpy(), ca.reindex(cb.index.astype(str)).to_numpy()))
+            print(f"  {name:<20} | {len(fa):>9,} rows | before {tb * 1000:8.1f} ms | "
+                  f"after {ta * 1000:7.1f} ms | x{tb / ta:5.1f} | {'✅' if same else '❌'}")
+
+if __name__ == "__main__":
+    main()
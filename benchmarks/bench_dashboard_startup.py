@@ -0,0 +1,112 @@
+# benchmarks/bench_dashboard_startup.py
+"""Démarrage à froid du dashboard: un processus neuf par mesure (comme un nouveau
+conteneur / worker), script exécuté par streamlit.testing.AppTest.
+
+- first KPI   temps depuis le lancement du processus jusqu'au premier st.metric
+              (imports streamlit/pandas compris): ce que voit l'utilisateur en premier
+- page        script complet (graphes compris)
+- predict     premier clic sur Predict (modèle + comparables chargés à ce moment-là)
+- RSS         VmRSS du processus après la page puis après la prédiction, pic (VmHWM)
+
+Projet copié dans un dossier temporaire (dashboard/, src/, models/) avec des annonces
+nettoyées synthétiques (bench_listings_store.make_processed) en Parquet. Variantes:
+
+- before      dashboard/streamlit_app.py du commit --before (git show), si donné
+- no summary  version courante sans data/processed/dashboard_summary.json (premier
+              démarrage sur de nouvelles données)
+- summary     version courante, résumé écrit au préalable (étape summary du pipeline /
+              du Dockerfile)
+
+    python benchmarks/bench_dashboard_startup.py --rows 100000 1000000 --before <commit>
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from bench_listings_store import make_processed  # noqa: E402
+from listings_store import write_parquet  # noqa: E402
+
+CHILD = """
+import time
+t0 = time.perf_counter()
+import json, sys
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+def status_mb(key):
+    for line in open("/proc/self/status"):
+        if line.startswith(key + ":"):
+            return int(line.split()[1]) / 1024
+
+marks = {{}}
+_metric = st.metric
+def metric(*args, **kwargs):
+    marks.setdefault("first_kpi", time.perf_counter() - t0)
+    return _metric(*args, **kwargs)
+st.metric = metric
+
+at = AppTest.from_file({app!r}, default_timeout=900).run()
+assert not at.exception, at.exception
+marks["page"] = time.perf_counter() - t0
+marks["rss_page_mb"] = status_mb("VmRSS")
+marks["sklearn_at_page"] = "sklearn" in sys.modules
+
+t1 = time.perf_counter()
+at = next(b for b in at.button if b.label == "Predict").click().run()
+assert not at.exception and at.success, at.exception
+marks["predict"] = time.perf_counter() - t1
+marks["rss_predict_mb"] = status_mb("VmRSS")
+marks["peak_mb"] = status_mb("VmHWM")
+print(json.dumps(marks))
+"""
+
+def measure(app: Path) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD.format(app=str(app))], check=True,
+                         capture_output=True, text=True, cwd=app.parents[1])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def make_project(tmp: Path, n: int, before=None) -> Path:
+    """Copie de dashboard/, src/ et du modèle, annonces synthétiques de n lignes."""
+    ignore = shutil.ignore_patterns("__pycache__", "data")
+    shutil.copytree(ROOT / "dashboard", tmp / "dashboard", ignore=ignore)
+    shutil.copytree(ROOT / "src", tmp / "src", ignore=ignore)
+    shutil.copytree(ROOT / "models", tmp / "models", ignore=ignore)
+    write_parquet(make_processed(n), tmp / "data" / "processed" / "listings_parquet")
+    if before:
+        code = subprocess.run(["git", "show", f"{before}:dashboard/streamlit_app.py"], cwd=ROOT,
+                              check=True, capture_output=True, text=True).stdout
+        (tmp / "dashboard" / "streamlit_app_before.py").write_text(code, encoding="utf-8")
+    return tmp
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--before", help="commit du dashboard de référence")
+    args = ap.parse_args()
+
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = make_project(Path(tmp), n, args.before)
+            summary = root / "data" / "processed" / "dashboard_summary.json"
+            runs = {}
+            if args.before:
+                runs["before"] = measure(root / "dashboard" / "streamlit_app_before.py")
+            summary.unlink(missing_ok=True)
+            runs["no summary"] = measure(root / "dashboard" / "streamlit_app.py")
+            subprocess.run([sys.executable, str(root / "dashboard" / "summary.py")], check=True,
+                           capture_output=True)
+            runs["summary"] = measure(root / "dashboard" / "streamlit_app.py")
+            for name, r in runs.items():
+                print(f"{n:>9,} rows | {name:<10} | first KPI {r['first_kpi']:5.2f}s | page {r['page']:5.2f}s"
+                      f" (sklearn {'loaded' if r['sklearn_at_page'] else 'not loaded'}) | "
+                      f"predict {r['predict']:5.2f}s | RSS {r['rss_page_mb']:6.0f} MB -> "
+                      f"{r['rss_predict_mb']:6.0f} MB, peak {r['peak_mb']:6.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_dedupe.py
+"""Doublons à l'échelle: débit de dedupe.py (signatures MinHash, LSH + clés exactes,
+réduction des clusters) et qualité sur les republications injectées par
+make_synthetic.py (titre/prix retouchés ou nouvelle photo).
+
+- recall     part des copies rattachées au cluster de leur annonce d'origine
+- exact      même mesure avec les seules clés url / image_url (sans MinHash)
+- mixed      lignes dans des clusters qui réunissent des annonces d'origine différentes
+
+Comme dans clean_listings, les lignes passent d'abord par parse_rows (filtre prix).
+
+    python benchmarks/bench_dedupe.py --rows 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+import dedupe  # noqa: E402
+from clean_listings import parse_rows  # noqa: E402
+from make_synthetic import make_raw  # noqa: E402
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def quality(labels, origin, pos, copies):
+    """(recall, lignes dans des clusters mêlant plusieurs annonces d'origine)."""
+    same = labels[copies] == labels[pos[origin[copies]].to_numpy()]
+    recall = same.mean() if len(copies) else float("nan")
+    per_cluster = pd.Series(origin).groupby(labels).nunique()
+    mixed = np.isin(labels, per_cluster.index[per_cluster > 1]).sum()
+    return recall, int(mixed)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--dup-rate", type=float, default=0.02)
+    args = ap.parse_args()
+
+    for n in args.rows:
+        raw, dup_of = make_raw(n, dup_rate=args.dup_rate, return_dups=True)
+        df = parse_rows(raw).reset_index()  # colonne "index": ligne du brut
+        # annonce d'origine (ligne du brut) de chaque ligne; copies dont l'origine a passé le filtre
+        origin = np.where(dup_of[df["index"]] >= 0, dup_of[df["index"]], df["index"])
+        pos = pd.Series(np.arange(len(df)), index=df["index"])
+        copies = np.flatnonzero((origin != df["index"]) & np.isin(origin, df["index"]))
+
+        sig, t_sig = timed(lambda: dedupe.signatures(df))
+        (labels, stats), t_cluster = timed(lambda: dedupe.cluster(sig))
+        out, t_collapse = timed(lambda: dedupe.collapse(df, sig, labels))
+        total = t_sig + t_cluster + t_collapse
+
+        exact = dedupe.Signatures(**{**vars(sig), "has_text": np.zeros(len(df), dtype=bool)})
+        exact_labels, _ = dedupe.cluster(exact)
+        recall, mixed = quality(labels, origin, pos, copies)
+        exact_recall, _ = quality(exact_labels, origin, pos, copies)
+        print(f"{len(df):>9,} rows | signatures {t_sig:5.2f}s, cluster {t_cluster:5.2f}s, "
+              f"collapse {t_collapse:4.2f}s = {total:5.2f}s ({len(df) / total:,.0f} rows/s) | "
+              f"{stats['lsh_candidates']:,} LSH candidates vs {len(df) * (len(df) - 1) // 2:,} pairs | "
+              f"{len(df) - len(out):,} rows collapsed, {len(copies):,} injected copies: "
+              f"recall {recall:.2%} (exact keys only {exact_recall:.2%}), mixed {mixed}")
+
+if __name__ == "__main__":
+    main()
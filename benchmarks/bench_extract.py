@@ -0,0 +1,69 @@
+# benchmarks/bench_extract.py
+"""Extraction des cartes d'une page de résultats sauvegardée, par mode.
+
+- elements: ancien chemin, find_element/get_attribute par champ (Chrome requis)
+- script:   un seul execute_script qui renvoie toutes les cartes (Chrome requis)
+- source:   un seul page_source parsé avec BeautifulSoup (Chrome requis)
+- offline:  parse_ads_html directement sur le fichier (sans navigateur)
+
+Les modes navigateur chargent la fixture en file:// dans un Chrome headless; s'il n'y
+a pas de Chrome sur la machine, seul le mode offline est mesuré (c'est le seul résultat
+obtenu jusqu'ici: ~75 ms/page pour 40 cartes; pas encore de chiffres script vs elements).
+
+    python benchmarks/bench_extract.py --reps 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from scrape_yad2 import EXTRACT_MODES, extract_ads_from_page, parse_ads_html  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "yad2_results_page.html"
+
+def timed(fn, reps):
+    out, best = None, float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def headless_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    return webdriver.Chrome(options=options)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reps", type=int, default=20)
+    args = ap.parse_args()
+
+    html = FIXTURE.read_text(encoding="utf-8")
+    t, offline = timed(lambda: parse_ads_html(html, FIXTURE.as_uri()), args.reps)
+    print(f"offline  | {len(offline)} cards | {t * 1000:8.1f} ms/page")
+
+    try:
+        driver = headless_driver()
+    except Exception as e:
+        print(f"(no Chrome available, browser modes skipped: {type(e).__name__})")
+        return
+    try:
+        driver.get(FIXTURE.as_uri())
+        results = {}
+        for mode in EXTRACT_MODES:
+            t, results[mode] = timed(lambda: extract_ads_from_page(driver, mode), args.reps)
+            print(f"{mode:<8} | {len(results[mode])} cards | {t * 1000:8.1f} ms/page")
+        for mode in ("script", "source"):
+            same = results[mode] == results["elements"]
+            print(f"{mode} == elements: {'✅' if same else '❌'}")
+    finally:
+        driver.quit()
+
+if __name__ == "__main__":
+    main()
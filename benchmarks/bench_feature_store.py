@@ -0,0 +1,65 @@
+# benchmarks/bench_feature_store.py
+"""Préparation des features: recalcul à chaque ajustement vs feature store.
+
+Sans store, l'entraînement lit et impute les données une fois, puis chaque
+ajustement d'un pipeline (candidat x fold du halving, refits) refait
+StandardScaler + OneHot. Avec le store, un entraînement ne fait qu'un chargement
+(froid: calcul + écriture; chaud: hash des fichiers + lecture du cache). Vérifie
+aussi qu'une modif des données change la clé.
+
+    python benchmarks/bench_feature_store.py --rows 100000 1000000 --fits 300
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from bench_listings_store import make_processed  # noqa: E402
+from feature_store import build_preprocessor, load_features, prepare_features  # noqa: E402
+from listings_store import data_hash, read_listings, write_parquet  # noqa: E402
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--fits", type=int, default=300,
+                    help="ajustements de pipeline d'un entraînement complet (≈ candidats x folds)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for n in args.rows:
+            data, cache = tmp / f"l{n}", tmp / f"cache{n}"
+            write_parquet(make_processed(n), data)
+
+            def load():
+                df = read_listings(columns=["price_shekels", "rooms", "area_sqm", "floor", "city"],
+                                   filters=[("price_shekels", ">", 0)], path=data)
+                return prepare_features(df, {"rooms": 3.0, "area_sqm": 70.0, "floor": 2.0})
+
+            X, t_load = timed(load)
+            _, t_fit = timed(lambda: build_preprocessor().fit_transform(X))
+            t_old = t_load + args.fits * t_fit
+            _, t_hash = timed(lambda: data_hash(data))
+            cold, t_cold = timed(lambda: load_features(path=data, cache_dir=cache, refresh=True))
+            warm, t_warm = timed(lambda: load_features(path=data, cache_dir=cache))
+            assert warm.from_cache and warm.key == cold.key
+
+            write_parquet(make_processed(n, seed=1), data)
+            changed = load_features(path=data, cache_dir=cache)
+            assert not changed.from_cache and changed.key != cold.key
+            size = sum(p.stat().st_size for p in cache.glob("*.joblib")) / len(list(cache.glob("*.joblib")))
+
+            print(f"{n:>9,} rows | load {t_load:5.2f}s + {args.fits} x preprocess {t_fit:5.2f}s = {t_old:7.1f}s | "
+                  f"store cold {t_cold:6.2f}s | warm {t_warm:6.2f}s (hash {t_hash:5.2f}s) | "
+                  f"entry {size / 2**20:6.1f} MB | invalidated on change: yes")
+
+if __name__ == "__main__":
+    main()
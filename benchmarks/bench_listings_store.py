@@ -0,0 +1,89 @@
+# benchmarks/bench_listings_store.py
+"""Chargement des annonces nettoyées: CSV (read_csv + to_numeric) vs Parquet typé.
+
+Chaque mesure tourne dans un sous-processus neuf pour que le pic RSS soit celui du
+seul chargement (Linux: lu dans /proc/self/status).
+
+    python benchmarks/bench_listings_store.py --rows 100000 1000000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from config import DATA_PROCESSED  # noqa: E402
+from listings_store import write_parquet  # noqa: E402
+
+# colonnes lues par ml_train.load_data
+TRAIN_COLS = ["price_shekels", "rooms", "area_sqm", "floor", "city"]
+
+LOADERS = {
+    # ancien chemin des consommateurs: tout le fichier puis coercitions
+    "csv": """
+df = pd.read_csv(path)
+for c in ["price_shekels", "rooms", "area_sqm", "floor"]:
+    df[c] = pd.to_numeric(df[c], errors="coerce")
+""",
+    "parquet": """
+from listings_store import read_listings
+df = read_listings(columns=TRAIN_COLS, filters=[("price_shekels", ">", 0)], path=path)
+""",
+}
+
+# VmHWM (pic RSS du processus) et non ru_maxrss, hérité du parent à travers fork/exec
+CHILD = """
+import sys, time, json
+sys.path.insert(0, {src!r})
+import pandas as pd
+def hwm_mb():
+    for line in open("/proc/self/status"):
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+path, TRAIN_COLS = {path!r}, {cols!r}
+base = hwm_mb()
+t0 = time.perf_counter()
+{body}
+dt = time.perf_counter() - t0
+print(json.dumps({{"seconds": dt, "rss_mb": hwm_mb() - base, "df_mb": df.memory_usage(deep=True).sum() / 2**20}}))
+"""
+
+def make_processed(n, seed=0):
+    """Échantillon réel ré-échantillonné à n lignes, prix/surfaces bruités."""
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(DATA_PROCESSED)
+    df = base.sample(n, replace=True, random_state=seed).reset_index(drop=True)
+    df["price_shekels"] = (df["price_shekels"] * rng.uniform(0.8, 1.2, n)).round(-3)
+    df["area_sqm"] = (df["area_sqm"] * rng.uniform(0.9, 1.1, n)).round()
+    df["price_per_sqm"] = df["price_shekels"] / df["area_sqm"]
+    return df
+
+def measure(kind, path):
+    code = CHILD.format(src=str(ROOT / "src"), path=str(path), cols=TRAIN_COLS, body=LOADERS[kind])
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            df = make_processed(n)
+            csv_path, pq_path = Path(tmp) / f"l{n}.csv", Path(tmp) / f"l{n}_parquet"
+            df.to_csv(csv_path, index=False)
+            write_parquet(df, pq_path)
+            for kind, path in (("csv", csv_path), ("parquet", pq_path)):
+                r = measure(kind, path)
+                print(f"{n:>9,} rows | {kind:<7} | load {r['seconds']:6.2f}s | "
+                      f"peak RSS +{r['rss_mb']:7.1f} MB | frame {r['df_mb']:7.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_load_postgres.py
+"""Chargement PostgreSQL: ancien to_sql(append) vs COPY + upsert (load_to_postgres.load).
+
+Nécessite une base locale jetable (les tables bench_* sont supprimées/recréées):
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/postgres \\
+        python benchmarks/bench_load_postgres.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+import load_to_postgres as loader  # noqa: E402
+from config import DATA_PROCESSED  # noqa: E402
+from listings_store import write_parquet  # noqa: E402
+
+def make_processed(n, seed=0):
+    """Échantillon réel ré-échantillonné à n lignes, avec une url unique par annonce."""
+    rng = np.random.default_rng(seed)
+    df = pd.read_csv(DATA_PROCESSED).sample(n, replace=True, random_state=seed).reset_index(drop=True)
+    df["price_shekels"] = (df["price_shekels"] * rng.uniform(0.8, 1.2, n)).round(-3)
+    df["price_per_sqm"] = df["price_shekels"] / df["area_sqm"]
+    df["url"] = [f"https://www.yad2.co.il/realestate/item/bench{i:08d}" for i in range(n)]
+    return df
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--chunksize", type=int, default=50_000)
+    args = ap.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL manquant (base locale jetable)")
+    dsn = loader.pg_dsn(url)
+
+    import psycopg
+    from sqlalchemy import create_engine
+
+    df = make_processed(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "listings_parquet"
+        write_parquet(df, path)
+
+        # ancien chemin: INSERT via to_sql, sans clé
+        engine = create_engine(dsn.replace("postgresql://", "postgresql+psycopg://", 1))
+        with psycopg.connect(dsn, autocommit=True) as c:
+            c.execute("DROP TABLE IF EXISTS bench_to_sql")
+        t0 = time.perf_counter()
+        df[loader.COLUMNS].to_sql("bench_to_sql", engine, if_exists="append", index=False)
+        dt = time.perf_counter() - t0
+        print(f"to_sql append   | {args.rows:>9,} rows | {dt:7.2f}s | {args.rows / dt:>9,.0f} rows/s")
+
+        # nouveau chemin, sur une table dédiée
+        loader.TABLE_NAME, loader.STAGE = "bench_copy", "bench_copy_stage"
+        with psycopg.connect(dsn, autocommit=True) as c:
+            c.execute("DROP TABLE IF EXISTS bench_copy")
+        for label in ("COPY + upsert", "rerun (no-op)"):
+            s = loader.load(dsn, chunksize=args.chunksize, path=path)
+            print(f"{label:<15} | {s['rows']:>9,} rows | {s['seconds']:7.2f}s | "
+                  f"{s['rows_per_sec']:>9,.0f} rows/s | +{s['inserted']} ~{s['updated']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_locations.py
+"""Ville / quartier depuis `location`: ancienne boucle Python + 2 apply par ligne vs
+gazetteer (une résolution par lieu distinct, mémo à froid puis chaud).
+
+Lieux tirés de make_synthetic.py (villes et quartiers réels). Affiche aussi la part
+de lignes "Unknown" de chaque méthode.
+
+    python benchmarks/bench_locations.py --rows 100000 1000000
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+import gazetteer  # noqa: E402
+from make_synthetic import make_raw  # noqa: E402
+
+# ancien code de clean_listings.py
+PROPERTY_WORDS = {"דירה", "דירת גן", "בית פרטי", "פנטהאוז", "גג", "קוטג"}
+
+def parse_city_from_location(s):
+    if not isinstance(s, str) or not s.strip():
+        return "Unknown", None
+    parts = [x.strip() for x in re.split(r'\s*[-/]\s*', s) if x.strip()]
+    city = parts[0] if parts else s.strip()
+    neigh = parts[1] if len(parts) > 1 else None
+    return city or "Unknown", neigh
+
+def keep_city_only(s):
+    if not isinstance(s, str):
+        return "Unknown"
+    parts = [x.strip() for x in s.split(",") if x.strip()]
+    return (parts[-1] if parts else s.strip()) or "Unknown"
+
+def before(loc):
+    cities, neighs = [], []
+    for s in loc.fillna(""):
+        c, n = parse_city_from_location(s)
+        cities.append(c)
+        neighs.append(n)
+    city = pd.Series(cities, index=loc.index).apply(keep_city_only)
+    return city.apply(lambda s: "Unknown" if s in PROPERTY_WORDS else s), pd.Series(neighs, index=loc.index)
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = ap.parse_args()
+
+    for n in args.rows:
+        loc = make_raw(n)["location"]
+        (old, _), t_old = timed(lambda: before(loc))
+        gazetteer._MEMO.clear()
+        (new, _), t_cold = timed(lambda: gazetteer.normalize_locations(loc))
+        _, t_warm = timed(lambda: gazetteer.normalize_locations(loc))
+        print(f"{n:>9,} rows, {loc.nunique():,} distinct locations | loop+apply {t_old:6.2f}s | "
+              f"gazetteer cold {t_cold:5.2f}s, warm {t_warm:5.2f}s | "
+              f"Unknown {(old == 'Unknown').mean():.1%} -> {(new == 'Unknown').mean():.1%}, "
+              f"cities {old.nunique()} -> {new.nunique()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_model_format.py
+"""Pipeline RandomForest: pickle joblib vs export tableaux mmap (src/model_export.py).
+
+Entraîne une forêt de 200 arbres (paramètres de build_pipeline("rf")) sur un
+échantillon ré-échantillonné, l'écrit dans les deux formats, puis mesure dans un
+sous-processus neuf par format:
+
+- temps de chargement
+- mémoire après chargement + une prédiction: RssAnon (privée, non partageable) et
+  RssFile (pages du fichier, partagées via le page cache entre processus)
+- latence d'une prédiction 1 ligne (médiane) et débit sur 10 000 lignes
+
+    python benchmarks/bench_model_format.py --rows 20000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from bench_listings_store import make_processed  # noqa: E402
+from feature_store import prepare_features  # noqa: E402
+from ml_train import build_pipeline  # noqa: E402
+from model_export import export_model  # noqa: E402
+
+LOADERS = {
+    "joblib": "import joblib; model = joblib.load(path)",
+    "arrays": "from model_export import ArrayModel; model = ArrayModel(path)",
+}
+
+CHILD = """
+import sys, time, json
+sys.path.insert(0, {src!r})
+import numpy as np, pandas as pd
+def status():
+    out = {{}}
+    for line in open("/proc/self/status"):
+        k, _, v = line.partition(":")
+        if k in ("VmRSS", "RssAnon", "RssFile"):
+            out[k] = int(v.split()[0]) / 1024
+    return out
+X = pd.read_pickle({x!r})
+one = X.iloc[:1]
+base = status()
+t0 = time.perf_counter()
+{load}
+t_load = time.perf_counter() - t0
+model.predict(one)
+after = status()
+lat = []
+for _ in range(200):
+    t0 = time.perf_counter(); model.predict(one); lat.append(time.perf_counter() - t0)
+t0 = time.perf_counter(); model.predict(X); t_batch = time.perf_counter() - t0
+print(json.dumps({{"load": t_load, "anon": after["RssAnon"] - base["RssAnon"],
+                  "file": after["RssFile"] - base["RssFile"],
+                  "latency": float(np.median(lat)), "rows_per_sec": len(X) / t_batch}}))
+"""
+
+def measure(kind, path, x_path):
+    code = CHILD.format(src=str(ROOT / "src"), x=str(x_path), load=LOADERS[kind].replace("path", repr(str(path))))
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000, help="lignes d'entraînement")
+    args = ap.parse_args()
+
+    df = make_processed(args.rows)
+    X = prepare_features(df, {"rooms": 3.0, "area_sqm": 70.0, "floor": 2.0})
+    pipe = build_pipeline("rf")
+    pipe.set_params(est__n_jobs=-1)
+    t0 = time.perf_counter()
+    pipe.fit(X, df["price_shekels"])
+    print(f"fit 200 trees on {args.rows:,} rows: {time.perf_counter() - t0:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        joblib.dump(pipe, tmp / "model.joblib")
+        export_model(pipe, tmp / "arrays")
+        X.iloc[:10_000].to_pickle(tmp / "x.pkl")
+        sizes = {"joblib": (tmp / "model.joblib").stat().st_size,
+                 "arrays": sum(p.stat().st_size for p in (tmp / "arrays").iterdir())}
+        for kind, path in (("joblib", tmp / "model.joblib"), ("arrays", tmp / "arrays")):
+            r = measure(kind, path, tmp / "x.pkl")
+            print(f"{kind:<6} | file {sizes[kind] / 2**20:6.1f} MB | load {r['load'] * 1000:7.1f} ms | "
+                  f"private +{r['anon']:6.1f} MB | shared file +{r['file']:6.1f} MB | "
+                  f"1 row {r['latency'] * 1000:6.2f} ms | {r['rows_per_sec']:>9,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
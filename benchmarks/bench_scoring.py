@@ -0,0 +1,83 @@
+# benchmarks/bench_scoring.py
+"""Débit de prédiction du modèle sauvegardé (lignes/s).
+
+- per-row: un DataFrame d'une ligne + model.predict par annonce (bouton "Predict")
+- batch:   score_listings.score_file sur un dataset Parquet, par morceaux
+- http:    clients concurrents (1 annonce par requête) contre serve_model, sans
+           regroupement (max_batch=1) puis avec
+
+    python benchmarks/bench_scoring.py --rows 100000 1000000 --clients 16
+"""
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from bench_listings_store import make_processed  # noqa: E402
+from listings_store import write_parquet  # noqa: E402
+from score_listings import load_model, score_file  # noqa: E402
+from serve_model import MicroBatcher, make_server  # noqa: E402
+
+FEATURES = ["rooms", "area_sqm", "floor", "city"]
+
+def per_row(model, rows):
+    t0 = time.perf_counter()
+    for r in rows:
+        model.predict(pd.DataFrame([r]))
+    return len(rows) / (time.perf_counter() - t0)
+
+def http_clients(url, rows, clients):
+    """`clients` threads qui envoient chacun leur part des lignes, une par requête."""
+    def worker(part):
+        for r in part:
+            req = urllib.request.Request(url, data=json.dumps(r).encode(), method="POST")
+            json.loads(urllib.request.urlopen(req).read())
+
+    threads = [threading.Thread(target=worker, args=(rows[i::clients],)) for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(rows) / (time.perf_counter() - t0)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--per-row", type=int, default=300, help="annonces pour le mode per-row")
+    ap.add_argument("--requests", type=int, default=2_000, help="requêtes HTTP par mode")
+    ap.add_argument("--clients", type=int, default=16)
+    args = ap.parse_args()
+
+    model, fill = load_model()
+    sample = make_processed(max(args.per_row, args.requests))[FEATURES]
+    rows = sample.astype({"city": str}).to_dict("records")
+
+    print(f"per-row predict     | {per_row(model, rows[:args.per_row]):>10,.0f} rows/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            src = Path(tmp) / f"in{n}"
+            write_parquet(make_processed(n), src)
+            s = score_file(src, Path(tmp) / f"out{n}.parquet")
+            print(f"batch {n:>11,} rows | {s['rows_per_sec']:>10,.0f} rows/s end to end | "
+                  f"{s['predict_rows_per_sec']:>10,.0f} rows/s in predict")
+
+    for max_batch in (1, 512):
+        server = make_server(MicroBatcher(model, fill, max_batch=max_batch), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/predict"
+        rate = http_clients(url, rows[:args.requests], args.clients)
+        server.shutdown()
+        print(f"http max_batch={max_batch:<4} | {rate:>10,.0f} rows/s ({args.clients} clients)")
+
+if __name__ == "__main__":
+    main()
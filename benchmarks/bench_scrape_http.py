@@ -0,0 +1,85 @@
+# benchmarks/bench_scrape_http.py
+"""Moteur HTTP du scraper contre un serveur local qui sert des pages sauvegardées.
+
+Le serveur ajoute une latence fixe par requête (réseau simulé), renvoie un 429 au
+premier passage sur certaines pages (teste retries + backoff) et une page captcha
+sur une autre (teste la détection du challenge).
+
+    python benchmarks/bench_scrape_http.py --pages 40 --latency 0.3
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from http_fetch import fetch_all  # noqa: E402
+from scrape_yad2 import page_url, parse_ads_html  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+RESULTS = (FIXTURES / "yad2_results_page.html").read_bytes()
+CHALLENGE = (FIXTURES / "yad2_challenge_page.html").read_bytes()
+
+def make_server(latency, throttled=(), challenged=()):
+    seen = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = int(parse_qs(urlparse(self.path).query).get("page", ["1"])[0])
+            time.sleep(latency)
+            with lock:
+                first = page not in seen
+                seen.add(page)
+            if page in throttled and first:
+                status, body = 429, b"slow down"
+            elif page in challenged:
+                status, body = 200, CHALLENGE
+            else:
+                status, body = 200, RESULTS
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run(urls, concurrency, rate):
+    t0 = time.perf_counter()
+    results = asyncio.run(fetch_all(urls, concurrency=concurrency, rate=rate, retries=3, backoff=0.05))
+    dt = time.perf_counter() - t0
+    ads = sum(len(parse_ads_html(r.text, r.url)) for r in results if r.ok)
+    return dt, results, ads
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.3, help="secondes par requête côté serveur")
+    ap.add_argument("--rate", type=float, default=20.0, help="requêtes/seconde max")
+    args = ap.parse_args()
+
+    for concurrency in (1, 4, 8):
+        server = make_server(args.latency, throttled={3, 7}, challenged={5})
+        base = f"http://127.0.0.1:{server.server_address[1]}/realestate/forsale"
+        urls = [page_url(base, p) for p in range(1, args.pages + 1)]
+        dt, results, ads = run(urls, concurrency, args.rate)
+        server.shutdown()
+        ok = sum(r.ok for r in results)
+        challenged = [i + 1 for i, r in enumerate(results) if r.challenged]
+        retried = [i + 1 for i, r in enumerate(results) if r.attempts > 1]
+        print(f"concurrency {concurrency:>2} | {dt:6.2f}s | {len(urls) / dt:6.1f} pages/s | "
+              f"ok {ok}/{len(urls)} | {ads} ads | challenged {challenged} | retried {retried}")
+
+if __name__ == "__main__":
+    main()
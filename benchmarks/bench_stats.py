@@ -0,0 +1,61 @@
+# benchmarks/bench_stats.py
+"""stats_modeling: descriptives groupées, tests de Welch toutes paires, bootstrap.
+
+Données ré-échantillonnées, chaque ville éclatée en --split variantes pour avoir
+des centaines de villes. Compare les tests batchés (depuis n/moyenne/variance) à
+une boucle stats.ttest_ind par paire (mesurée sur --loop-pairs paires puis
+extrapolée), et le bootstrap sur 1 worker vs tous les cœurs.
+
+    python benchmarks/bench_stats.py --rows 100000 1000000 --split 5 --n-boot 200
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from bench_listings_store import make_processed  # noqa: E402
+from stats_modeling import bootstrap_median_ci, describe_groups, welch_all_pairs  # noqa: E402
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--split", type=int, default=5, help="variantes par ville réelle")
+    ap.add_argument("--n-boot", type=int, default=200)
+    ap.add_argument("--loop-pairs", type=int, default=500)
+    args = ap.parse_args()
+
+    for n in args.rows:
+        df = make_processed(n)
+        rng = np.random.default_rng(0)
+        df["city"] = (df["city"].astype(str) + "#" + rng.integers(0, args.split, n).astype(str)).astype("category")
+
+        (cities, t_city) = timed(lambda: describe_groups(df, "city"))
+        (_, t_neigh) = timed(lambda: describe_groups(df.dropna(subset=["neighborhood"]), ["city", "neighborhood"]))
+        pairs, t_pairs = timed(lambda: welch_all_pairs(cities, "price_per_sqm"))
+
+        by_city = {k: v.dropna().to_numpy() for k, v in df.groupby("city", observed=True)["price_per_sqm"]}
+        sub = pairs.sample(min(args.loop_pairs, len(pairs)), random_state=0)
+        _, t_loop = timed(lambda: [stats.ttest_ind(by_city[a], by_city[b], equal_var=False)
+                                   for a, b in zip(sub["a"], sub["b"])])
+        t_loop *= len(pairs) / len(sub)
+
+        _, t_boot1 = timed(lambda: bootstrap_median_ci(df, "city", n_boot=args.n_boot, n_jobs=1))
+        _, t_bootn = timed(lambda: bootstrap_median_ci(df, "city", n_boot=args.n_boot, n_jobs=-1))
+
+        print(f"{n:>9,} rows, {len(cities)} cities | describe city {t_city:5.2f}s + neighborhood {t_neigh:5.2f}s | "
+              f"{len(pairs):,} Welch pairs batched {t_pairs:6.3f}s vs loop ~{t_loop:6.1f}s | "
+              f"bootstrap x{args.n_boot} 1 job {t_boot1:6.1f}s, {os.cpu_count()} cores {t_bootn:6.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/make_synthetic.py
+"""Scrapes Yad2 synthétiques, au format brut de scrape_yad2.py (title, price, location,
+details, tags, image_url, url), pour mesurer la chaîne à 10k / 100k / 1M annonces.
+
+Villes, quartiers et prix au m² par ville viennent de listings_clean.csv (villes
+réelles, quartiers réels complétés par des quartiers numérotés); pièces, surface et
+étage suivent des lois simples, le prix = surface x prix au m² de la ville x bruit
+log-normal. Les textes reprennent les formats du site:
+
+    price     "₪ 2,350,000" / "₪ 2 350 000" / "לא צוין מחיר"
+    location  "דירה, <quartier>, <ville>"
+    details   "4 חדרים • קומה 3 • 95 מ״ר" ("קומה קרקע", étage parfois absent)
+
+--dup-rate: part d'annonces republiées (autre url; titre/prix retouchés ou autre photo).
+
+    python benchmarks/make_synthetic.py --rows 100000 --out /tmp/yad2_100k.csv
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+from config import DATA_PROCESSED  # noqa: E402
+
+PROPERTY_TYPES = ["דירה", "דירה", "דירה", "דירת גן", "גג/ פנטהאוז", "בית פרטי/ קוטג'", "דו משפחתי"]
+STREETS = ["הרצל", "ויצמן", "בן גוריון", "ז'בוטינסקי", "רוטשילד", "הנביאים", "אחד העם", "השריג",
+           "הגפן", "נרקיס", "הדובדבן", "המייסדים", "שילה", "צופיה", "גרגר הנחלים", "הזית"]
+TAGS = ['ממ"ד', "חניה", "מעלית", "3 כיווני אוויר", "4 כיווני אוויר", "2 מרפסות",
+        "נוף פתוח לפארק", "חדש מקבלן", "בניין משופץ", "בהזדמנות"]
+ROOMS = np.array([1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 5.5, 6, 7])
+ROOMS_P = np.array([2, 1, 6, 4, 16, 8, 22, 8, 15, 5, 8, 5], dtype=float)
+EXTRA_NEIGHBORHOODS = 12  # quartiers numérotés ajoutés par ville
+
+def gazetteer():
+    """(ville, quartier, poids, prix au m² médian de la ville) depuis les données réelles."""
+    base = pd.read_csv(DATA_PROCESSED, usecols=["location", "price_per_sqm"])
+    parts = base["location"].fillna("").str.split(",")
+    city = parts.str[-1].str.strip()
+    neigh = parts.map(lambda p: ", ".join(x.strip() for x in p[1:-1]) or None)
+    ok = city.ne("") & base["price_per_sqm"].between(3_000, 100_000)
+    real = pd.DataFrame({"city": city[ok], "neighborhood": neigh[ok], "ppsqm": base["price_per_sqm"][ok]})
+    ppsqm = real.groupby("city")["ppsqm"].median()
+    weight = real["city"].value_counts()
+
+    rows = []
+    for c in ppsqm.index:
+        names = sorted(real.loc[real["city"] == c, "neighborhood"].dropna().unique())
+        names += [f"שכונה {k}" for k in range(1, EXTRA_NEIGHBORHOODS + 1)]
+        rows += [(c, nb, weight[c] / len(names), ppsqm[c]) for nb in names]
+    return pd.DataFrame(rows, columns=["city", "neighborhood", "weight", "ppsqm"])
+
+def _fmt_price(p, spaces):
+    s = f"{p:,}"
+    return "₪ " + (s.replace(",", " ") if spaces else s)
+
+def make_raw(n, seed=0, dup_rate=0.02, return_dups=False):
+    """n annonces brutes (colonnes de scrape_yad2.py), déterministe pour (n, seed).
+    return_dups: renvoie aussi, pour chaque ligne, la ligne d'origine dont elle est la
+    republication (-1 sinon)."""
+    rng = np.random.default_rng(seed)
+    gz = gazetteer()
+    loc = rng.choice(len(gz), n, p=(gz["weight"] / gz["weight"].sum()).to_numpy())
+    # effet quartier: +-20% autour du prix au m² de la ville
+    neigh_factor = np.random.default_rng(seed + 1).uniform(0.8, 1.2, len(gz))[loc]
+
+    rooms = rng.choice(ROOMS, n, p=ROOMS_P / ROOMS_P.sum())
+    area = np.clip(rooms * 22 + rng.normal(12, 12, n), 25, 450).round().astype(int)
+    floor = np.minimum(rng.geometric(0.25, n) - 1, 30)
+    ptype = rng.choice(len(PROPERTY_TYPES), n)
+    price = area * gz["ppsqm"].to_numpy()[loc] * neigh_factor * rng.lognormal(0, 0.2, n)
+    price = np.maximum(price.round(-3), 100_000).astype(np.int64)
+
+    spaces = rng.random(n) < 0.3
+    no_price = rng.random(n) < 0.03
+    prices = ["לא צוין מחיר" if miss else _fmt_price(p, sp)
+              for p, sp, miss in zip(price.tolist(), spaces.tolist(), no_price.tolist())]
+
+    no_floor = rng.random(n) < 0.05
+    rooms_txt = [f"{r:g}" for r in rooms.tolist()]
+    floor_txt = np.where(floor == 0, "קומה קרקע", np.char.add("קומה ", floor.astype(str)))
+    details = [f"{r} חדרים • {area[i]} מ״ר" if no_floor[i] else f"{r} חדרים • {floor_txt[i]} • {area[i]} מ״ר"
+               for i, r in enumerate(rooms_txt)]
+
+    types = np.array(PROPERTY_TYPES, dtype=object)[ptype]
+    city = gz["city"].to_numpy(dtype=object)[loc]
+    neigh = gz["neighborhood"].to_numpy(dtype=object)[loc]
+    location = [f"{t}, {nb}, {c}" for t, nb, c in zip(types, neigh, city)]
+
+    n_tags = rng.integers(0, 4, n)
+    tag_idx = rng.integers(0, len(TAGS), (n, 3))
+    tags = [", ".join(dict.fromkeys(TAGS[j] for j in tag_idx[i, :k])) or None
+            for i, k in enumerate(n_tags.tolist())]
+
+    streets = np.array(STREETS, dtype=object)[rng.integers(0, len(STREETS), n)]
+    titles = [f"{s} {k}" for s, k in zip(streets, rng.integers(1, 200, n).tolist())]
+    ids = [f"s{seed}x{i}" for i in range(n)]
+    df = pd.DataFrame({
+        "title": titles, "price": prices, "location": location, "details": details, "tags": tags,
+        "image_url": [f"https://img.yad2.co.il/Pic/synthetic/{i}.jpeg" for i in ids],
+        "url": [f"https://www.yad2.co.il/realestate/item/{i}" for i in ids],
+    })
+
+    # republications: contenu d'une autre annonce, url propre; la moitié avec un titre
+    # retouché et un prix +-3%, la moitié avec une nouvelle photo
+    dup = np.flatnonzero(rng.random(n) < dup_rate)
+    dup_of = np.full(n, -1)
+    if len(dup):
+        src = rng.integers(0, n, len(dup))
+        src = np.where(np.isin(src, dup), (src + 1) % n, src)
+        cols = ["title", "price", "location", "details", "tags", "image_url"]
+        df.loc[dup, cols] = df.loc[src, cols].to_numpy()
+        edit = rng.random(len(dup)) < 0.5
+        df.loc[dup[edit], "title"] = df.loc[dup[edit], "title"] + " - מחיר חדש!"
+        df.loc[dup[edit], "price"] = [_fmt_price(int(round(price[i] * f, -3)), False)
+                                      for i, f in zip(src[edit], rng.uniform(0.97, 1.03, edit.sum()))]
+        df.loc[dup[~edit], "image_url"] = df.loc[dup[~edit], "url"].str.replace("realestate/item", "Pic/relist")
+        dup_of[dup] = src
+    return (df, dup_of) if return_dups else df
+
+def main():
+    ap = argparse.ArgumentParser(description="CSV brut Yad2 synthétique")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--dup-rate", type=float, default=0.02)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+    df = make_raw(args.rows, args.seed, args.dup_rate)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(args.out, index=False)
+    print(f"{len(df):,} annonces, {df['location'].str.rsplit(',', n=1).str[-1].nunique()} villes → {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# benchmarks/run_suite.py
+"""Suite de benchmarks de bout en bout sur des scrapes synthétiques (make_synthetic.py).
+
+Pour chaque taille, à partir du CSV brut:
+
+- clean      clean_listings.clean_frame + save (Parquet) dans un dossier temporaire
+- train      feature store (load_features, sans cache) + fit de chaque modèle (--models)
+- predict    score_listings.score_file du dataset nettoyé avec le modèle ajusté
+- stats      describe_groups villes/quartiers, bootstrap des médianes, Welch toutes paires
+- dashboard  lecture des colonnes du dashboard, build_index, axes des graphes, puis
+             --queries requêtes de filtres (villes / pièces / surface) + histogramme
+
+Chaque cas est un enregistrement perf (sous-étapes comprises) ajouté à
+reports/bench.json avec la taille et le commit: les passages se comparent dans le
+temps à taille égale. Les CSV bruts générés sont gardés dans benchmarks/.synthetic/
+(régénérés si make_synthetic.py change).
+
+    python benchmarks/run_suite.py --rows 10000 100000 1000000
+    python benchmarks/run_suite.py --rows 100000 --cases clean stats
+    python src/perf.py --path reports/bench.json --last 20
+"""
+import argparse
+import hashlib
+import subprocess
+import sys
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "dashboard"))
+import perf  # noqa: E402
+from charts import bin_edges, histogram  # noqa: E402
+from clean_listings import clean_frame, save  # noqa: E402
+from config import REPORTS_DIR  # noqa: E402
+from feature_store import load_features  # noqa: E402
+from filter_index import build_index, query  # noqa: E402
+from make_synthetic import make_raw  # noqa: E402
+from ml_train import assemble, build_estimator, design_matrix  # noqa: E402
+from score_listings import score_file  # noqa: E402
+from stats_modeling import bootstrap_median_ci, describe_groups, welch_all_pairs  # noqa: E402
+
+BENCH_PATH = REPORTS_DIR / "bench.json"
+DATA_DIR = ROOT / "benchmarks" / ".synthetic"
+CASES = ["clean", "train", "predict", "stats", "dashboard"]
+# colonnes lues par dashboard/streamlit_app.py
+DASHBOARD_COLUMNS = ["city", "rooms", "area_sqm", "floor", "price_shekels", "price_per_sqm"]
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def raw_csv(n, seed, data_dir=DATA_DIR, regen=False) -> Path:
+    """CSV brut synthétique de n annonces (réutilisé tant que le générateur ne change pas)."""
+    version = hashlib.sha1((ROOT / "benchmarks" / "make_synthetic.py").read_bytes()).hexdigest()[:8]
+    path = Path(data_dir) / f"raw_{n}_s{seed}_{version}.csv"
+    if regen or not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        print(f"Génération de {n:,} annonces → {path}")
+        tmp = path.with_suffix(".tmp")
+        make_raw(n, seed).to_csv(tmp, index=False)
+        tmp.replace(path)
+    return path
+
+def run_size(n, raw, tmp, args, meta):
+    """Tous les cas pour une taille; un cas non demandé mais requis tourne sans mesure."""
+    tmp = Path(tmp)
+    pq, csv = tmp / "listings_parquet", tmp / "listings_clean.csv"
+
+    def measured(case):
+        return perf.stage(case, path=BENCH_PATH, size=n, **meta) if case in args.cases else nullcontext()
+
+    with measured("clean"):
+        # mémo des lieux dans le dossier temporaire: toujours à froid, mémo réel intact
+        save(clean_frame(raw, memo_path=tmp / "location_cache.pkl"), csv, pq, write_csv=False)
+
+    fs, model_path = None, tmp / "model.joblib"
+    if {"train", "predict", "stats"} & set(args.cases):
+        with measured("train"):
+            with perf.step("features") as st:
+                fs = load_features(pq, csv, cache_dir=tmp / "feature_cache", refresh=True)
+                st["rows"] = len(fs.y)
+            perf.note(rows_in=len(fs.y))
+            models = args.models if "train" in args.cases else args.models[-1:]
+            # sous-échantillon aléatoire (le store est partitionné par ville: pas les m premières)
+            n_fit = min(len(fs.y), args.fit_rows or len(fs.y))
+            rows = np.sort(np.random.default_rng(0).permutation(len(fs.y))[:n_fit])
+            for kind in models:
+                est = build_estimator(kind)
+                if kind == "rf":
+                    est.set_params(n_estimators=args.trees)
+                with perf.step(f"fit_{kind}", rows=n_fit):
+                    est.fit(design_matrix(kind, fs.Xt[rows]), fs.y.iloc[rows])
+            joblib.dump(assemble(kind, fs.pre, est, fs.X), model_path)
+
+    if "predict" in args.cases:
+        with measured("predict"):
+            with perf.step("score_file") as st:
+                res = score_file(pq, tmp / "scored.parquet", chunksize=args.chunksize, model_path=model_path)
+                st["rows"] = res["rows"]
+            perf.note(rows_in=res["rows"], bytes_out=perf.size_of(tmp / "scored.parquet"))
+
+    if "stats" in args.cases:
+        with measured("stats"):
+            df = fs.frame
+            perf.note(rows_in=len(df))
+            with perf.step("describe", rows=len(df)):
+                cities = describe_groups(df, "city")
+                describe_groups(df.dropna(subset=["neighborhood"]), ["city", "neighborhood"])
+            with perf.step("bootstrap", rows=len(df)):
+                bootstrap_median_ci(df, "city", n_boot=args.n_boot)
+            with perf.step("welch_all_pairs"):
+                welch_all_pairs(cities, "price_per_sqm")
+
+    if "dashboard" in args.cases:
+        with measured("dashboard"):
+            with perf.step("load") as st:
+                df = pd.read_parquet(pq, columns=DASHBOARD_COLUMNS)
+                st["rows"] = len(df)
+            perf.note(rows_in=len(df), bytes_in=perf.size_of(pq))
+            with perf.step("build_index", rows=len(df)):
+                ix = build_index(df)
+                edges = bin_edges(ix.price)
+            # mêmes requêtes d'un passage à l'autre: 1 à 5 villes, plages pièces/surface
+            rng = np.random.default_rng(0)
+            (r_lo, r_hi), (a_lo, a_hi) = ix.bounds["rooms"], ix.bounds["area"]
+            for _ in range(args.queries):
+                sel = list(rng.choice(ix.cities, min(len(ix.cities), rng.integers(1, 6)), replace=False))
+                rooms = sorted(rng.uniform(r_lo, r_hi, 2))
+                area = sorted(rng.uniform(a_lo, a_hi, 2))
+                with perf.step("query") as st:
+                    pos, _ = query(ix, sel, rooms, area)
+                    histogram(ix.price[pos], edges)
+                    st["rows"] = len(pos)
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks clean/train/predict/stats/dashboard sur données synthétiques")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--cases", nargs="+", default=CASES, choices=CASES)
+    ap.add_argument("--models", nargs="+", default=["lr", "rf"], choices=["lr", "rf", "hgb"],
+                    help="modèles ajustés par le cas train (le dernier sert au cas predict)")
+    ap.add_argument("--trees", type=int, default=50, help="arbres de la forêt aléatoire")
+    ap.add_argument("--fit-rows", type=int, default=100_000,
+                    help="lignes max. des fits (0 = toutes; une forêt sur 1M lignes prend des heures sur 1 cœur)")
+    ap.add_argument("--n-boot", type=int, default=200)
+    ap.add_argument("--queries", type=int, default=200, help="requêtes de filtres du cas dashboard")
+    ap.add_argument("--chunksize", type=int, default=100_000, help="lignes par morceau du cas predict")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--regen", action="store_true", help="régénère les CSV synthétiques")
+    args = ap.parse_args()
+
+    meta = {"commit": git_rev(), "trees": args.trees, "fit_rows": args.fit_rows,
+            "models": ",".join(args.models)}
+    for n in args.rows:
+        raw = raw_csv(n, args.seed, regen=args.regen)
+        with tempfile.TemporaryDirectory() as tmp:
+            run_size(n, raw, tmp, args, meta)
+
+    print(f"\n=== {BENCH_PATH} ===")
+    perf.print_runs(perf.load_history(BENCH_PATH), len(args.rows) * len(args.cases))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Server-side chart data for the dashboard (pandas/numpy only, no Streamlit).
+
+The browser only receives what is drawn: histogram bins instead of one bar per
+listing, and a bounded number of scatter points (stratified sample or grid cells).
+"""
+import numpy as np
+import pandas as pd
+
+HIST_BINS = 40
+# above this many filtered rows the scatter switches to a level-of-detail mode
+SCATTER_MAX_POINTS = 5_000
+GRID_BINS = 60
+
+def bin_edges(values, bins=HIST_BINS, clip=(0.5, 99.5)):
+    """Edges over the central percentiles of the whole dataset (computed once per
+    dataset version): the axis stays the same when filters change and a few
+    extreme prices do not squash every other bar into one."""
+    values = np.asarray(values, dtype="float64")
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return np.linspace(0.0, 1.0, bins + 1)
+    lo, hi = np.percentile(values, clip)
+    return np.histogram_bin_edges(values, bins=bins, range=(lo, hi))
+
+def histogram(values, edges) -> pd.DataFrame:
+    """Counts per bin; values outside the edges fall in the first/last bin."""
+    values = np.asarray(values, dtype="float64")
+    values = np.clip(values[np.isfinite(values)], edges[0], edges[-1])
+    counts, _ = np.histogram(values, bins=edges)
+    mid = ((edges[:-1] + edges[1:]) / 2).round().astype("int64")
+    return pd.DataFrame({"listings": counts}, index=pd.Index(mid, name="price_shekels"))
+
+def stratified_sample(df: pd.DataFrame, by: str, n=SCATTER_MAX_POINTS, min_per_group=20, seed=0):
+    """At most n rows, each group keeping its share of the rows (small groups keep
+    at least `min_per_group`, capped at n / number of groups, so a city does not
+    vanish from the chart)."""
+    if len(df) <= n:
+        return df
+    rng = np.random.default_rng(seed)
+    frac = n / len(df)
+    groups = df.groupby(by, observed=True).indices.values()
+    floor = min(min_per_group, n // max(len(groups), 1))
+    keep = []
+    for idx in groups:
+        k = min(len(idx), max(floor, round(len(idx) * frac)))
+        keep.append(rng.choice(idx, k, replace=False))
+    if not keep:
+        return df.iloc[:0]
+    keep = np.concatenate(keep)
+    if len(keep) > n:  # rounding up / more groups than n
+        keep = rng.choice(keep, n, replace=False)
+    return df.iloc[np.sort(keep)]
+
+def grid_aggregate(df: pd.DataFrame, x: str, y: str, by: str, ranges, bins=GRID_BINS):
+    """One point per (group, x-cell, y-cell): mean x/y of the cell and its row count.
+    At most n_groups * bins**2 points whatever the number of rows."""
+    xs = df[x].to_numpy(dtype="float64")
+    ys = df[y].to_numpy(dtype="float64")
+    codes, groups = pd.factorize(df[by], sort=True)
+    ok = np.isfinite(xs) & np.isfinite(ys) & (codes >= 0)
+    xs, ys, codes = xs[ok], ys[ok], codes[ok]
+
+    def cell(v, lo, hi):
+        span = (hi - lo) or 1.0
+        return np.clip(((v - lo) / span * bins).astype("int64"), 0, bins - 1)
+
+    # dense key space (n_groups * bins**2): bincount in O(n), no sort
+    key = (codes * bins + cell(xs, *ranges[0])) * bins + cell(ys, *ranges[1])
+    size = len(groups) * bins * bins
+    counts = np.bincount(key, minlength=size)
+    cells = np.flatnonzero(counts)
+    counts = counts[cells]
+    return pd.DataFrame({
+        x: np.bincount(key, weights=xs, minlength=size)[cells] / counts,
+        y: np.bincount(key, weights=ys, minlength=size)[cells] / counts,
+        "listings": counts,
+        by: np.asarray(groups)[cells // (bins * bins)],
+    })
@@ -0,0 +1,119 @@
+"""Filter index for the dashboard (pandas/numpy only, no Streamlit).
+
+Built once per dataset version, it answers the sidebar filters without scanning the
+full frame on every rerun:
+
+- rows sorted by (city, rooms), with per-city [start, end) offsets
+- rooms range -> `searchsorted` inside each selected city block (contiguous slice)
+- area range  -> skipped when it covers the block's min/max, else a mask on the slice
+- prefix sums of price / price per sqm -> KPIs of a contiguous slice in O(1)
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+@dataclass
+class FilterIndex:
+    df: pd.DataFrame          # sorted by (city, rooms), RangeIndex
+    cities: list              # sorted city names (sidebar options)
+    offsets: dict             # city -> (start, end) in df
+    rooms: np.ndarray         # float64, sorted inside each city block
+    area: np.ndarray
+    price: np.ndarray
+    ppsqm: np.ndarray
+    area_bounds: dict         # city -> (min, max) area of the block
+    csum: dict                # prefix sums, length n + 1 (NaN counted as 0 / not counted)
+    bounds: dict              # global min/max for the sliders
+    medians: dict             # defaults of the prediction form
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(values) + 1)
+    np.cumsum(values, out=out[1:])
+    return out
+
+def build_index(df: pd.DataFrame) -> FilterIndex:
+    city = df["city"].astype("category")
+    codes = city.cat.codes.to_numpy()
+    rooms = df["rooms"].to_numpy(dtype="float64")
+    order = np.lexsort((rooms, codes))
+    df = df.iloc[order].reset_index(drop=True)
+    codes = codes[order]
+
+    rooms = df["rooms"].to_numpy(dtype="float64")
+    area = df["area_sqm"].to_numpy(dtype="float64")
+    price = df["price_shekels"].to_numpy(dtype="float64")
+    ppsqm = df["price_per_sqm"].to_numpy(dtype="float64")
+
+    offsets, area_bounds = {}, {}
+    for k, name in enumerate(city.cat.categories):
+        s, e = np.searchsorted(codes, k, "left"), np.searchsorted(codes, k, "right")
+        if e > s:
+            offsets[str(name)] = (int(s), int(e))
+            block = area[s:e]
+            finite = np.isfinite(block).any()
+            area_bounds[str(name)] = (np.nanmin(block), np.nanmax(block)) if finite else (np.nan, np.nan)
+
+    csum = {
+        "price": _prefix(np.nan_to_num(price)),
+        "price_n": _prefix(~np.isnan(price)),
+        "ppsqm": _prefix(np.nan_to_num(ppsqm)),
+        "ppsqm_n": _prefix(~np.isnan(ppsqm)),
+    }
+    bounds = {
+        "rooms": (float(np.nanmin(rooms)), float(np.nanmax(rooms))),
+        "area": (float(np.nanmin(area)), float(np.nanmax(area))),
+    }
+    medians = {c: float(df[c].median()) for c in ["area_sqm", "rooms", "floor"]}
+    return FilterIndex(df, sorted(offsets), offsets, rooms, area, price, ppsqm,
+                       area_bounds, csum, bounds, medians)
+
+def query(ix: FilterIndex, cities, rooms_range, area_range):
+    """Rows matching the filters (positions in ix.df) and the KPIs of the selection.
+
+    Same semantics as the chained masks `isin(cities) & rooms in range & area in range`
+    (bounds inclusive, NaN excluded)."""
+    r0, r1 = rooms_range
+    a0, a1 = area_range
+    parts = []
+    by_city = {}
+    tot = {"price": 0.0, "price_n": 0, "ppsqm": 0.0, "ppsqm_n": 0}
+    for c in cities:
+        if c not in ix.offsets:
+            continue
+        s, e = ix.offsets[c]
+        block = ix.rooms[s:e]
+        lo = s + int(np.searchsorted(block, r0, "left"))
+        hi = s + int(np.searchsorted(block, r1, "right"))
+        if hi <= lo:
+            continue
+        amin, amax = ix.area_bounds[c]
+        if a0 <= amin and amax <= a1:
+            # whole slice matches: KPIs from the prefix sums
+            pos = np.arange(lo, hi)
+            sums = {k: ix.csum[k][hi] - ix.csum[k][lo] for k in tot}
+        else:
+            a = ix.area[lo:hi]
+            pos = lo + np.flatnonzero((a >= a0) & (a <= a1))
+            if not len(pos):
+                continue
+            p, q = ix.price[pos], ix.ppsqm[pos]
+            sums = {"price": np.nansum(p), "price_n": int((~np.isnan(p)).sum()),
+                    "ppsqm": np.nansum(q), "ppsqm_n": int((~np.isnan(q)).sum())}
+        parts.append(pos)
+        for k in tot:
+            tot[k] += sums[k]
+        if sums["price_n"]:
+            by_city[c] = sums["price"] / sums["price_n"]
+
+    pos = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    area_sel = ix.area[pos]
+    kpis = {
+        "n": len(pos),
+        "avg_price": tot["price"] / tot["price_n"] if tot["price_n"] else 0,
+        "avg_ppsqm": tot["ppsqm"] / tot["ppsqm_n"] if tot["ppsqm_n"] else 0,
+        "median_area": float(np.nanmedian(area_sel)) if np.isfinite(area_sel).any() else 0,
+        "avg_price_by_city": (pd.Series(by_city, name="price_shekels", dtype="float64")
+                              .rename_axis("city").sort_index()),
+    }
+    return pos, kpis
@@ -1,40 +1,113 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parents[1] / "src"))
+from charts import (SCATTER_MAX_POINTS, bin_edges, grid_aggregate,  # noqa: E402
+                    histogram, stratified_sample)
+from filter_index import build_index, query  # noqa: E402
+from listings_store import read_listings  # noqa: E402
+from model_export import ARRAYS_DIR, load_array_model  # noqa: E402
+from summary import (COLUMNS, DATA_PARQUET, DATA_PROCESSED, dataset_version,  # noqa: E402
+                     default_filters, load_summary, summarize, write_summary)
+
 BASE_DIR = Path(__file__).resolve().parents[1]
-DATA_PROCESSED = BASE_DIR / "data" / "processed" / "listings_clean.csv"
 MODEL_PATH = BASE_DIR / "models" / "price_model.joblib"
 
 st.set_page_config(page_title="Yad2 Real Estate — Dashboard", layout="wide")
 st.title("🏠 Yad2 — Real Estate Dashboard")
 
-@st.cache_data
 def load_data():
-    if DATA_PROCESSED.exists():
-        return pd.read_csv(DATA_PROCESSED)
-    st.warning("Cleaned file not found. Please run the cleaning step first.")
-    return pd.DataFrame()
+    if not (DATA_PARQUET.exists() or DATA_PROCESSED.exists()):
+        st.warning("Cleaned file not found. Please run the cleaning step first.")
+        return pd.DataFrame()
+    # compact dtypes (category city, float32): ~3x smaller than object strings + float64
+    return read_listings(columns=COLUMNS, path=DATA_PARQUET, csv_path=DATA_PROCESSED)
+
+@st.cache_resource
+def load_index(version):
+    # cache_resource: shared, not copied on every rerun (cache_data would unpickle it)
+    df = load_data()
+    if df.empty:
+        return None
+    ix = build_index(df)
+    if load_summary(version) is None:
+        try:  # the next cold start paints from it
+            write_summary(summarize(ix, version))
+        except OSError:
+            pass
+    return ix
 
 @st.cache_resource
-def load_model():
-    if MODEL_PATH.exists():
-        return joblib.load(MODEL_PATH)
-    return None
+def load_first_paint(version):
+    # a few KB of JSON: sidebar, form defaults and default KPIs before the data is read
+    return load_summary(version)
 
-df = load_data()
-model = load_model()
+@st.cache_resource
+def load_chart_axes(version):
+    # computed on the whole dataset: same bins / grid whatever the filters
+    ix = load_index(version)
+    return {
+        "price_edges": bin_edges(ix.price),
+        "grid_ranges": [tuple(np.nanpercentile(v, [0.5, 99.5])) for v in (ix.area, ix.price)],
+    }
 
-if not df.empty:
+@st.cache_resource
+def load_comparables_index(version):
+    # scipy + per-city KD-trees (data/processed/.comparables/), imported at the first prediction
+    from comparables import load_comparables
+    return load_comparables()
+
+@st.cache_resource
+def model_warmup():
+    # started once per process, before the data: the array export (mmap, no sklearn) is
+    # ready by the time someone clicks Predict
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="model").submit(load_array_model)
+
+@st.cache_resource
+def load_pickled_model():
+    # no array export: joblib + sklearn are only imported by the first prediction
+    import joblib
+    return joblib.load(MODEL_PATH)
+
+def get_model():
+    model = model_warmup().result()
+    if model is None and MODEL_PATH.exists():
+        model = load_pickled_model()
+    return model
+
+def show_kpis(kpis):
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        st.metric("Listings", kpis["n"])
+    with c2:
+        st.metric("Avg Price (₪)", int(kpis["avg_price"]))
+    with c3:
+        st.metric("Avg Price per sqm (₪)", int(kpis["avg_ppsqm"]))
+    with c4:
+        st.metric("Median Area (sqm)", int(kpis["median_area"]))
+
+model_warmup()
+version = dataset_version()
+summary = load_first_paint(version)
+if summary is None:
+    # first start on this data: full load before anything is drawn (writes the summary)
+    ix = load_index(version)
+    summary = summarize(ix, version) if ix is not None else None
+
+if summary is not None:
     # Filters
     with st.sidebar:
         st.header("Filters")
-        cities = sorted(df["city"].dropna().unique().tolist())
-        city_sel = st.multiselect("City", options=cities, default=cities[:3])
+        cities = summary["cities"]
+        default_cities, default_rooms, default_area = default_filters(summary)
+        city_sel = st.multiselect("City", options=cities, default=default_cities)
 
-        min_rooms, max_rooms = float(df["rooms"].min()), float(df["rooms"].max())
+        min_rooms, max_rooms = default_rooms
         rooms_range = st.slider(
             "Rooms",
             min_value=min_rooms,
@@ -43,7 +116,7 @@ if not df.empty:
             step=0.5
         )
 
-        min_area, max_area = float(df["area_sqm"].min()), float(df["area_sqm"].max())
+        min_area, max_area = default_area
         area_range = st.slider(
             "Area (sqm)",
             min_value=min_area,
@@ -51,33 +124,42 @@ if not df.empty:
             value=(min_area, max_area)
         )
 
-    f = df[df["city"].isin(city_sel)]
-    f = f[(f["rooms"] >= rooms_range[0]) & (f["rooms"] <= rooms_range[1])]
-    f = f[(f["area_sqm"] >= area_range[0]) & (f["area_sqm"] <= area_range[1])]
-
-    # KPIs
-    c1, c2, c3, c4 = st.columns(4)
-    with c1:
-        st.metric("Listings", len(f))
-    with c2:
-        st.metric("Avg Price (₪)", int(f["price_shekels"].mean()) if len(f) else 0)
-    with c3:
-        st.metric("Avg Price per sqm (₪)", int(f["price_per_sqm"].mean()) if len(f) else 0)
-    with c4:
-        st.metric("Median Area (sqm)", int(f["area_sqm"].median()) if len(f) else 0)
-
+    # KPIs: straight from the summary with the default filters, while the data loads
+    painted = (city_sel, rooms_range, area_range) == default_filters(summary)
+    if painted:
+        show_kpis(summary["kpis"])
+    with st.spinner("Loading listings..."):
+        ix = load_index(version)
+    pos, kpis = query(ix, city_sel, rooms_range, area_range)
+    f = ix.df.take(pos)
+    if not painted:
+        show_kpis(kpis)
+
+    axes = load_chart_axes(version)
     st.subheader("Price Histogram")
-    st.bar_chart(f["price_shekels"])
+    st.bar_chart(histogram(ix.price[pos], axes["price_edges"]), y="listings")
 
     st.subheader("Area vs Price (scatter)")
-    st.scatter_chart(f, x="area_sqm", y="price_shekels", size="rooms", color="city")
+    if len(f) <= SCATTER_MAX_POINTS:
+        st.scatter_chart(f, x="area_sqm", y="price_shekels", size="rooms", color="city")
+    else:
+        lod = st.radio("Level of detail", ["Sample", "Grid"], horizontal=True,
+                       help=f"More than {SCATTER_MAX_POINTS:,} listings: sample per city or aggregate on a grid")
+        if lod == "Sample":
+            pts = stratified_sample(f, "city")
+            st.scatter_chart(pts, x="area_sqm", y="price_shekels", size="rooms", color="city")
+            st.caption(f"{len(pts):,} of {len(f):,} listings (stratified by city).")
+        else:
+            pts = grid_aggregate(f, "area_sqm", "price_shekels", "city", axes["grid_ranges"])
+            st.scatter_chart(pts, x="area_sqm", y="price_shekels", size="listings", color="city")
+            st.caption(f"{len(f):,} listings in {len(pts):,} grid cells (size = number of listings).")
 
     st.subheader("Average Price by City (bar chart)")
-    st.bar_chart(f.groupby("city")["price_shekels"].mean())
+    st.bar_chart(kpis["avg_price_by_city"])
 
     st.divider()
     st.subheader("🔮 Price Prediction (saved model)")
-    if model is None:
+    if not ((ARRAYS_DIR / "meta.json").exists() or MODEL_PATH.exists()):
         st.info("No saved model. Run `python src/ml_train.py` to train it.")
     else:
         colA, colB, colC, colD = st.columns(4)
@@ -86,14 +168,14 @@ if not df.empty:
                 "Area (sqm)",
                 min_value=10.0,
                 max_value=400.0,
-                value=float(df["area_sqm"].median())
+                value=summary["medians"]["area_sqm"]
             )
         with colB:
             rooms_in = st.number_input(
                 "Rooms",
                 min_value=1.0,
                 max_value=8.0,
-                value=float(df["rooms"].median()),
+                value=summary["medians"]["rooms"],
                 step=0.5
             )
         with colC:
@@ -101,10 +183,10 @@ if not df.empty:
                 "Floor",
                 min_value=0,
                 max_value=40,
-                value=int(df["floor"].median())
+                value=int(summary["medians"]["floor"])
             )
         with colD:
-            city_in = st.selectbox("City", options=sorted(df["city"].dropna().unique().tolist()))
+            city_in = st.selectbox("City", options=cities)
 
         if st.button("Predict"):
             X = pd.DataFrame([{
@@ -113,9 +195,19 @@ if not df.empty:
                 "floor": floor_in,
                 "city": city_in
             }])
+            with st.spinner("Loading model..."):
+                model = get_model()
             y_pred = model.predict(X)[0]
             st.success(f"Estimated price: ₪ {int(y_pred):,}")
 
+            # nearest listings of the same city, at the predicted price per sqm
+            from comparables import find_comparables
+            comps = find_comparables(load_comparables_index(version), city_in, area_in,
+                                     rooms_in, floor_in, y_pred / area_in)
+            if len(comps):
+                st.caption(f"{len(comps)} comparable listings in {city_in} (area, rooms, floor, price/m²):")
+                st.dataframe(comps.drop(columns=["city"]), hide_index=True, use_container_width=True)
+
 else:
     st.stop()
 
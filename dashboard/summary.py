@@ -0,0 +1,82 @@
+"""Precomputed summary for the dashboard's first paint (pandas/numpy only, no Streamlit).
+
+A cold start used to read the whole dataset and build the filter index before
+anything was drawn. This small JSON holds what the first screen needs with the
+default filters: sidebar options and bounds, prediction form defaults, and the
+KPIs / average price by city of the default selection. The charts still wait for
+the full load.
+
+Written next to the cleaned data by the pipeline (`summary` stage), by
+`python dashboard/summary.py` (Docker image build), or by the dashboard itself after
+a full load; ignored as soon as the data is newer than the summary.
+"""
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from filter_index import FilterIndex, build_index, query
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_PROCESSED = BASE_DIR / "data" / "processed" / "listings_clean.csv"
+DATA_PARQUET = BASE_DIR / "data" / "processed" / "listings_parquet"
+SUMMARY_PATH = BASE_DIR / "data" / "processed" / "dashboard_summary.json"
+# only what the dashboard displays (no title/tags/image_url...)
+COLUMNS = ["city", "rooms", "area_sqm", "floor", "price_shekels", "price_per_sqm"]
+DEFAULT_CITIES = 3  # cities selected in the sidebar on first load
+
+def dataset_version(parquet=DATA_PARQUET, csv=DATA_PROCESSED):
+    """mtime of the cleaned data: the cached index is rebuilt when it changes."""
+    for path in (parquet, csv):
+        if path.exists():
+            return max(p.stat().st_mtime_ns for p in [path, *path.rglob("*")])
+    return 0
+
+def default_filters(summary):
+    """(cities, rooms range, area range) selected when the page opens."""
+    return summary["cities"][:DEFAULT_CITIES], summary["bounds"]["rooms"], summary["bounds"]["area"]
+
+def summarize(ix: FilterIndex, version) -> dict:
+    summary = {"version": version, "cities": ix.cities, "bounds": ix.bounds, "medians": ix.medians}
+    _, summary["kpis"] = query(ix, *default_filters(summary))
+    return summary
+
+def write_summary(summary, path=SUMMARY_PATH):
+    kpis = {**summary["kpis"], "avg_price_by_city": summary["kpis"]["avg_price_by_city"].to_dict()}
+    tmp = Path(path).with_suffix(".tmp")
+    tmp.write_text(json.dumps({**summary, "kpis": kpis}, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+def load_summary(version, path=SUMMARY_PATH):
+    """Summary of the current data (same shapes as summarize), None if missing or stale."""
+    try:
+        summary = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if summary.get("version") != version:
+        return None
+    summary["bounds"] = {k: tuple(v) for k, v in summary["bounds"].items()}
+    summary["kpis"]["avg_price_by_city"] = (
+        pd.Series(summary["kpis"]["avg_price_by_city"], name="price_shekels", dtype="float64")
+        .rename_axis("city"))
+    return summary
+
+def refresh_summary(path=SUMMARY_PATH) -> FilterIndex:
+    """Reads the dashboard columns of the cleaned data and writes their summary."""
+    sys.path.insert(1, str(BASE_DIR / "src"))
+    from listings_store import read_listings
+
+    version = dataset_version()
+    if not version:
+        raise SystemExit("Cleaned data not found. Please run the cleaning step first.")
+    ix = build_index(read_listings(columns=COLUMNS, path=DATA_PARQUET, csv_path=DATA_PROCESSED))
+    write_summary(summarize(ix, version), path)
+    return ix
+
+def main():
+    ix = refresh_summary()
+    print(f"✅ Dashboard summary ({len(ix.df):,} listings, {len(ix.cities)} cities) → {SUMMARY_PATH}")
+
+if __name__ == "__main__":
+    main()
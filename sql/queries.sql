@@ -1,22 +1,25 @@
+-- Les rapports lisent yad2_city_stats (une ligne par ville/quartier, tenue à jour
+-- par src/load_to_postgres.py): coût proportionnel au nombre de quartiers, pas d'annonces.
+
 -- Prix moyen par ville
-SELECT city, AVG(price_shekels) AS avg_price
-FROM yad2_listings
+SELECT city, SUM(sum_price) / SUM(n) AS avg_price, SUM(n) AS n
+FROM yad2_city_stats
 GROUP BY city
+HAVING SUM(n) > 0
 ORDER BY avg_price DESC;
 
--- Prix au m² par quartier
-SELECT city, neighborhood, AVG(price_per_sqm) AS avg_ppsqm, COUNT(*) AS n
-FROM yad2_listings
-WHERE neighborhood IS NOT NULL
-GROUP BY city, neighborhood
-HAVING COUNT(*) >= 3
+-- Prix au m² par quartier (moyenne et écart-type)
+SELECT city, neighborhood,
+       sum_ppsqm / n_ppsqm AS avg_ppsqm,
+       SQRT((sumsq_ppsqm - sum_ppsqm ^ 2 / n_ppsqm) / NULLIF(n_ppsqm - 1, 0)) AS std_ppsqm,
+       n
+FROM yad2_city_stats
+WHERE neighborhood <> '' AND n >= 3 AND n_ppsqm > 0
 ORDER BY avg_ppsqm DESC;
 
 -- Top 5 quartiers les plus chers (par prix au m²)
-SELECT city, neighborhood, AVG(price_per_sqm) AS avg_ppsqm, COUNT(*) AS n
-FROM yad2_listings
-WHERE neighborhood IS NOT NULL
-GROUP BY city, neighborhood
-HAVING COUNT(*) >= 3
+SELECT city, neighborhood, sum_ppsqm / n_ppsqm AS avg_ppsqm, n
+FROM yad2_city_stats
+WHERE neighborhood <> '' AND n >= 3 AND n_ppsqm > 0
 ORDER BY avg_ppsqm DESC
 LIMIT 5;
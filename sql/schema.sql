@@ -11,3 +11,47 @@ CREATE TABLE IF NOT EXISTS yad2_listings (
     price_per_sqm FLOAT,
     url TEXT
 );
+
+-- Clé naturelle: une annonce = une url (upsert du loader: ON CONFLICT (url) DO UPDATE).
+-- Une table remplie par l'ancien loader (append) peut contenir des doublons: on garde
+-- la ligne la plus récente avant de créer l'index unique (comme ensure_schema)
+DELETE FROM yad2_listings a USING yad2_listings b
+WHERE a.url = b.url AND a.id < b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS yad2_listings_url_key ON yad2_listings (url);
+-- Annonces sans url (anciens scrapes): le loader cherche une ligne identique avant d'insérer
+CREATE INDEX IF NOT EXISTS yad2_listings_no_url_idx ON yad2_listings (title, city) WHERE url IS NULL;
+-- Requêtes par ville/quartier sur la table brute: index couvrant (index-only scan)
+CREATE INDEX IF NOT EXISTS yad2_listings_city_neigh_idx ON yad2_listings (city, neighborhood)
+    INCLUDE (price_shekels, price_per_sqm);
+
+-- Agrégats par (ville, quartier), tenus à jour par le loader dans la transaction de
+-- chaque chunk (+ lignes ajoutées, - anciennes versions des lignes mises à jour).
+-- n / somme / somme des carrés suffisent pour moyenne et écart-type (sql/queries.sql).
+-- neighborhood = '' pour "pas de quartier" (clé primaire, pas de NULL).
+-- Réparation: python src/load_to_postgres.py --rebuild-stats
+CREATE TABLE IF NOT EXISTS yad2_city_stats (
+    city TEXT NOT NULL,
+    neighborhood TEXT NOT NULL DEFAULT '',
+    n BIGINT NOT NULL DEFAULT 0,
+    sum_price NUMERIC NOT NULL DEFAULT 0,
+    sumsq_price NUMERIC NOT NULL DEFAULT 0,
+    n_ppsqm BIGINT NOT NULL DEFAULT 0,
+    sum_ppsqm NUMERIC NOT NULL DEFAULT 0,
+    sumsq_ppsqm NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (city, neighborhood)
+);
+
+-- Base déjà remplie (table créée ici et vide): agrégats calculés depuis les annonces,
+-- comme rebuild_stats du loader
+INSERT INTO yad2_city_stats (city, neighborhood, n, sum_price, sumsq_price,
+                             n_ppsqm, sum_ppsqm, sumsq_ppsqm)
+SELECT COALESCE(city, 'Unknown'), COALESCE(neighborhood, ''),
+       COUNT(*),
+       COALESCE(SUM(price_shekels::NUMERIC), 0),
+       COALESCE(SUM(price_shekels::NUMERIC ^ 2), 0),
+       COUNT(price_per_sqm),
+       COALESCE(SUM(price_per_sqm::NUMERIC), 0),
+       COALESCE(SUM(price_per_sqm::NUMERIC ^ 2), 0)
+FROM yad2_listings
+WHERE NOT EXISTS (SELECT 1 FROM yad2_city_stats)
+GROUP BY 1, 2;
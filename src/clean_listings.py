@@ -1,12 +1,25 @@
 # src/clean_listings.py
+import argparse
+import hashlib
+import os
 import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from config import DATA_RAW, DATA_PROCESSED
+import dedupe
+import gazetteer
+import perf
+from config import DATA_RAW, DATA_PROCESSED, DATA_PARQUET
+from listings_store import append_parquet, publish, staging_dir, write_parquet
 
 RAW = Path(DATA_RAW)
 OUT = Path(DATA_PROCESSED)
+OUT_PARQUET = Path(DATA_PARQUET)
+# cache du mode incrémental: lignes déjà parsées, indexées par hash de la ligne brute
+CACHE = OUT.parent / ".clean_cache.pkl"
 
 # ===================== Regex robustes =====================
 RE_NUM_ANY   = re.compile(r'(\d[\d,.\s]{3,})')                     # nombres "grands"
@@ -18,6 +31,9 @@ RE_FLOOR     = re.compile(r'קומה\s*(\d+)', re.UNICODE)
 # seuil large pour écarter le "bruit"
 PRICE_MIN = 50_000
 
+# valeurs par défaut si une colonne numérique est entièrement vide
+IMPUTE_DEFAULTS = {"rooms": 3.0, "area_sqm": 70.0, "floor": 2.0}
+
 # ===================== Helpers =====================
 def to_float(s):
     """Convertit une chaîne (avec séparateurs) en float; NaN si impossible."""
@@ -49,66 +65,53 @@ def extract_first_num(s):
         return to_float(m2.group(1))
     return np.nan
 
-def parse_city_from_location(s):
-    """Essaye d’extraire la ville depuis 'location' ('... , חולון' -> חולון)."""
-    if not isinstance(s, str) or not s.strip():
-        return "Unknown", None
-    parts = [x.strip() for x in re.split(r'\s*[-/]\s*', s) if x.strip()]
-    city  = parts[0] if parts else s.strip()
-    neigh = parts[1] if len(parts) > 1 else None
-    return city or "Unknown", neigh
-
-def keep_city_only(s):
-    """Garde seulement la ville (souvent le dernier segment après virgule)."""
-    if not isinstance(s, str):
-        return "Unknown"
-    parts = [x.strip() for x in s.split(",") if x.strip()]
-    return (parts[-1] if parts else s.strip()) or "Unknown"
-
 def impute_series_num(s: pd.Series, default_val: float) -> pd.Series:
     s = pd.to_numeric(s, errors='coerce')
     if s.isna().all():
         return s.fillna(default_val)
     return s.fillna(s.median())
 
-# ===================== Chargement =====================
-if not RAW.exists():
-    raise SystemExit(f"❌ Introuvable: {RAW} (lance d’abord le scraping).")
-
-df = pd.read_csv(RAW)
-
-# Colonnes minimales attendues par le projet / dashboard
-for c in ["title", "price_shekels", "location", "details", "tags", "image_url", "url"]:
-    if c not in df.columns:
-        df[c] = np.nan
-
-# ===================== Prix =====================
-# Si price_shekels inexploitable, on le reconstruit depuis price/details/title/tags
-price = pd.to_numeric(df.get("price_shekels"), errors="coerce")
-
-if price.isna().all():
-    sources = [c for c in ["price", "details", "title", "tags", "price_shekels"] if c in df.columns]
-    vals = []
-    for _, row in df.iterrows():
-        val = np.nan
-        for col in sources:
-            v = row.get(col, "")
-            val = extract_first_num(v)
-            if not np.isnan(val):
-                break
-        vals.append(val)
-    price = pd.Series(vals, index=df.index)
-
-df["price_shekels"] = price
-
-# ===================== Rooms / Area / Floor =====================
-# Créer les colonnes au besoin
-for c in ["rooms", "area_sqm", "floor", "city", "neighborhood"]:
-    if c not in df.columns:
-        df[c] = np.nan
+# ===================== Version vectorisée (colonne entière) =====================
+def to_float_series(s: pd.Series) -> pd.Series:
+    """Équivalent colonne de to_float: mêmes règles, via Series.str (NaN conservés)."""
+    s = s.str.replace('\u200f', '', regex=False).str.replace('\u202c', '', regex=False).str.strip()
+    s = s.str.replace(' ', '', regex=False)
+    both = s.str.contains(',', regex=False, na=False) & s.str.contains('.', regex=False, na=False)
+    s = s.mask(both, s.str.replace('.', '', regex=False))
+    s = s.str.replace(',', '', regex=False).str.replace(r'[^\d.]', '', regex=True)
+    # float() n'accepte qu'un seul point: les autres cas donnent NaN comme dans to_float
+    ok = s.str.fullmatch(r'\d+\.?\d*|\.\d+', na=False)
+    out = pd.Series(np.nan, index=s.index, dtype=float)
+    out[ok] = s[ok].map(float)
+    return out
+
+def extract_first_num_series(s: pd.Series) -> pd.Series:
+    """Équivalent colonne de extract_first_num (motif prix prioritaire, sinon grand nombre).
+    Les regex ne tournent qu'une fois par texte distinct, puis on redistribue par code."""
+    codes, uniq = pd.factorize(s.astype(str))
+    u = pd.Series(uniq, dtype=object)
+    cand = u.str.extract(RE_PRICE_ANY, expand=False)
+    miss = cand.isna()
+    if miss.any():
+        cand[miss] = u[miss].str.extract(RE_NUM_ANY, expand=False)
+    vals = to_float_series(cand).to_numpy()
+    return pd.Series(vals[codes], index=s.index)
 
+def extract_price(df: pd.DataFrame, sources) -> pd.Series:
+    """Premier nombre exploitable parmi `sources` (dans l'ordre), ligne par ligne mais
+    calculé colonne par colonne: chaque source ne traite que les lignes encore vides."""
+    price = pd.Series(np.nan, index=df.index, dtype=float)
+    todo = price.isna()
+    for col in sources:
+        if not todo.any():
+            break
+        price[todo] = extract_first_num_series(df.loc[todo, col])
+        todo = price.isna()
+    return price
+
+# ===================== Pipeline =====================
 # extractions via str.extract -> séries temporaires (évite warnings dtype)
-def extract_into(col_target, regex, candidates=("tags","details","title")):
+def extract_into(df, col_target, regex, candidates=("tags","details","title")):
     mask = df[col_target].isna()
     for cand in (col_target,) + tuple(c for c in candidates if c in df.columns):
         if mask.sum() == 0:
@@ -120,47 +123,340 @@ def extract_into(col_target, regex, candidates=("tags","details","title")):
             df.loc[mask, col_target] = tmp_num
             mask = df[col_target].isna()
 
-extract_into("rooms", RE_ROOMS)
-extract_into("area_sqm", RE_AREA)
-extract_into("floor", RE_FLOOR)
-
-# ===================== City depuis location =====================
-if df["city"].isna().any() or (df["city"].astype(str).str.strip() == "").any():
-    cities, neighs = [], []
-    for loc in df["location"].fillna(""):
-        c, n = parse_city_from_location(loc)
-        cities.append(c)
-        neighs.append(n)
-    df["city"] = df["city"].fillna(pd.Series(cities, index=df.index))
-    df["neighborhood"] = df["neighborhood"].fillna(pd.Series(neighs, index=df.index))
-
-# Nettoie la ville (gardez seulement la ville finale; enlève types de biens courants)
-df["city"] = df["city"].apply(keep_city_only)
-PROPERTY_WORDS = {"דירה", "דירת גן", "בית פרטי", "פנטהאוז", "גג", "קוטג"}
-df["city"] = df["city"].apply(lambda s: "Unknown" if s in PROPERTY_WORDS else s)
-
-# ===================== Conversions / filtrage =====================
-for c in ["price_shekels", "rooms", "area_sqm", "floor"]:
-    df[c] = pd.to_numeric(df[c], errors="coerce")
-
-# Garder lignes avec prix plausible
-df = df[pd.to_numeric(df["price_shekels"], errors="coerce").notna()].copy()
-df = df[df["price_shekels"] >= PRICE_MIN]
-
-# Imputations simples
-df["rooms"]    = impute_series_num(df["rooms"], 3.0)
-df["area_sqm"] = impute_series_num(df["area_sqm"], 70.0)
-df["floor"]    = impute_series_num(df["floor"], 2.0)
-df["city"]     = df["city"].astype(str).replace({"nan": "Unknown", "": "Unknown"}).fillna("Unknown")
-
-# ===================== price_per_sqm (💥 clé du dashboard) =====================
-df["price_per_sqm"] = np.where(
-    (df["area_sqm"] > 0) & df["price_shekels"].notna(),
-    df["price_shekels"] / df["area_sqm"],
-    np.nan
-)
-
-# ===================== Sauvegarde =====================
-OUT.parent.mkdir(parents=True, exist_ok=True)
-df.to_csv(OUT, index=False)
-print(f"✅ Clean done. Saved {len(df)} rows to {OUT}")
+def parse_rows(df: pd.DataFrame, drop_implausible: bool = True) -> pd.DataFrame:
+    """Partie ligne-à-ligne du nettoyage (regex, ville, filtre prix): indépendante
+    des autres lignes, donc applicable chunk par chunk dans un pool de processus.
+    drop_implausible=False garde toutes les lignes (utile pour le cache incrémental)."""
+    # Colonnes minimales attendues par le projet / dashboard
+    for c in ["title", "price_shekels", "location", "details", "tags", "image_url", "url"]:
+        if c not in df.columns:
+            df[c] = np.nan
+
+    # ===================== Prix =====================
+    # Si price_shekels inexploitable, on le reconstruit depuis price/details/title/tags
+    price = pd.to_numeric(df.get("price_shekels"), errors="coerce")
+
+    if price.isna().all():
+        sources = [c for c in ["price", "details", "title", "tags", "price_shekels"] if c in df.columns]
+        price = extract_price(df, sources)
+
+    df["price_shekels"] = price
+
+    # ===================== Rooms / Area / Floor =====================
+    # Créer les colonnes au besoin
+    for c in ["rooms", "area_sqm", "floor", "city", "neighborhood"]:
+        if c not in df.columns:
+            df[c] = np.nan
+
+    extract_into(df, "rooms", RE_ROOMS)
+    extract_into(df, "area_sqm", RE_AREA)
+    extract_into(df, "floor", RE_FLOOR)
+
+    # ===================== Ville / quartier (gazetteer) =====================
+    # une résolution par valeur distincte de location (mémo), redistribuée par code
+    with perf.step("locations", rows=len(df)):
+        df["city"], df["neighborhood"] = gazetteer.normalize_locations(
+            df["location"], df["city"], df["neighborhood"])
+
+    # ===================== Conversions / filtrage =====================
+    for c in ["price_shekels", "rooms", "area_sqm", "floor"]:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    return keep_plausible_price(df) if drop_implausible else df
+
+def plausible_price(df: pd.DataFrame) -> np.ndarray:
+    """Masque des lignes avec prix plausible."""
+    return (pd.to_numeric(df["price_shekels"], errors="coerce") >= PRICE_MIN).to_numpy()
+
+def keep_plausible_price(df: pd.DataFrame) -> pd.DataFrame:
+    # Garder lignes avec prix plausible
+    return df[plausible_price(df)].copy()
+
+# ===================== Doublons (url, image, MinHash/LSH: dedupe.py) =====================
+def report_duplicates(stats: dict):
+    if not stats:
+        return
+    perf.note(duplicates=stats)
+    print(f"🔁 Dedupe: {stats['rows_in'] - stats['rows_out']} duplicate rows collapsed "
+          f"(links: url {stats['url']}, image {stats['image_url']}, near-duplicate {stats['lsh_links']}).")
+
+def collapse_duplicates(df: pd.DataFrame, sig=None) -> pd.DataFrame:
+    """Une ligne par annonce (+ cluster_id / cluster_size). Après le filtre prix (la
+    garde de prix de dedupe en a besoin) et avant les imputations (médianes sans doublons)."""
+    with perf.step("dedupe", rows=len(df)):
+        df, stats = dedupe.dedupe(df, sig=sig)
+    report_duplicates(stats)
+    return df
+
+def finalize(df: pd.DataFrame, medians=None) -> pd.DataFrame:
+    """Imputations + price_per_sqm. `medians` (col -> valeur) vient du mode streaming;
+    sinon on les calcule sur df lui-même."""
+    df = df.copy()
+    # Imputations simples
+    for c, default in IMPUTE_DEFAULTS.items():
+        if medians is None:
+            df[c] = impute_series_num(df[c], default)
+        else:
+            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(medians[c])
+    df["city"]     = df["city"].astype(str).replace({"nan": "Unknown", "": "Unknown"}).fillna("Unknown")
+
+    # ===================== price_per_sqm (💥 clé du dashboard) =====================
+    df["price_per_sqm"] = np.where(
+        (df["area_sqm"] > 0) & df["price_shekels"].notna(),
+        df["price_shekels"] / df["area_sqm"],
+        np.nan
+    )
+    return df
+
+def clean(df: pd.DataFrame) -> pd.DataFrame:
+    """Nettoie un DataFrame brut (sortie du scraping) et renvoie le DataFrame propre."""
+    return finalize(collapse_duplicates(parse_rows(df)))
+
+# ===================== Mode streaming (chunks + pool de processus) =====================
+def value_counts_by_col(df: pd.DataFrame) -> dict:
+    """Histogramme exact (valeur -> effectif) des colonnes à imputer. Fusionnable entre
+    chunks et borné par le nombre de valeurs distinctes, pas par le nombre de lignes."""
+    return {c: pd.to_numeric(df[c], errors="coerce").value_counts() for c in IMPUTE_DEFAULTS}
+
+def merge_counts(acc: dict, counts: dict) -> dict:
+    for c, vc in counts.items():
+        acc[c] = vc if c not in acc else acc[c].add(vc, fill_value=0)
+    return acc
+
+def median_from_counts(vc, default_val: float) -> float:
+    """Médiane exacte depuis un histogramme (même résultat que Series.median())."""
+    if vc is None or vc.sum() == 0:
+        return default_val
+    vc = vc.sort_index()
+    cum = vc.to_numpy().cumsum()
+    n = int(cum[-1])
+    lo = vc.index[np.searchsorted(cum, (n - 1) // 2, side="right")]
+    hi = vc.index[np.searchsorted(cum, n // 2, side="right")]
+    return float(np.mean([lo, hi]))
+
+def _bounded_map(pool, fn, items, max_pending):
+    """pool.map en gardant l'ordre, mais avec au plus `max_pending` chunks en vol
+    (Executor.map consomme tout l'itérable d'un coup)."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def parse_chunk(df: pd.DataFrame):
+    """parse_rows + signatures de doublons d'un chunk (côté worker), avec les lieux
+    résolus pour ce chunk: le mémo sur disque est écrit par le parent."""
+    part = parse_rows(df)
+    return part, dedupe.signatures(part), gazetteer.take_new()
+
+def clean_streaming(raw=RAW, out=OUT, chunksize=100_000, workers=None,
+                    out_parquet=OUT_PARQUET, write_csv=True, memo_path=gazetteer.MEMO_PATH) -> int:
+    """Nettoyage en deux passes.
+    Passe 1: lecture du CSV brut par chunks, parse_chunk réparti sur `workers` processus,
+    chunks parsés mis de côté sur disque, histogramme des colonnes à imputer par chunk.
+    Entre les deux: clusters de doublons sur l'ensemble des signatures, retrait des
+    lignes écartées des histogrammes pour les médianes.
+    Passe 2: lignes gardées, imputation avec les médianes globales, écriture
+    incrémentale dans `out` (CSV) et `out_parquet` (dataset partitionné).
+    Limite: les signatures de doublons restent en mémoire jusqu'au clustering, qui les
+    compare toutes (~300 octets par ligne, ~300 Mo par million de lignes); le reste est
+    borné par `chunksize` et le nombre de valeurs distinctes."""
+    workers = workers or os.cpu_count() or 1
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    pq_tmp = staging_dir(out_parquet)
+    counts, parts, sigs, sizes, n_rows = {}, [], [], [], 0
+    # chargé avant le fork: les workers héritent des lieux déjà résolus et renvoient
+    # les nouveaux avec chaque chunk
+    gazetteer.load_memo(memo_path)
+
+    with tempfile.TemporaryDirectory(dir=out.parent) as tmp:
+        reader = pd.read_csv(raw, chunksize=chunksize)
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            parsed = _bounded_map(pool, parse_chunk, reader, 2 * workers)
+        else:
+            pool, parsed = None, map(parse_chunk, reader)
+        try:
+            with perf.step("read_parse_chunks") as st:
+                st["rows"] = 0
+                for i, (part, sig, new_places) in enumerate(parsed):
+                    gazetteer.add_memo(new_places)
+                    path = Path(tmp) / f"part_{i:06d}.pkl"
+                    part.to_pickle(path)
+                    parts.append(path)
+                    sigs.append(sig)
+                    sizes.append(len(part))
+                    merge_counts(counts, value_counts_by_col(part))
+                    st["rows"] += len(part)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        gazetteer.save_memo(memo_path)
+
+        n_parsed = sum(sizes)
+        kept = np.zeros(n_parsed, dtype=bool)
+        cluster_id, cluster_size = np.zeros(n_parsed, dtype=np.int64), np.zeros(n_parsed, dtype=np.int64)
+        if n_parsed:
+            with perf.step("dedupe", rows=n_parsed):
+                sig = dedupe.Signatures.concat(sigs)
+                labels, stats = dedupe.cluster(sig)
+                keep, ident, size = dedupe.canonical(sig, labels)
+                kept[keep], cluster_id[keep], cluster_size[keep] = True, ident, size
+            report_duplicates({**stats, "rows_in": n_parsed, "rows_out": len(keep)})
+        sig = sigs = None  # signatures libérées avant la passe 2
+
+        offsets = np.cumsum([0] + sizes)
+        for path, lo, hi in zip(parts, offsets[:-1], offsets[1:]):
+            if not kept[lo:hi].all():  # doublons écartés: relus du disque et retirés
+                dropped = pd.read_pickle(path)[~kept[lo:hi]]
+                merge_counts(counts, {c: -vc for c, vc in value_counts_by_col(dropped).items()})
+        medians = {c: median_from_counts(counts.get(c), d) for c, d in IMPUTE_DEFAULTS.items()}
+        with perf.step("impute_write_chunks") as st:
+            for i, path in enumerate(parts):
+                rows = slice(offsets[i], offsets[i + 1])
+                m = kept[rows]
+                part = pd.read_pickle(path)[m].assign(cluster_id=cluster_id[rows][m],
+                                                      cluster_size=cluster_size[rows][m])
+                part = finalize(part, medians)
+                if write_csv:
+                    part.to_csv(out, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+                append_parquet(part, pq_tmp, i)
+                path.unlink()
+                n_rows += len(part)
+            st["rows"] = n_rows
+    publish(pq_tmp, out_parquet)
+    return n_rows
+
+# ===================== Mode incrémental (cache par url + hash) =====================
+def parser_version() -> str:
+    """Empreinte du code de nettoyage, des signatures de doublons et du gazetteer: toute
+    modif des règles invalide le cache."""
+    h = hashlib.sha1(Path(__file__).read_bytes() + Path(dedupe.__file__).read_bytes())
+    h.update(gazetteer.version().encode())
+    return h.hexdigest()
+
+def raw_row_keys(df: pd.DataFrame) -> pd.Index:
+    """Clé par ligne brute: hash de `url` + de tous les champs bruts (vectorisé)."""
+    cols = ["url"] + sorted(c for c in df.columns if c != "url")
+    raw = df.reindex(columns=cols).astype(str)
+    return pd.Index(pd.util.hash_pandas_object(raw, index=False).to_numpy(), name="_raw_key")
+
+def load_cache(cache_path=CACHE):
+    """(lignes parsées, leurs signatures de doublons) du dernier passage, ou (None, None)."""
+    cache_path = Path(cache_path)
+    if not cache_path.exists():
+        return None, None
+    try:
+        payload = pd.read_pickle(cache_path)
+    except Exception:
+        return None, None
+    if payload.get("version") != parser_version():
+        return None, None
+    return payload["rows"], payload["sig"]
+
+def clean_incremental(df: pd.DataFrame, cache_path=CACHE):
+    """Comme clean(), mais ne lance regex + parsing ville que sur les lignes nouvelles
+    ou modifiées depuis le dernier passage. Renvoie (df_propre, nb_lignes_parsées)."""
+    keys = raw_row_keys(df)
+    cached, cached_sig = load_cache(cache_path)
+    hit = keys.isin(cached.index) if cached is not None else np.zeros(len(df), dtype=bool)
+
+    todo = df.loc[~hit].copy()
+    parsed_new = parse_rows(todo, drop_implausible=False) if len(todo) else todo
+    parsed_new.index = keys[~hit]
+    sig_new = dedupe.signatures(parsed_new)
+
+    # on ne garde en cache que ce qui existe encore dans le brut (taille = dataset)
+    kept, kept_sig = [], []
+    if cached is not None:
+        still = cached.index.isin(keys)
+        kept, kept_sig = [cached[still]], [cached_sig.take(still)]
+    rows = pd.concat(kept + [parsed_new])
+    sig = dedupe.Signatures.concat(kept_sig + [sig_new])
+    first = ~rows.index.duplicated()
+    rows, sig = rows[first], sig.take(first)
+    Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+    pd.to_pickle({"version": parser_version(), "rows": rows, "sig": sig}, cache_path)
+
+    # ordre du fichier brut (une ligne brute répétée est un doublon d'url)
+    pos = rows.index.get_indexer(keys)
+    parsed, sig = rows.iloc[pos].reset_index(drop=True), sig.take(pos)
+    ok = plausible_price(parsed)
+    return finalize(collapse_duplicates(parsed[ok], sig.take(ok))), len(todo)
+
+def clean_frame(raw=RAW, incremental=False, cache_path=CACHE,
+                memo_path=gazetteer.MEMO_PATH) -> pd.DataFrame:
+    """Nettoie tout le CSV brut en mémoire (incremental: via le cache par url + hash)."""
+    with perf.step("read_raw") as st:
+        raw_df = pd.read_csv(raw)
+        st["rows"] = len(raw_df)
+    perf.note(rows_in=len(raw_df), bytes_in=perf.size_of(raw))
+    gazetteer.load_memo(memo_path)
+    with perf.step("parse") as st:
+        if incremental:
+            df, n_parsed = clean_incremental(raw_df, cache_path)
+            print(f"♻️ Incremental: {n_parsed} new/changed rows parsed.")
+            perf.note(rows_parsed=n_parsed)
+        else:
+            df = clean(raw_df)
+        st["rows"] = len(raw_df)
+    gazetteer.save_memo(memo_path)
+    return df
+
+def save(df: pd.DataFrame, out=OUT, out_parquet=OUT_PARQUET, write_csv=True):
+    """Écrit le dataset Parquet `out_parquet` (+ export CSV `out` si write_csv)."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with perf.step("write_parquet", rows=len(df)):
+        write_parquet(df, out_parquet)
+    if write_csv:
+        with perf.step("write_csv", rows=len(df)):
+            df.to_csv(out, index=False)
+    perf.note(rows_out=len(df),
+              bytes_out=perf.size_of(out_parquet) + (perf.size_of(out) if write_csv else 0))
+    print(f"✅ Clean done. Saved {len(df)} rows to {out_parquet}" + (f" and {out}" if write_csv else ""))
+
+def run(raw=RAW, out=OUT, incremental=False, chunksize=None, workers=None,
+        out_parquet=OUT_PARQUET, write_csv=True) -> int:
+    """Point d'entrée importable: nettoie `raw` vers le dataset Parquet `out_parquet`
+    (+ export CSV `out` si write_csv), renvoie le nb de lignes."""
+    raw, out = Path(raw), Path(out)
+    if not raw.exists():
+        raise SystemExit(f"❌ Introuvable: {raw} (lance d’abord le scraping).")
+
+    if chunksize:
+        n = clean_streaming(raw, out, chunksize=chunksize, workers=workers,
+                            out_parquet=out_parquet, write_csv=write_csv,
+                            memo_path=out.parent / gazetteer.MEMO_PATH.name)
+        perf.note(bytes_in=perf.size_of(raw), rows_out=n,
+                  bytes_out=perf.size_of(out_parquet) + (perf.size_of(out) if write_csv else 0))
+        print(f"✅ Clean done (streaming). Saved {n} rows to {out_parquet}")
+        return n
+
+    df = clean_frame(raw, incremental, out.parent / CACHE.name, out.parent / gazetteer.MEMO_PATH.name)
+    save(df, out, out_parquet, write_csv)
+    return len(df)
+
+def main():
+    ap = argparse.ArgumentParser(description="Nettoyage du CSV brut Yad2")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="ne re-parse que les lignes nouvelles/modifiées (cache par url + hash)")
+    mode.add_argument("--chunksize", type=int, default=None,
+                      help="active le mode streaming (lignes par chunk)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="processus pour le mode streaming (défaut: nb de coeurs)")
+    ap.add_argument("--no-csv", action="store_true",
+                    help="n'écrit que le dataset Parquet (pas d'export listings_clean.csv)")
+    perf.add_profile_arg(ap)
+    args = ap.parse_args()
+    mode = "streaming" if args.chunksize else "incremental" if args.incremental else "full"
+    with perf.stage("clean", profile=args.profile, mode=mode):
+        run(RAW, OUT, incremental=args.incremental, chunksize=args.chunksize, workers=args.workers,
+            write_csv=not args.no_csv)
+
+if __name__ == "__main__":
+    main()
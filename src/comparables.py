@@ -0,0 +1,217 @@
+# src/comparables.py
+"""Annonces comparables (k plus proches voisins) d'un bien, ville par ville.
+
+Un cKDTree par ville sur (area_sqm, rooms, floor, price_per_sqm), chaque variable
+divisée par son écart-type robuste (écart interquartile) sur tout le dataset puis
+multipliée par son poids (WEIGHTS). Les arbres sont construits une fois et sauvés avec la version des données
+(data/processed/.comparables/<clé>.joblib, clé = hash des fichiers nettoyés + de ce
+module): une requête est une descente d'arbre, pas un scan du DataFrame.
+
+- prix au m² de la requête inconnu (formulaire du dashboard): celui de la
+  prédiction si on le donne, sinon la médiane de la ville; idem pour les autres
+  variables manquantes
+- requête unique: nearest (positions, distances) ou find_comparables (DataFrame)
+- lots de requêtes (flux de scoring): un tree.query vectorisé par ville
+- une annonce de même url que la requête (elle-même) n'est pas renvoyée
+- ville absente de l'index: pas de comparables (position -1, distance inf)
+
+    python src/comparables.py --city "תל אביב יפו" --area 90 --rooms 4 --floor 3 -k 5
+    python src/comparables.py --input data/processed/listings_parquet --out reports/comparables.parquet
+"""
+import argparse
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy
+from scipy.spatial import cKDTree
+
+from config import DATA_PARQUET, DATA_PROCESSED
+from listings_store import data_hash, read_listings
+
+COMPARABLES_CACHE = DATA_PARQUET.parent / ".comparables"
+KEEP_ENTRIES = 2
+K = 5
+
+FEATURES = ["area_sqm", "rooms", "floor", "price_per_sqm"]
+WEIGHTS = {"area_sqm": 1.0, "rooms": 1.0, "floor": 0.5, "price_per_sqm": 1.0}
+# colonnes renvoyées avec chaque comparable
+DISPLAY = ["city", "neighborhood", "title", "rooms", "area_sqm", "floor",
+           "price_shekels", "price_per_sqm", "url"]
+
+@dataclass
+class ComparablesIndex:
+    key: str
+    frame: pd.DataFrame   # annonces indexées, triées par ville (RangeIndex)
+    trees: dict           # ville -> cKDTree des lignes [start, end) de la ville
+    offsets: dict         # ville -> (start, end) dans frame
+    scale: np.ndarray     # diviseur de chaque variable (écart-type robuste / poids)
+    medians: dict         # ville -> médianes des FEATURES, ndarray (requêtes incomplètes)
+    url_hash: np.ndarray  # uint64 par ligne de frame, 0 = pas d'url
+
+def _url_hash(urls: pd.Series) -> np.ndarray:
+    s = urls.astype("string").fillna("")
+    h = pd.util.hash_array(s.to_numpy(dtype=object))
+    return np.where(s.to_numpy(dtype=object) == "", np.uint64(0), h | np.uint64(1))
+
+def build_comparables(df: pd.DataFrame, key="") -> ComparablesIndex:
+    """Index des annonces de `df` dont les FEATURES sont toutes renseignées."""
+    df = df.reindex(columns=list(dict.fromkeys(DISPLAY + FEATURES)))
+    X = df[FEATURES].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+    ok = np.isfinite(X).all(axis=1) & df["city"].notna().to_numpy()
+    df, X = df[ok], X[ok]
+    city = df["city"].astype(str).to_numpy()
+    order = np.argsort(city, kind="stable")
+    df, X, city = df.iloc[order].reset_index(drop=True), X[order], city[order]
+
+    # écart interquartile / 1.349 (= écart-type pour une loi normale): les annonces
+    # aberrantes (2 m², 850 000 ₪/m²) ne dilatent pas l'échelle
+    spread = np.subtract(*np.percentile(X, [75, 25], axis=0)) / 1.349 if len(X) else np.ones(len(FEATURES))
+    scale = np.where(spread > 0, spread, 1.0) / np.array([WEIGHTS[c] for c in FEATURES])
+    Xs = X / scale
+    trees, offsets, medians = {}, {}, {}
+    names, starts = np.unique(city, return_index=True)
+    for name, s, e in zip(names, starts, np.r_[starts[1:], len(city)]):
+        offsets[name] = (int(s), int(e))
+        trees[name] = cKDTree(Xs[s:e])
+        medians[name] = np.median(X[s:e], axis=0)
+    for c in ["title", "url"]:
+        df[c] = df[c].astype("string[pyarrow]")
+    return ComparablesIndex(key, df, trees, offsets, scale, medians, _url_hash(df["url"]))
+
+def cache_key(path=DATA_PARQUET, csv_path=DATA_PROCESSED) -> str:
+    h = hashlib.sha1(data_hash(path, csv_path).encode())
+    h.update(Path(__file__).read_bytes())
+    h.update(scipy.__version__.encode())
+    return h.hexdigest()[:16]
+
+def load_comparables(path=DATA_PARQUET, csv_path=DATA_PROCESSED,
+                     cache_dir=COMPARABLES_CACHE, refresh=False) -> ComparablesIndex:
+    """Index des données courantes: depuis le cache si la clé existe, sinon construit
+    puis écrit (fichier temporaire + rename), comme feature_store.load_features."""
+    key = cache_key(path, csv_path)
+    entry = Path(cache_dir) / f"{key}.joblib"
+    if entry.exists() and not refresh:
+        try:
+            ix = joblib.load(entry)
+            entry.touch()
+            return ix
+        except Exception as e:
+            print(f"⚠️ Cache des comparables illisible ({e}), reconstruction")
+
+    df = read_listings(columns=list(dict.fromkeys(DISPLAY + FEATURES)), path=path, csv_path=csv_path)
+    ix = build_comparables(df, key)
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = entry.with_suffix(".tmp")
+    joblib.dump(ix, tmp)
+    tmp.replace(entry)
+    for p in sorted(entry.parent.glob("*.joblib"), key=lambda p: p.stat().st_mtime, reverse=True)[KEEP_ENTRIES:]:
+        p.unlink(missing_ok=True)
+    return ix
+
+def _query_city(ix: ComparablesIndex, name, X, url, k):
+    """k comparables dans la ville `name` des lignes X (m, FEATURES), NaN remplis par les
+    médianes de la ville, `url` hachées (0 = inconnue): positions et distances (m, k)."""
+    pos = np.full((len(X), k), -1, dtype=np.int64)
+    dist = np.full((len(X), k), np.inf)
+    tree = ix.trees.get(name)
+    if tree is None:
+        return pos, dist
+    X = np.where(np.isnan(X), ix.medians[name], X)
+    # un voisin de plus: la requête elle-même est peut-être dans l'index
+    kk = min(k + 1, tree.n)
+    d, i = tree.query(X / ix.scale, k=kk)
+    d, i = d.reshape(len(X), kk), i.reshape(len(X), kk) + ix.offsets[name][0]
+    same = (ix.url_hash[i] == url[:, None]) & (url[:, None] != 0)
+    if kk > k:  # requête absente de ses voisins: c'est le voisin en trop qui tombe
+        same[:, -1] |= ~same.any(axis=1)
+    order = np.argsort(same, axis=1, kind="stable")[:, :min(k, kk)]
+    i, d = np.take_along_axis(i, order, axis=1), np.take_along_axis(d, order, axis=1)
+    drop = np.take_along_axis(same, order, axis=1)
+    i[drop], d[drop] = -1, np.inf
+    pos[:, :order.shape[1]], dist[:, :order.shape[1]] = i, d
+    return pos, dist
+
+def query_batch(ix: ComparablesIndex, queries: pd.DataFrame, k=K):
+    """Positions dans ix.frame (n, k) des k comparables de chaque requête et leurs
+    distances (variables mises à l'échelle), du plus proche au plus loin; -1 / inf
+    au-delà des annonces disponibles. `queries`: city + FEATURES (+ url facultative).
+    Un tree.query par ville présente dans le lot."""
+    n = len(queries)
+    pos = np.full((n, k), -1, dtype=np.int64)
+    dist = np.full((n, k), np.inf)
+    if not n:
+        return pos, dist
+    X = queries.reindex(columns=FEATURES).apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+    url = _url_hash(queries["url"]) if "url" in queries else np.zeros(n, dtype=np.uint64)
+    codes, names = pd.factorize(queries["city"].astype(str))
+    for j, name in enumerate(names):
+        rows = np.flatnonzero(codes == j)
+        pos[rows], dist[rows] = _query_city(ix, name, X[rows], url[rows], k)
+    return pos, dist
+
+def comparables_frame(ix: ComparablesIndex, pos, dist) -> pd.DataFrame:
+    """Format long: une ligne par (requête, rang) avec les colonnes DISPLAY + distance."""
+    pos, dist = np.atleast_2d(pos), np.atleast_2d(dist)
+    qi, rank = np.nonzero(pos >= 0)
+    out = ix.frame.iloc[pos[qi, rank]].reset_index(drop=True)
+    out.insert(0, "query", qi)
+    out.insert(1, "rank", rank + 1)
+    out["distance"] = dist[qi, rank]
+    return out
+
+def nearest(ix: ComparablesIndex, city, area_sqm, rooms, floor, price_per_sqm=None, k=K):
+    """Positions dans ix.frame et distances des k comparables d'un bien (sans -1):
+    le chemin rapide, une descente d'arbre sans pandas."""
+    x = np.array([[area_sqm, rooms, floor, price_per_sqm]], dtype="float64")  # None -> NaN
+    pos, dist = _query_city(ix, str(city), x, np.zeros(1, dtype=np.uint64), k)
+    keep = pos[0] >= 0
+    return pos[0][keep], dist[0][keep]
+
+def find_comparables(ix: ComparablesIndex, city, area_sqm, rooms, floor,
+                     price_per_sqm=None, k=K) -> pd.DataFrame:
+    """Les k annonces les plus proches d'un bien (rank, colonnes DISPLAY, distance)."""
+    p, d = nearest(ix, city, area_sqm, rooms, floor, price_per_sqm, k)
+    # un DataFrame de tableaux numpy, sans copie: frame.take + insert coûtent ~1 ms
+    return pd.DataFrame({"rank": np.arange(1, len(p) + 1),
+                         **{c: np.asarray(ix.frame[c].array.take(p)) for c in ix.frame.columns},
+                         "distance": d}, copy=False)
+
+def main():
+    ap = argparse.ArgumentParser(description="Annonces comparables (k plus proches voisins par ville)")
+    ap.add_argument("-k", type=int, default=K)
+    ap.add_argument("--refresh", action="store_true", help="reconstruit l'index")
+    ap.add_argument("--city")
+    ap.add_argument("--area", type=float)
+    ap.add_argument("--rooms", type=float)
+    ap.add_argument("--floor", type=float)
+    ap.add_argument("--ppsqm", type=float, default=None, help="prix au m² (défaut: médiane de la ville)")
+    ap.add_argument("--input", help="lot de requêtes: CSV, fichier ou dataset Parquet")
+    ap.add_argument("--out", help="sortie .parquet ou .csv du lot (format long)")
+    args = ap.parse_args()
+
+    if args.input and not Path(args.input).exists():  # read_listings retomberait sur listings_clean.csv
+        ap.error(f"--input introuvable: {args.input}")
+    ix = load_comparables(refresh=args.refresh)
+    if args.input:
+        src = Path(args.input)
+        queries = pd.read_csv(src) if src.suffix.lower() == ".csv" else read_listings(path=src, csv_path=src)
+        out = comparables_frame(ix, *query_batch(ix, queries, args.k))
+        if args.out:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            (out.to_csv(args.out, index=False) if args.out.endswith(".csv") else out.to_parquet(args.out))
+        print(f"✅ {len(queries)} requêtes, {len(out)} comparables" + (f" → {args.out}" if args.out else ""))
+    elif args.city:
+        print(find_comparables(ix, args.city, args.area, args.rooms, args.floor, args.ppsqm, args.k)
+              .to_string(index=False))
+    else:
+        ap.error("--city (requête unique) ou --input (lot) requis")
+
+if __name__ == "__main__":
+    # via le module importé: sinon le cache serait picklé en __main__.ComparablesIndex,
+    # illisible depuis les autres scripts (qui le reconstruiraient)
+    import comparables
+    comparables.main()
@@ -4,6 +4,8 @@ import os
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_RAW = BASE_DIR / "data" / "raw" / "yad2_scraped_pagination.csv"
 DATA_PROCESSED = BASE_DIR / "data" / "processed" / "listings_clean.csv"
+DATA_PARQUET = BASE_DIR / "data" / "processed" / "listings_parquet"  # dataset partitionné par ville
+GAZETTEER = BASE_DIR / "data" / "gazetteer.json"  # villes / quartiers / types de biens (+ alias)
 MODELS_DIR = BASE_DIR / "models"
 REPORTS_DIR = BASE_DIR / "reports"
 
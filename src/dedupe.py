@@ -0,0 +1,244 @@
+# src/dedupe.py
+"""Annonces en double (republications, copies promues) en temps ~linéaire.
+
+- clés exactes: `url` (sans query string ni fragment, comme scrape_yad2.url_key)
+  et `image_url` (hors images génériques: placeholder du site, photo partagée par
+  plus de MAX_IMAGE_SHARE annonces; prix proches exigés)
+- quasi-doublons: MinHash (NUM_PERM permutations) des shingles (mots + paires de
+  mots) de title, details et location (le prix n'en fait pas partie), puis LSH en
+  BANDS bandes de NUM_PERM // BANDS valeurs. Deux annonces ne sont rapprochées que
+  si elles ont la même ancre: mêmes nombres dans le texte (n° de rue, pièces,
+  étage, m²: deux appartements voisins de même surface partagent l'essentiel des
+  mots) et même ville (gazetteer); un seau = (bande, ancre). Une annonce n'est
+  comparée qu'au premier membre de chaque seau où elle tombe (au plus BANDS
+  comparaisons par ligne, jamais toutes les paires) et liée si la similarité
+  estimée >= threshold et si les prix sont à moins de price_tol l'un de l'autre
+- clusters = composantes connexes des liens; chaque cluster est réduit à une
+  ligne canonique (la dernière du brut: la plus récente, les scrapes s'ajoutent en
+  fin de fichier) avec cluster_id (hash stable de son url, sinon de son texte) et
+  cluster_size
+
+signatures() travaille ligne à ligne (chunks du mode streaming, pool de processus:
+hash identiques d'un processus à l'autre), cluster() sur l'ensemble.
+"""
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+NUM_PERM = 64
+BANDS = 16            # 16 bandes x 4 valeurs: candidats dès ~0.5 de similarité
+THRESHOLD = 0.75      # similarité estimée (part de minhash égaux) pour lier deux annonces
+PRICE_TOL = 0.15      # écart de prix relatif max. entre deux versions d'une annonce
+MAX_IMAGE_SHARE = 5   # au-delà, photo de stock / rendu de projet: pas une clé d'annonce
+TEXT_COLS = ["title", "details", "location"]
+SIG_CHUNK = 200_000   # lignes par bloc de signatures (mémoire de travail ~ SIG_CHUNK x 1 Ko)
+
+# hachage universel multiply-shift: h_k(x) = (A_k * x + B_k) mod 2^64 >> 32, sans modulo
+_rng = np.random.default_rng(20240917)
+_A = _rng.integers(1, 1 << 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 1 << 63, NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+
+@dataclass
+class Signatures:
+    """Ce que cluster() lit de chaque ligne (aligné sur le DataFrame d'origine)."""
+    bands: np.ndarray     # (n, BANDS) uint64: clé de seau de chaque bande
+    mini: np.ndarray      # (n, NUM_PERM) uint16: 16 bits bas des minhash, pour la vérification
+    has_text: np.ndarray  # bool: texte vide = jamais rapproché par LSH
+    url: np.ndarray       # uint64, 0 = pas d'url
+    image: np.ndarray     # uint64, 0 = pas d'image
+    text: np.ndarray      # uint64: hash des textes (non nul)
+    anchor: np.ndarray    # uint64: hash des nombres des textes et de la ville
+    price: np.ndarray     # float64
+
+    def __len__(self):
+        return len(self.price)
+
+    def take(self, idx):
+        return Signatures(**{f.name: getattr(self, f.name)[idx] for f in fields(self)})
+
+    @staticmethod
+    def concat(parts):
+        return Signatures(**{f.name: np.concatenate([getattr(p, f.name) for p in parts])
+                             for f in fields(Signatures)})
+
+def _hash(s: pd.Series) -> np.ndarray:
+    """Hash 64 bits déterministe (même valeur dans tous les processus), 0 pour vide."""
+    s = s.fillna("").astype(str)
+    h = pd.util.hash_array(s.to_numpy(dtype=object))
+    return np.where(s.to_numpy() == "", np.uint64(0), h | np.uint64(1))
+
+def _url_key(s: pd.Series) -> pd.Series:
+    # regex vectorisées par Arrow (une regex Python par ligne sinon)
+    return (s.astype("string[pyarrow]").str.replace(r"^[a-zA-Z]+://", "", regex=True)
+            .str.replace(r"[?#].*$", "", regex=True).str.rstrip("/"))
+
+def _shingles(texts: pd.Series):
+    """Hash 64 bits des mots et des paires de mots consécutifs de chaque texte,
+    groupés par texte: (hashes, n° de texte)."""
+    toks = texts.str.findall(r"\w+")
+    lens = toks.str.len().to_numpy()
+    flat = np.fromiter((t for ts in toks for t in ts), dtype=object, count=int(lens.sum()))
+    h = pd.util.hash_array(flat) if len(flat) else np.zeros(0, dtype=np.uint64)
+    row = np.repeat(np.arange(len(texts)), lens)
+    same = row[1:] == row[:-1]
+    pairs = h[:-1][same] * np.uint64(0x9E3779B97F4A7C15) ^ h[1:][same]
+    hashes = np.concatenate([h, pairs])
+    rows = np.concatenate([row, row[:-1][same]])
+    order = np.argsort(rows, kind="stable")
+    return hashes[order], rows[order]
+
+def _minhash(texts: pd.Series):
+    """Signatures (n, NUM_PERM) uint32 et masque des textes ayant au moins un mot. Les
+    NUM_PERM hashs ne sont calculés qu'une fois par shingle distinct (les mots de
+    details / location se répètent d'une annonce à l'autre)."""
+    sig = np.full((len(texts), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    has_text = np.zeros(len(texts), dtype=bool)
+    hashes, rows = _shingles(texts)
+    if not len(hashes):
+        return sig, has_text
+    codes, uniq = pd.factorize(hashes)
+    with np.errstate(over="ignore"):
+        table = ((_A[:, None] * uniq + _B[:, None]) >> np.uint64(32)).astype(np.uint32)
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    present = rows[starts]
+    mins = np.empty((NUM_PERM, len(starts)), dtype=np.uint32)
+    for k in range(NUM_PERM):
+        mins[k] = np.minimum.reduceat(table[k].take(codes), starts)
+    sig[present] = mins.T
+    has_text[present] = True
+    return sig, has_text
+
+def _column(values: pd.Series):
+    """Minhash, présence de mots, hash des nombres et hash du texte de chaque ligne,
+    calculés une fois par valeur distincte de la colonne."""
+    codes, uniq = pd.factorize(values.fillna(""))
+    text = pd.Series(uniq, dtype=object).astype(str).str.casefold()
+    sig, has_text = _minhash(text)
+    numbers = _hash(text.str.findall(r"\d+(?:\.\d+)?").str.join(" "))
+    return sig[codes], has_text[codes], numbers[codes], _hash(text)[codes]
+
+def _combine(a, b):
+    with np.errstate(over="ignore"):
+        return a * np.uint64(0x9E3779B97F4A7C15) ^ b
+
+def _signatures(df: pd.DataFrame) -> Signatures:
+    """Signatures d'un DataFrame parsé (colonnes brutes + price_shekels, city). Le minhash
+    d'une union est le minimum des minhash des parties: chaque colonne de TEXT_COLS est
+    traitée par valeur distincte (peu de details / location différents) puis combinée."""
+    sig, has_text = None, np.zeros(len(df), dtype=bool)
+    text = np.zeros(len(df), dtype=np.uint64)
+    anchor = _hash(df["city"]) if "city" in df else text.copy()
+    for c in TEXT_COLS:
+        if c not in df:
+            continue
+        s, h, num, txt = _column(df[c])
+        sig = s if sig is None else np.minimum(sig, s, out=sig)
+        has_text |= h
+        anchor, text = _combine(anchor, num), _combine(text, txt)
+    if sig is None:
+        sig = np.full((len(df), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    r = NUM_PERM // BANDS
+    bands = np.stack([(sig[:, b * r:(b + 1) * r].astype(np.uint64) * _BAND_MIX).sum(axis=1)
+                      for b in range(BANDS)], axis=1)
+    empty = pd.Series("", index=df.index)
+    image = _url_key(df.get("image_url", empty))
+    return Signatures(
+        bands=bands,
+        mini=(sig & 0xFFFF).astype(np.uint16),
+        has_text=has_text,
+        url=_hash(_url_key(df.get("url", empty))),
+        image=_hash(image.mask(image.str.contains("placeholder", na=False))),
+        text=text | np.uint64(1),
+        anchor=anchor,
+        price=pd.to_numeric(df.get("price_shekels", empty), errors="coerce").to_numpy(dtype=float),
+    )
+
+def signatures(df: pd.DataFrame) -> Signatures:
+    """Signatures de chaque ligne, par blocs de SIG_CHUNK lignes."""
+    if len(df) <= SIG_CHUNK:
+        return _signatures(df)
+    return Signatures.concat([_signatures(df.iloc[i:i + SIG_CHUNK]) for i in range(0, len(df), SIG_CHUNK)])
+
+def _first_of_group(keys, mask):
+    """Paires (ligne, premier membre de son groupe de clé) pour les lignes `mask`."""
+    idx = np.flatnonzero(mask)
+    if not len(idx):
+        return idx, idx
+    codes, _ = pd.factorize(keys[idx])
+    _, first = np.unique(codes, return_index=True)  # idx croissant: 1re occurrence = plus petit
+    lead = idx[first][codes]
+    keep = lead != idx
+    return idx[keep], lead[keep]
+
+def _price_ok(p, q, tol):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap = np.abs(p - q) / np.maximum(p, q)
+    return ~(gap > tol)  # prix manquant: pas de garde
+
+def cluster(sig: Signatures, threshold=THRESHOLD, price_tol=PRICE_TOL):
+    """Étiquette de cluster de chaque ligne (0..k-1) et nb de liens par origine."""
+    n = len(sig)
+    src, dst = [], []
+    a, b = _first_of_group(sig.url, sig.url != 0)
+    src.append(a)
+    dst.append(b)
+    stats = {"url": len(a)}
+    codes, _ = pd.factorize(sig.image)
+    shared = np.bincount(codes)[codes]
+    a, b = _first_of_group(sig.image, (sig.image != 0) & (shared <= MAX_IMAGE_SHARE))
+    ok = _price_ok(sig.price[a], sig.price[b], price_tol)
+    src.append(a[ok])
+    dst.append(b[ok])
+    stats["image_url"] = int(ok.sum())
+
+    cand_a, cand_b = [], []
+    for j in range(BANDS):
+        a, b = _first_of_group(_combine(sig.bands[:, j], sig.anchor), sig.has_text)
+        cand_a.append(a)
+        cand_b.append(b)
+    # une paire retrouvée dans plusieurs bandes n'est vérifiée qu'une fois
+    pairs = np.unique(np.concatenate(cand_a).astype(np.int64) * n + np.concatenate(cand_b))
+    a, b = pairs // n, pairs % n
+    ok = np.zeros(len(a), dtype=bool)
+    for s in range(0, len(a), 1_000_000):  # vérification par blocs (n x NUM_PERM octets)
+        e = slice(s, s + 1_000_000)
+        sim = (sig.mini[a[e]] == sig.mini[b[e]]).mean(axis=1)
+        ok[e] = ((sim >= threshold) & (sig.anchor[a[e]] == sig.anchor[b[e]])  # collision de seau
+                 & _price_ok(sig.price[a[e]], sig.price[b[e]], price_tol))
+    src.append(a[ok])
+    dst.append(b[ok])
+    stats.update(lsh_candidates=int(len(a)), lsh_links=int(ok.sum()))
+
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    graph = coo_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels, stats
+
+def canonical(sig: Signatures, labels):
+    """Positions des lignes gardées (la dernière de chaque cluster, ordre du brut),
+    leur cluster_id et leur cluster_size."""
+    labels = np.asarray(labels)
+    size = np.bincount(labels)
+    _, pos = np.unique(labels[::-1], return_index=True)
+    keep = np.sort(len(labels) - 1 - pos)
+    ident = np.where(sig.url[keep] != 0, sig.url[keep], sig.text[keep])
+    return keep, ident.view(np.int64), size[labels[keep]]
+
+def collapse(df: pd.DataFrame, sig: Signatures, labels) -> pd.DataFrame:
+    """Une ligne par cluster, + cluster_id / cluster_size."""
+    keep, ident, size = canonical(sig, labels)
+    return df.iloc[keep].assign(cluster_id=ident, cluster_size=size)
+
+def dedupe(df: pd.DataFrame, threshold=THRESHOLD, price_tol=PRICE_TOL, sig=None):
+    """Annonces dédoublonnées + résumé (lignes avant/après, liens par origine)."""
+    if not len(df):
+        return df.assign(cluster_id=np.zeros(0, dtype=np.int64), cluster_size=np.zeros(0, dtype=np.int64)), {}
+    sig = signatures(df) if sig is None else sig
+    labels, stats = cluster(sig, threshold, price_tol)
+    out = collapse(df, sig, labels)
+    stats.update(rows_in=len(df), rows_out=len(out))
+    return out, stats
@@ -0,0 +1,147 @@
+# src/feature_store.py
+"""Cache disque des features du modèle de prix (feature store).
+
+Lecture, imputation et préprocessing (StandardScaler + OneHot ville) ne dépendent
+que des données nettoyées et de la spécification des features: on les calcule une
+fois et on sauve l'ensemble (frame, X, y, matrice transformée creuse, préprocesseur
+ajusté) sous une clé = hash du contenu des fichiers de données + hash de la spec
+(et du code de ce module). Les modèles candidats, les folds du CV et
+stats_modeling.py lisent la même entrée; toute modif des données, de la spec ou du
+code donne une autre clé, donc un recalcul.
+
+    python src/feature_store.py            # construit (ou vérifie) l'entrée courante
+    python src/feature_store.py --refresh  # force le recalcul
+"""
+import argparse
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from config import DATA_PARQUET, DATA_PROCESSED
+from listings_store import data_hash, read_listings
+
+FEATURE_CACHE = DATA_PARQUET.parent / ".feature_cache"
+KEEP_ENTRIES = 2  # entrées conservées (la courante + la précédente)
+
+NUMERIC = ["rooms", "area_sqm", "floor"]
+CATEGORICAL = ["city"]
+FEATURES = NUMERIC + CATEGORICAL
+TARGET = "price_shekels"
+FEATURE_SPEC = {
+    "numeric": NUMERIC, "categorical": CATEGORICAL, "target": TARGET,
+    # colonnes gardées dans `frame` pour les statistiques descriptives
+    "extra": ["price_per_sqm", "neighborhood"],
+    # prix NaN filtré à la lecture (NaN > 0 est faux)
+    "filters": [[TARGET, ">", 0]],
+    # remplissage si une colonne est entièrement vide (sinon: médiane)
+    "defaults": {"rooms": 3.0, "area_sqm": 70.0, "floor": 2.0},
+}
+
+def prepare_features(df, fill):
+    """Matrice X du modèle: numériques imputées avec `fill` (toujours en float64: le
+    StandardScaler arrondit différemment en float32, et l'export en tableaux suppose
+    du float64), ville normalisée."""
+    X = df.reindex(columns=FEATURES).copy()
+    for c in NUMERIC:
+        X[c] = pd.to_numeric(X[c], errors="coerce").fillna(fill[c]).astype("float64")
+    X["city"] = X["city"].astype(str).replace({"": "Unknown", "nan": "Unknown"}).fillna("Unknown")
+    return X
+
+def build_preprocessor(dense=False):
+    return ColumnTransformer(
+        [("num", StandardScaler(), NUMERIC),
+         # HistGradientBoosting n'accepte pas de matrice creuse -> dense=True
+         ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=not dense), CATEGORICAL)]
+    )
+
+@dataclass
+class FeatureSet:
+    key: str
+    frame: pd.DataFrame   # colonnes lues (features imputées, cible, extra), lignes filtrées
+    X: pd.DataFrame       # features brutes (prepare_features)
+    y: pd.Series
+    Xt: object            # pre.transform(X): creuse dès que le one-hot domine
+    pre: ColumnTransformer
+    fill: dict
+    from_cache: bool = False
+
+def spec_hash() -> str:
+    """Spec des features + code de ce module + version de sklearn (format du pickle)."""
+    h = hashlib.sha1(json.dumps(FEATURE_SPEC, sort_keys=True).encode())
+    h.update(Path(__file__).read_bytes())
+    h.update(sklearn.__version__.encode())
+    return h.hexdigest()
+
+def cache_key(path=DATA_PARQUET, csv_path=DATA_PROCESSED) -> str:
+    return hashlib.sha1((data_hash(path, csv_path) + spec_hash()).encode()).hexdigest()[:16]
+
+def build_features(path=DATA_PARQUET, csv_path=DATA_PROCESSED, key="") -> FeatureSet:
+    spec = FEATURE_SPEC
+    cols = [spec["target"]] + FEATURES + spec["extra"]
+    df = read_listings(columns=cols, filters=[tuple(f) for f in spec["filters"]],
+                       path=path, csv_path=csv_path)
+    df = df.reindex(columns=cols).reset_index(drop=True)
+
+    fill = {c: spec["defaults"][c] if df[c].isna().all() else float(df[c].median())
+            for c in NUMERIC}
+    X = prepare_features(df, fill)
+    df[X.columns] = X
+    y = df[spec["target"]].copy()
+    pre = build_preprocessor().fit(X)
+    return FeatureSet(key=key, frame=df, X=X, y=y, Xt=pre.transform(X), pre=pre, fill=fill)
+
+def _prune(cache_dir, keep):
+    entries = sorted(Path(cache_dir).glob("*.joblib"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for p in entries[keep:]:
+        p.unlink(missing_ok=True)
+
+def load_features(path=DATA_PARQUET, csv_path=DATA_PROCESSED,
+                  cache_dir=FEATURE_CACHE, refresh=False) -> FeatureSet:
+    """FeatureSet des données courantes: depuis le cache si la clé existe, sinon
+    calculé puis écrit (fichier temporaire + rename: jamais d'entrée à moitié écrite)."""
+    key = cache_key(path, csv_path)
+    cache_dir = Path(cache_dir)
+    entry = cache_dir / f"{key}.joblib"
+    if entry.exists() and not refresh:
+        try:
+            fs = joblib.load(entry)
+            fs.from_cache = True
+            entry.touch()  # la plus récemment utilisée n'est pas élaguée
+            return fs
+        except Exception as e:  # entrée illisible (version de lib, fichier abîmé): on recalcule
+            print(f"⚠️ Cache de features illisible ({e}), recalcul")
+
+    fs = build_features(path, csv_path, key)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = entry.with_suffix(".tmp")
+    joblib.dump(fs, tmp)
+    tmp.replace(entry)
+    _prune(cache_dir, KEEP_ENTRIES)
+    return fs
+
+def to_dense(Xt):
+    return Xt.toarray() if hasattr(Xt, "toarray") else np.asarray(Xt)
+
+def main():
+    ap = argparse.ArgumentParser(description="Construit le cache des features du modèle")
+    ap.add_argument("--refresh", action="store_true", help="recalcule même si la clé existe")
+    args = ap.parse_args()
+
+    fs = load_features(refresh=args.refresh)
+    state = "en cache" if fs.from_cache else "calculées"
+    print(f"✅ Features {fs.key} {state}: {fs.Xt.shape[0]} lignes x {fs.Xt.shape[1]} colonnes "
+          f"→ {FEATURE_CACHE}")
+
+if __name__ == "__main__":
+    # via le module importé: sinon le cache serait picklé en __main__.FeatureSet,
+    # illisible depuis les autres scripts (qui le reconstruiraient)
+    import feature_store
+    feature_store.main()
@@ -0,0 +1,177 @@
+# src/gazetteer.py
+"""Normalisation ville / quartier des annonces via un gazetteer (data/gazetteer.json).
+
+Le champ `location` de Yad2 a la forme "<type de bien>, <quartier>, <ville>"
+("גג/ פנטהאוז, שחמון, רובע 2, אילת"). Chaque chaîne distincte est résolue une fois:
+
+- type de bien en tête retiré
+- ville = dernier segment ramené au nom du gazetteer (noms et alias hébreux /
+  anglais, comparés sur des tokens normalisés: guillemets, tirets, casse, קריית/קרית);
+  "נצרת עילית / נוף הגליל" est essayé en entier puis morceau par morceau
+- quartier = segments du milieu (nom du gazetteer s'il y figure)
+- ville absente du gazetteer: texte du dernier segment gardé; sans ville, un quartier
+  connu d'une seule ville la donne, sinon "Unknown"
+
+normalize_locations() factorise la colonne et ne résout que les valeurs distinctes
+pas encore vues: le coût dépend du nombre de lieux distincts, pas du nombre de
+lignes. Les résolutions restent en mémoire dans le processus et sont sauvées entre
+deux passages (data/processed/.location_cache.pkl, invalidé quand le gazetteer ou ce
+fichier change).
+"""
+import hashlib
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_PROCESSED, GAZETTEER
+
+UNKNOWN = "Unknown"
+MEMO_PATH = DATA_PROCESSED.parent / ".location_cache.pkl"
+MAX_MEMO = 500_000  # lieux gardés sur disque (les plus récents)
+
+_BIDI = dict.fromkeys(map(ord, "\u200e\u200f\u202a\u202b\u202c\u202d\u202e"), None)
+_PUNCT = str.maketrans({"״": '"', "׳": "'", "’": "'", "`": "'", "–": "-", "—": "-", "־": "-"})
+_SEP = re.compile(r"[\s\-/]+")
+_DROP = re.compile(r"[\"'.()]")
+# orthographes pleine / défective courantes
+TOKEN_VARIANTS = {"קריית": "קרית", "תקוה": "תקווה"}
+
+def norm_tokens(s) -> tuple:
+    """Clé de comparaison: marques bidi, guillemets, tirets/slash et casse neutralisés."""
+    s = unicodedata.normalize("NFKC", str(s)).translate(_BIDI).translate(_PUNCT).casefold()
+    return tuple(TOKEN_VARIANTS.get(t, t) for t in _SEP.split(_DROP.sub("", s)) if t)
+
+def clean_text(s) -> str:
+    """Texte gardé tel quel (ville hors gazetteer, quartier): bidi retiré, espaces normalisés."""
+    return " ".join(str(s).translate(_BIDI).split())
+
+class Gazetteer:
+    def __init__(self, data):
+        self.types = {norm_tokens(t) for t in data["property_types"]}
+        self.cities = {}          # tokens d'un nom/alias -> nom canonique
+        self.neighborhoods = {}   # (ville, tokens) -> nom canonique du quartier
+        owners = {}               # tokens du quartier -> {(ville, quartier)}
+        for c in data["cities"]:
+            for alias in [c["name"], *c["aliases"]]:
+                self.cities[norm_tokens(alias)] = c["name"]
+            for nb, aliases in c.get("neighborhoods", {}).items():
+                for alias in [nb, *aliases]:
+                    self.neighborhoods[(c["name"], norm_tokens(alias))] = nb
+                    owners.setdefault(norm_tokens(alias), set()).add((c["name"], nb))
+        # un quartier ne désigne la ville que s'il n'existe que dans une seule
+        self.unique_neighborhoods = {t: next(iter(v)) for t, v in owners.items() if len(v) == 1}
+
+    def city(self, text):
+        """Nom canonique de la ville `text` (en entier, sinon un des morceaux séparés
+        par "/"), ou None."""
+        for part in [text, *reversed(str(text).split("/"))]:
+            hit = self.cities.get(norm_tokens(part))
+            if hit:
+                return hit
+        return None
+
+    def neighborhood(self, city, segs):
+        if not segs:
+            return None
+        text = ", ".join(segs)
+        return self.neighborhoods.get((city, norm_tokens(text)), text)
+
+    def resolve(self, location):
+        """(ville, quartier) d'une chaîne `location` (ou d'une valeur de ville seule)."""
+        segs = [s for s in map(clean_text, str(location).split(",")) if s]
+        if segs and norm_tokens(segs[0]) in self.types:
+            segs = segs[1:]
+        if not segs:
+            return UNKNOWN, None
+        city = self.city(segs[-1])
+        if city:
+            return city, self.neighborhood(city, segs[:-1])
+        for seg in reversed(segs):
+            hit = self.unique_neighborhoods.get(norm_tokens(seg))
+            if hit:
+                return hit
+        if norm_tokens(segs[-1]) in self.types:
+            return UNKNOWN, self.neighborhood(None, segs[:-1])
+        return segs[-1], self.neighborhood(None, segs[:-1])
+
+@lru_cache(maxsize=1)
+def load_gazetteer(path=GAZETTEER) -> Gazetteer:
+    return Gazetteer(json.loads(Path(path).read_text(encoding="utf-8")))
+
+def version(path=GAZETTEER) -> str:
+    """Empreinte du gazetteer + des règles: invalide les résolutions mémorisées."""
+    h = hashlib.sha1(Path(path).read_bytes())
+    h.update(Path(__file__).read_bytes())
+    return h.hexdigest()
+
+# ===================== Mémo des résolutions (processus + disque) =====================
+_MEMO = {}       # chaîne brute -> (ville, quartier)
+_fresh = {}      # entrées résolues depuis le dernier load/save (à écrire, à remonter des workers)
+
+def resolve_series(values: pd.Series):
+    """(villes, quartiers) en tableaux object: une résolution par valeur distincte."""
+    codes, uniq = pd.factorize(values.fillna("").astype(str))
+    gz, res = load_gazetteer(), []
+    for u in uniq:
+        r = _MEMO.get(u)
+        if r is None:
+            r = _MEMO[u] = _fresh[u] = gz.resolve(u)
+        res.append(r)
+    city = np.array([r[0] for r in res], dtype=object)
+    neigh = np.array([r[1] for r in res], dtype=object)
+    return city[codes], neigh[codes]
+
+def normalize_locations(locations: pd.Series, cities=None, neighborhoods=None):
+    """Ville / quartier de chaque ligne. Une ville déjà renseignée (`cities`) est
+    ramenée au nom du gazetteer au lieu d'être relue dans `location`; un quartier déjà
+    renseigné est gardé."""
+    city, neigh = resolve_series(locations)
+    if cities is not None:
+        given = cities.notna() & cities.astype(str).str.strip().ne("")
+        if given.any():
+            city[given.to_numpy()] = resolve_series(cities[given])[0]
+    if neighborhoods is not None:
+        neigh = np.where(neighborhoods.notna().to_numpy(), neighborhoods.to_numpy(dtype=object), neigh)
+    return pd.Series(city, index=locations.index), pd.Series(neigh, index=locations.index)
+
+def load_memo(path=MEMO_PATH) -> int:
+    """Remplace le mémo du processus par celui de `path` (si même gazetteer, sinon mémo
+    vide); renvoie son nombre d'entrées."""
+    _MEMO.clear()
+    _fresh.clear()
+    try:
+        payload = pd.read_pickle(path)
+    except Exception:
+        return 0
+    if not isinstance(payload, dict) or payload.get("version") != version():
+        return 0
+    _MEMO.update(payload["entries"])
+    return len(payload["entries"])
+
+def take_new() -> dict:
+    """Entrées résolues dans ce processus depuis le dernier appel (worker -> parent)."""
+    new = dict(_fresh)
+    _fresh.clear()
+    return new
+
+def add_memo(entries: dict):
+    """Ajoute des résolutions faites ailleurs (workers); écrites au prochain save_memo."""
+    _MEMO.update(entries)
+    _fresh.update(entries)
+
+def save_memo(path=MEMO_PATH):
+    """Écrit le mémo s'il a des entrées nouvelles (fichier temporaire + rename)."""
+    if not _fresh:
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entries = dict(list(_MEMO.items())[-MAX_MEMO:])
+    tmp = path.with_suffix(".tmp")
+    pd.to_pickle({"version": version(), "entries": entries}, tmp)
+    tmp.replace(path)
+    _fresh.clear()
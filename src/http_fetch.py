@@ -0,0 +1,117 @@
+# src/http_fetch.py
+"""Moteur de téléchargement asyncio pour le scraping.
+
+- pool de connexions borné (aiohttp.TCPConnector(limit=...))
+- limiteur de débit token-bucket partagé par toutes les requêtes
+- retries avec backoff exponentiel (+ jitter) sur 429 / 5xx / erreurs réseau
+- détection des pages "challenge" anti-bot: elles sont rendues à l'appelant
+  (fallback Selenium) au lieu d'être réessayées en boucle
+- fetch_all (tout, dans l'ordre) ou fetch_iter (au fil de l'eau, mémoire constante)
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+
+import aiohttp
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/126.0 Safari/537.36"),
+    "Accept-Language": "he-IL,he;q=0.9,en;q=0.8",
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CHALLENGE_STATUS = {403}
+CHALLENGE_MARKERS = ("captcha", "shieldsquare", "perimeterx", "are you for real")
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int = 0
+    text: str = ""
+    challenged: bool = False
+    error: str = ""
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and not self.challenged and not self.error
+
+class TokenBucket:
+    """`rate` jetons/seconde, rafale max `capacity`; acquire() attend un jeton."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def is_challenge(status: int, text: str) -> bool:
+    if status in CHALLENGE_STATUS:
+        return True
+    head = text[:20_000].lower()
+    return any(m in head for m in CHALLENGE_MARKERS)
+
+async def fetch_one(session, url, bucket, retries=3, backoff=1.0, timeout=20.0) -> FetchResult:
+    res = FetchResult(url)
+    for attempt in range(retries + 1):
+        res.attempts = attempt + 1
+        await bucket.acquire()
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                res.status, res.text, res.error = r.status, await r.text(), ""
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            res.status, res.text, res.error = 0, "", f"{type(e).__name__}: {e}"
+
+        if not res.error and res.status not in RETRY_STATUS:
+            res.challenged = is_challenge(res.status, res.text)
+            return res
+        if attempt < retries:
+            await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random() / 2))
+    if not res.error:
+        res.error = f"HTTP {res.status}"
+    return res
+
+async def fetch_all(urls, concurrency=4, rate=1.0, burst=None, retries=3, backoff=1.0,
+                    timeout=20.0, headers=None):
+    """Télécharge `urls` en parallèle; renvoie les FetchResult dans l'ordre des urls."""
+    bucket = TokenBucket(rate, burst or concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, headers=headers or HEADERS) as session:
+        return await asyncio.gather(*(
+            fetch_one(session, u, bucket, retries=retries, backoff=backoff, timeout=timeout)
+            for u in urls
+        ))
+
+async def fetch_iter(urls, concurrency=4, rate=1.0, burst=None, retries=3, backoff=1.0,
+                     timeout=20.0, headers=None):
+    """Comme fetch_all, mais rend chaque FetchResult dès qu'il arrive (ordre d'arrivée)
+    avec au plus `concurrency` requêtes en vol: la mémoire ne dépend pas du nb de pages."""
+    bucket = TokenBucket(rate, burst or concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    pending_urls = iter(urls)
+    async with aiohttp.ClientSession(connector=connector, headers=headers or HEADERS) as session:
+        def start(u):
+            return asyncio.create_task(
+                fetch_one(session, u, bucket, retries=retries, backoff=backoff, timeout=timeout))
+
+        pending = {start(u) for _, u in zip(range(concurrency), pending_urls)}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+                nxt = next(pending_urls, None)
+                if nxt is not None:
+                    pending.add(start(nxt))
@@ -0,0 +1,133 @@
+# src/listings_store.py
+"""Stockage colonnaire des annonces nettoyées (Parquet partitionné par ville).
+
+Le CSV `listings_clean.csv` reste écrit comme export; les consommateurs (ML, stats,
+Postgres, dashboard) lisent le dataset Parquet: colonnes typées, projection de colonnes
+et filtres poussés jusqu'au lecteur (les partitions `city=...` non voulues ne sont même
+pas ouvertes).
+"""
+import hashlib
+import operator
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from config import DATA_PARQUET, DATA_PROCESSED
+
+# features en float32; le prix reste en float64 (float32 n'est exact que jusqu'à ~16.7M ₪)
+FLOAT32_COLS = ["rooms", "area_sqm", "floor", "price_per_sqm"]
+FLOAT64_COLS = ["price_shekels"]
+CATEGORY_COLS = ["city", "neighborhood"]
+PARTITION_COL = "city"
+
+_OPS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+        ">": operator.gt, ">=": operator.ge, "in": lambda s, v: s.isin(v)}
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Dtypes compacts: float32 pour les numériques, category pour ville/quartier."""
+    df = df.copy()
+    for c in FLOAT32_COLS + FLOAT64_COLS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(
+                np.float32 if c in FLOAT32_COLS else np.float64)
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    return df
+
+def _write(df: pd.DataFrame, path: Path, basename: str):
+    table = pa.Table.from_pandas(to_compact(df), preserve_index=False)
+    ds.write_dataset(
+        table, path, format="parquet",
+        partitioning=[PARTITION_COL], partitioning_flavor="hive",
+        basename_template=basename + "-{i}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+def staging_dir(path=DATA_PARQUET) -> Path:
+    """Dossier temporaire vide où écrire un nouveau dataset avant publish()."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    return tmp
+
+def publish(tmp: Path, path=DATA_PARQUET):
+    """Remplace le dataset par `tmp` (jamais de demi-dataset visible)."""
+    path = Path(path)
+    shutil.rmtree(path, ignore_errors=True)
+    if Path(tmp).exists():
+        Path(tmp).rename(path)
+
+def write_parquet(df: pd.DataFrame, path=DATA_PARQUET):
+    """Réécrit tout le dataset."""
+    tmp = staging_dir(path)
+    _write(df, tmp, "part-000000")
+    publish(tmp, path)
+
+def append_parquet(df: pd.DataFrame, tmp: Path, part_id: int):
+    """Ajoute un chunk à un dataset en cours d'écriture (mode streaming);
+    `part_id` rend les noms de fichiers uniques."""
+    _write(df, Path(tmp), f"part-{part_id:06d}")
+
+def read_listings(columns=None, cities=None, filters=None,
+                  path=DATA_PARQUET, csv_path=DATA_PROCESSED) -> pd.DataFrame:
+    """Charge les annonces nettoyées avec seulement `columns`.
+    `cities` -> élagage des partitions; `filters` -> filtres pyarrow, ex. [("rooms", ">=", 3)].
+    Repli sur le CSV (mêmes dtypes compacts) si le dataset Parquet n'existe pas."""
+    path = Path(path)
+    preds = list(filters or [])
+    if cities is not None:
+        preds.append((PARTITION_COL, "in", list(cities)))
+
+    if path.exists():
+        return pd.read_parquet(path, columns=columns, filters=preds or None)
+
+    df = pd.read_csv(csv_path, usecols=lambda c: columns is None or c in columns)
+    df = to_compact(df)
+    for col, op, val in preds:
+        df = df[_OPS[op](df[col], val)]
+    return df.reset_index(drop=True)
+
+def iter_listings(columns=None, batch_size=100_000,
+                  path=DATA_PARQUET, csv_path=DATA_PROCESSED):
+    """Même chose que read_listings, mais par morceaux de `batch_size` lignes
+    (mémoire bornée pour les gros fichiers)."""
+    path = Path(path)
+    if path.exists():
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        # un fichier par ville -> petits batchs: on les regroupe jusqu'à batch_size lignes
+        buf, n = [], 0
+        for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+            buf.append(batch)
+            n += batch.num_rows
+            if n >= batch_size:
+                yield pa.Table.from_batches(buf).to_pandas()
+                buf, n = [], 0
+        if n:
+            yield pa.Table.from_batches(buf).to_pandas()
+        return
+    usecols = (lambda c: c in columns) if columns is not None else None
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=batch_size):
+        yield to_compact(chunk)
+
+def _source_files(path, csv_path):
+    path = Path(path)
+    if path.exists():
+        return path, sorted(p for p in path.rglob("*") if p.is_file())
+    return Path(csv_path).parent, [Path(csv_path)]
+
+def data_hash(path=DATA_PARQUET, csv_path=DATA_PROCESSED) -> str:
+    """Hash du contenu des fichiers lus par read_listings (chemins relatifs compris:
+    pour le Parquet, la ville est dans le nom de la partition)."""
+    root, files = _source_files(path, csv_path)
+    h = hashlib.sha1()
+    for p in files:
+        h.update(str(p.relative_to(root)).encode())
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
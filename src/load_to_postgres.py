@@ -1,16 +1,26 @@
+import argparse
 import os
+import re
+import time
 from dotenv import load_dotenv
 import pandas as pd
-from sqlalchemy import create_engine, text
-from config import DATA_PROCESSED, DATABASE_URL, TABLE_NAME
+import psycopg
+import perf
+from config import DATA_PARQUET, DATABASE_URL, TABLE_NAME
+from listings_store import iter_listings, to_compact
 
-def main():
-    if not DATABASE_URL:
-        raise RuntimeError("DATABASE_URL manquant (.env)")
+COLUMNS = ["title","city","neighborhood","rooms","floor","area_sqm","price_shekels","price_per_sqm","url"]
+# colonnes mises à jour quand une annonce (même url) est rechargée
+UPDATE_COLS = [c for c in COLUMNS if c != "url"]
+STAGE = f"{TABLE_NAME}_stage"
+# agrégats par (ville, quartier) tenus à jour à chaque chargement (voir sql/queries.sql)
+STATS_TABLE = "yad2_city_stats"
 
-    engine = create_engine(DATABASE_URL, future=True)
-    df = pd.read_csv(DATA_PROCESSED)
+def pg_dsn(url: str) -> str:
+    """URL SQLAlchemy (postgresql+psycopg2://...) -> DSN libpq pour psycopg."""
+    return re.sub(r"^postgresql\+\w+://", "postgresql://", url)
 
+def ensure_schema(conn):
     # Créer table si nécessaire (types simples)
     ddl = f'''
     CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
@@ -26,13 +36,196 @@ def main():
         url TEXT
     );
     '''
-    with engine.begin() as conn:
-        conn.execute(text(ddl))
+    conn.execute(ddl)
+    # Clé naturelle: url. Une table chargée par l'ancien loader (append) peut contenir
+    # des doublons: on garde la ligne la plus récente avant de créer l'index unique.
+    exists = conn.execute("SELECT to_regclass(%s)", (f"{TABLE_NAME}_url_key",)).fetchone()[0]
+    if exists is None:
+        conn.execute(f'''
+            DELETE FROM {TABLE_NAME} a USING {TABLE_NAME} b
+            WHERE a.url = b.url AND a.id < b.id
+        ''')
+        conn.execute(f"CREATE UNIQUE INDEX {TABLE_NAME}_url_key ON {TABLE_NAME} (url)")
+    # annonces sans url (anciens scrapes): recherche d'une ligne identique avant insertion
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {TABLE_NAME}_no_url_idx ON {TABLE_NAME} (title, city)
+        WHERE url IS NULL
+    ''')
+    # requêtes ad hoc par ville/quartier: index couvrant (index-only scan)
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {TABLE_NAME}_city_neigh_idx ON {TABLE_NAME} (city, neighborhood)
+        INCLUDE (price_shekels, price_per_sqm)
+    ''')
+
+    # '' = pas de quartier (une clé primaire ne peut pas contenir NULL)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+            city TEXT NOT NULL,
+            neighborhood TEXT NOT NULL DEFAULT '',
+            n BIGINT NOT NULL DEFAULT 0,
+            sum_price NUMERIC NOT NULL DEFAULT 0,
+            sumsq_price NUMERIC NOT NULL DEFAULT 0,
+            n_ppsqm BIGINT NOT NULL DEFAULT 0,
+            sum_ppsqm NUMERIC NOT NULL DEFAULT 0,
+            sumsq_ppsqm NUMERIC NOT NULL DEFAULT 0,
+            PRIMARY KEY (city, neighborhood)
+        )
+    ''')
+    # table créée ici ou par sql/schema.sql sur une base déjà remplie: agrégats vides
+    # alors que la table ne l'est pas -> les requêtes de sql/queries.sql seraient fausses
+    (stale,) = conn.execute(f'''
+        SELECT NOT EXISTS (SELECT 1 FROM {STATS_TABLE}) AND EXISTS (SELECT 1 FROM {TABLE_NAME})
+    ''').fetchone()
+    if stale:
+        rebuild_stats(conn)
+
+def rebuild_stats(conn):
+    """Recalcule entièrement les agrégats depuis la table (création / réparation)."""
+    conn.execute(f"TRUNCATE {STATS_TABLE}")
+    conn.execute(f'''
+        WITH delta AS (
+            SELECT city, neighborhood, 1 AS sign, price_shekels, price_per_sqm FROM {TABLE_NAME}
+        )
+        {_stats_merge_sql()}
+    ''')
+
+def _stats_merge_sql():
+    """INSERT ... ON CONFLICT qui ajoute au résumé les lignes d'une CTE `delta`
+    (city, neighborhood, sign = +1 ligne ajoutée / -1 ancienne version, prix, prix/m²).
+    Sommes en NUMERIC: les +/- successifs ne dérivent pas."""
+    upd = ", ".join(f"{c} = {STATS_TABLE}.{c} + EXCLUDED.{c}"
+                    for c in ["n", "sum_price", "sumsq_price", "n_ppsqm", "sum_ppsqm", "sumsq_ppsqm"])
+    return f'''
+        INSERT INTO {STATS_TABLE} (city, neighborhood, n, sum_price, sumsq_price,
+                                   n_ppsqm, sum_ppsqm, sumsq_ppsqm)
+        SELECT COALESCE(city, 'Unknown'), COALESCE(neighborhood, ''),
+               SUM(sign),
+               COALESCE(SUM(sign * price_shekels::NUMERIC), 0),
+               COALESCE(SUM(sign * price_shekels::NUMERIC ^ 2), 0),
+               COUNT(price_per_sqm) FILTER (WHERE sign > 0) - COUNT(price_per_sqm) FILTER (WHERE sign < 0),
+               COALESCE(SUM(sign * price_per_sqm::NUMERIC), 0),
+               COALESCE(SUM(sign * price_per_sqm::NUMERIC ^ 2), 0)
+        FROM delta
+        GROUP BY 1, 2
+        ON CONFLICT (city, neighborhood) DO UPDATE SET {upd}
+    '''
+
+def copy_chunk(conn, df: pd.DataFrame):
+    """COPY d'un chunk dans la table de staging (CSV généré par pandas, NaN/"" -> NULL)."""
+    conn.execute(f'''
+        CREATE TEMP TABLE IF NOT EXISTS {STAGE} (
+            ord BIGSERIAL,
+            title TEXT, city TEXT, neighborhood TEXT,
+            rooms FLOAT, floor FLOAT, area_sqm FLOAT,
+            price_shekels FLOAT, price_per_sqm FLOAT, url TEXT
+        ) ON COMMIT DELETE ROWS
+    ''')
+    with conn.cursor().copy(f"COPY {STAGE} ({','.join(COLUMNS)}) FROM STDIN (FORMAT csv)") as copy:
+        copy.write(df[COLUMNS].to_csv(header=False, index=False))
+
+def merge_stage(conn):
+    """Upsert staging -> table par url, et mise à jour des agrégats dans la même
+    transaction; renvoie (insérées, mises à jour).
+    Une même url plusieurs fois dans le chunk: la dernière gagne (DISTINCT ON).
+    Les lignes identiques ne sont pas réécrites (pas de tuple mort)."""
+    cols = ",".join(COLUMNS)
+    set_ = ",".join(f"{c} = EXCLUDED.{c}" for c in UPDATE_COLS)
+    changed = " OR ".join(f"{TABLE_NAME}.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in UPDATE_COLS)
+    select = f'''
+        title, city, neighborhood, rooms, ROUND(floor)::INT AS floor, area_sqm,
+        ROUND(price_shekels)::BIGINT AS price_shekels, price_per_sqm, url, ord
+    '''
+    returning = "RETURNING url, city, neighborhood, price_shekels, price_per_sqm, (xmax = 0) AS inserted"
+
+    # sans url: pas de clé naturelle; on n'insère que si aucune ligne identique n'existe
+    same = " AND ".join(f"t.{c} IS NOT DISTINCT FROM s.{c}" for c in UPDATE_COLS)
+    (no_url,) = conn.execute(f'''
+        WITH up AS (
+            INSERT INTO {TABLE_NAME} ({cols})
+            SELECT {cols} FROM (SELECT {select} FROM {STAGE} WHERE url IS NULL) s
+            WHERE NOT EXISTS (SELECT 1 FROM {TABLE_NAME} t WHERE t.url IS NULL AND {same})
+            ORDER BY ord
+            {returning}
+        ), delta AS (
+            SELECT city, neighborhood, 1 AS sign, price_shekels, price_per_sqm FROM up
+        ), stats AS ({_stats_merge_sql()})
+        SELECT COUNT(*) FROM up
+    ''').fetchone()
+
+    # avec url: upsert; `old` lit l'état d'avant la requête (même snapshot pour toutes
+    # les CTE), d'où les -1 pour les anciennes versions des annonces mises à jour
+    inserted, updated = conn.execute(f'''
+        WITH src AS (
+            SELECT DISTINCT ON (url) {select} FROM {STAGE}
+            WHERE url IS NOT NULL ORDER BY url, ord DESC
+        ), old AS (
+            SELECT t.url, t.city, t.neighborhood, t.price_shekels, t.price_per_sqm
+            FROM {TABLE_NAME} t JOIN src USING (url)
+        ), up AS (
+            INSERT INTO {TABLE_NAME} ({cols})
+            SELECT {cols} FROM src
+            ON CONFLICT (url) DO UPDATE SET {set_} WHERE {changed}
+            {returning}
+        ), delta AS (
+            SELECT city, neighborhood, 1 AS sign, price_shekels, price_per_sqm FROM up
+            UNION ALL
+            SELECT o.city, o.neighborhood, -1, o.price_shekels, o.price_per_sqm
+            FROM old o JOIN up u ON u.url = o.url AND NOT u.inserted
+        ), stats AS ({_stats_merge_sql()})
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM up
+    ''').fetchone()
+    return no_url + inserted, updated
+
+def load(dsn, chunksize=50_000, path=DATA_PARQUET, frame=None):
+    """Charge le dataset nettoyé par chunks (COPY + upsert, une transaction par chunk).
+    `frame`: annonces déjà en mémoire (pipeline.py), au lieu de relire `path`."""
+    stats = {"rows": 0, "inserted": 0, "updated": 0}
+    if frame is not None:
+        frame = to_compact(frame.reindex(columns=COLUMNS))
+        chunks = (frame.iloc[i:i + chunksize] for i in range(0, len(frame), chunksize))
+    else:
+        chunks = iter_listings(columns=COLUMNS, batch_size=chunksize, path=path)
+    t0 = time.perf_counter()
+    with psycopg.connect(dsn) as conn:
+        with conn.transaction():
+            ensure_schema(conn)
+        for df in chunks:
+            with conn.transaction():
+                with perf.step("copy", rows=len(df)):
+                    copy_chunk(conn, df)
+                with perf.step("merge", rows=len(df)):
+                    ins, upd = merge_stage(conn)
+            stats["rows"] += len(df)
+            stats["inserted"] += ins
+            stats["updated"] += upd
+    stats["seconds"] = time.perf_counter() - t0
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    perf.note(rows_in=stats["rows"], rows_out=stats["inserted"] + stats["updated"])
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description="Charge les annonces nettoyées dans PostgreSQL")
+    ap.add_argument("--chunksize", type=int, default=50_000, help="lignes par COPY/transaction")
+    ap.add_argument("--rebuild-stats", action="store_true",
+                    help=f"recalcule {STATS_TABLE} depuis la table (réparation), sans charger")
+    perf.add_profile_arg(ap)
+    args = ap.parse_args()
+
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL manquant (.env)")
 
-    # Charger
-    df[["title","city","neighborhood","rooms","floor","area_sqm","price_shekels","price_per_sqm","url"]]        .to_sql(TABLE_NAME, engine, if_exists="append", index=False)
+    if args.rebuild_stats:
+        with psycopg.connect(pg_dsn(DATABASE_URL)) as conn, conn.transaction():
+            ensure_schema(conn)
+            rebuild_stats(conn)
+        print(f"{STATS_TABLE} recalculée.")
+        return
 
-    print(f"Import OK → table {TABLE_NAME}, {len(df)} lignes ajoutées.")
+    with perf.stage("load_db", profile=args.profile, bytes_in=perf.size_of(DATA_PARQUET)):
+        s = load(pg_dsn(DATABASE_URL), chunksize=args.chunksize)
+    print(f"Import OK → table {TABLE_NAME}, {s['rows']} lignes lues: "
+          f"{s['inserted']} ajoutées, {s['updated']} mises à jour "
+          f"({s['seconds']:.2f}s, {s['rows_per_sec']:,.0f} lignes/s).")
 
 if __name__ == "__main__":
     main()
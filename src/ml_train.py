@@ -1,75 +1,165 @@
+import argparse
 import json
+import os
+import time
 from pathlib import Path
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.compose import ColumnTransformer
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV, KFold, cross_validate, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.metrics import r2_score
 from sklearn.dummy import DummyRegressor
 import joblib
-from config import DATA_PROCESSED, MODELS_DIR, REPORTS_DIR
+import perf
+from config import MODELS_DIR, REPORTS_DIR
+from feature_store import build_preprocessor, load_features, to_dense
+from model_export import ARRAYS_DIR, export_model
 
 def rmse(y_true, y_pred):
     y_true = np.array(y_true, dtype=float)
     y_pred = np.array(y_pred, dtype=float)
     return float(np.sqrt(np.mean((y_true - y_pred) ** 2)))
 
-def load_data():
-    df = pd.read_csv(DATA_PROCESSED)
-    # Colonnes minimales
-    needed = ["price_shekels", "rooms", "area_sqm", "floor", "city"]
-    for c in needed:
-        if c not in df.columns:
-            df[c] = np.nan
-
-    # Types
-    for c in ["price_shekels", "rooms", "area_sqm", "floor"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-    df = df.dropna(subset=["price_shekels"]).copy()
-
-    # Imputations
-    for c in ["rooms", "area_sqm", "floor"]:
-        if df[c].isna().all():
-            defaults = {"rooms": 3.0, "area_sqm": 70.0, "floor": 2.0}
-            df[c] = defaults[c]
-        else:
-            df[c] = df[c].fillna(df[c].median())
+# valeurs de remplissage des features, sauvegardées avec le modèle (score_listings.py)
+FEATURE_DEFAULTS_PATH = MODELS_DIR / "feature_defaults.json"
+
+MODEL_NAMES = {"lr": "linear_regression", "rf": "random_forest", "hgb": "gradient_boosting"}
 
-    df["city"] = df["city"].astype(str).replace({"": "Unknown", "nan": "Unknown"}).fillna("Unknown")
+# Successive halving: tous les candidats d'une grille commencent avec peu d'arbres /
+# d'itérations (min_resources); à chaque tour seul le meilleur tiers continue, avec
+# 3x plus de ressource. Chaque tour évalue candidats x folds en parallèle.
+# Les candidats sont ajustés sur la matrice déjà transformée du feature store
+# (paramètres de l'estimateur seul, sans préfixe "est__").
+SEARCH_SPACES = {
+    "rf": {
+        "resource": "n_estimators", "min_resources": 25, "max_resources": 400,
+        "grid": {"max_features": [1.0, 0.5, "sqrt"],
+                 "min_samples_leaf": [1, 2, 5],
+                 "max_depth": [None, 12]},
+    },
+    "hgb": {
+        "resource": "max_iter", "min_resources": 30, "max_resources": 300,
+        "grid": {"learning_rate": [0.05, 0.1, 0.2],
+                 "max_leaf_nodes": [15, 31],
+                 "min_samples_leaf": [5, 20],
+                 "l2_regularization": [0.0, 1.0]},
+    },
+}
+# En dessous, le halving coûte surtout son surcoût fixe (candidats x folds x tours,
+# ~40s sur les 306 annonces du dépôt contre ~1s) pour des écarts de CV dans le bruit:
+# LR + RF à paramètres fixes, comme --no-search.
+SEARCH_MIN_ROWS = 5_000
+SCORING = "neg_root_mean_squared_error"
 
-    X = df[["rooms", "area_sqm", "floor", "city"]].copy()
-    y = df["price_shekels"].copy()
-    return df, X, y
+def build_estimator(kind="rf"):
+    if kind == "lr":
+        return LinearRegression()
+    if kind == "rf":
+        return RandomForestRegressor(n_estimators=200, min_samples_leaf=2, random_state=42)
+    if kind == "hgb":
+        return HistGradientBoostingRegressor(early_stopping=False, random_state=42)
+    return DummyRegressor(strategy="median")
 
 def build_pipeline(kind="rf"):
-    numeric = ["rooms", "area_sqm", "floor"]
-    cat = ["city"]
-    pre = ColumnTransformer(
-        [("num", StandardScaler(), numeric),
-         ("cat", OneHotEncoder(handle_unknown="ignore"), cat)]
-    )
+    return Pipeline([("pre", build_preprocessor(dense=kind == "hgb")), ("est", build_estimator(kind))])
 
-    if kind == "lr":
-        est = LinearRegression()
-    elif kind == "rf":
-        est = RandomForestRegressor(n_estimators=200, min_samples_leaf=2, random_state=42)
-    else:
-        est = DummyRegressor(strategy="median")
+def design_matrix(kind, Xt):
+    """HistGradientBoosting n'accepte pas de matrice creuse."""
+    return to_dense(Xt) if kind == "hgb" else Xt
 
+def assemble(kind, pre, est, X):
+    """Pipeline de prédiction (entrée: DataFrame de features) autour d'un estimateur
+    ajusté sur la matrice du feature store. hgb: préprocesseur dense ré-ajusté sur
+    les mêmes lignes (mêmes moyennes/catégories que `pre`)."""
+    if kind == "hgb":
+        pre = build_preprocessor(dense=True).fit(X)
     return Pipeline([("pre", pre), ("est", est)])
 
-def main():
-    df, X, y = load_data()
-    n = len(df)
+def _cv_fit_seconds(res, n_splits):
+    """Temps cumulé des fits/scores dans les workers (≈ CPU consommé par le CV)."""
+    return float(np.sum((np.asarray(res["mean_fit_time"]) + np.asarray(res["mean_score_time"])) * n_splits))
 
-    MODELS_DIR.mkdir(parents=True, exist_ok=True)
-    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+def cross_validate_fixed(kind, X, y, cv, n_jobs):
+    """CV (folds en parallèle) d'un estimateur à paramètres fixes, puis fit sur tout X."""
+    t0 = time.perf_counter()
+    res = cross_validate(build_estimator(kind), X, y, cv=cv, scoring=SCORING, n_jobs=n_jobs)
+    model = build_estimator(kind).fit(X, y)
+    scores = -res["test_score"]
+    summary = {"cv_rmse": float(scores.mean()), "cv_rmse_std": float(scores.std()), "params": {},
+               "wall_seconds": time.perf_counter() - t0,
+               "fit_seconds": float(np.sum(res["fit_time"] + res["score_time"]))}
+    return model, summary, []
 
-    metrics = {}
+def halving_search(kind, X, y, cv, n_jobs):
+    """Successive halving sur SEARCH_SPACES[kind]; renvoie le meilleur estimateur (refit
+    sur tout X), son résumé et les métriques de chaque candidat à chaque tour."""
+    space = SEARCH_SPACES[kind]
+    t0 = time.perf_counter()
+    search = HalvingGridSearchCV(
+        build_estimator(kind), space["grid"], factor=3, resource=space["resource"],
+        min_resources=space["min_resources"], max_resources=space["max_resources"],
+        cv=cv, scoring=SCORING, n_jobs=n_jobs, random_state=42, refit=True,
+    )
+    search.fit(X, y)
+    r = search.cv_results_
+    candidates = [{
+        "iter": int(r["iter"][i]),
+        "n_resources": int(r["n_resources"][i]),
+        "params": r["params"][i],
+        "cv_rmse": float(-r["mean_test_score"][i]),
+        "cv_rmse_std": float(r["std_test_score"][i]),
+        "fit_seconds": float(r["mean_fit_time"][i] * cv.get_n_splits()),
+    } for i in range(len(r["params"]))]
+    summary = {"cv_rmse": float(-search.best_score_),
+               "cv_rmse_std": float(r["std_test_score"][search.best_index_]),
+               "params": search.best_params_,
+               "n_candidates": int(search.n_candidates_[0]), "n_iterations": int(search.n_iterations_),
+               "wall_seconds": time.perf_counter() - t0,
+               "fit_seconds": _cv_fit_seconds(r, cv.get_n_splits())}
+    return search.best_estimator_, summary, candidates
+
+# état de l'entraînement incrémental: lignes vues, holdout, RMSE de référence
+STATE_PATH = MODELS_DIR / "train_state.joblib"
+MODEL_PATH = MODELS_DIR / "price_model.joblib"
+HOLDOUT_MOD = 5  # ~20% des nouvelles lignes (clé % 5 == 0) rejoignent le holdout
+
+def row_keys(X, y):
+    """Hash de chaque ligne (features + prix): identifie les annonces déjà vues."""
+    return pd.util.hash_pandas_object(X.assign(price_shekels=y.to_numpy()), index=False).to_numpy()
+
+def linear_stats(pre, X, y):
+    """Statistiques suffisantes des moindres carrés sur les features transformées:
+    cumulables, elles donnent la même régression qu'un fit sur toutes les lignes."""
+    Xt = pre.transform(X)
+    yv = np.asarray(y, dtype=float)
+    return {"n": len(yv), "sx": np.asarray(Xt.sum(axis=0)).ravel(), "sy": float(yv.sum()),
+            "sxx": np.asarray((Xt.T @ Xt).todense() if hasattr(Xt, "todense") else Xt.T @ Xt),
+            "sxy": np.asarray(Xt.T @ yv).ravel()}
+
+def solve_linear(stats):
+    """Comme LinearRegression (données centrées, solution de norme minimale)."""
+    n = stats["n"]
+    xm, ym = stats["sx"] / n, stats["sy"] / n
+    a = stats["sxx"] - n * np.outer(xm, xm)
+    b = stats["sxy"] - n * xm * ym
+    coef = np.linalg.pinv(a, rcond=1e-10, hermitian=True) @ b
+    return coef, float(ym - xm @ coef)
+
+def train_full(fs, args, timing):
+    """Sélection complète (CV + halving) sur la matrice transformée du feature store
+    `fs`; renvoie (nom, pipeline, métriques, masque test).
+
+    Le préprocesseur du store est ajusté sur toutes les lignes, test compris: sans
+    effet sur les modèles (arbres et régression linéaire sont invariants au
+    centrage/échelle; une ville absente du train a une indicatrice nulle partout,
+    comme handle_unknown="ignore")."""
+    X, y = fs.X, fs.y
+    n = len(X)
+    metrics = {"models": {}}
+    test_mask = np.zeros(n, dtype=bool)
 
     if n < 10:
         # Jeu très petit: entraîne un modèle baseline (médiane) sur tout
@@ -77,30 +167,199 @@ def main():
         base = build_pipeline("base")
         base.fit(X, y)
         pred = base.predict(X)
-        metrics["baseline"] = {"rmse": rmse(y, pred), "r2": float(r2_score(y, pred)) if n > 1 else 0.0}
-        best = ("baseline", base)
-    else:
-        # Split robuste: garantit au moins 1 échantillon test
-        test_size = 0.2 if n >= 50 else max(0.1, min(0.2, 1.0 / max(n,1)))
-        X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=test_size, random_state=42)
+        metrics["models"]["baseline"] = {"rmse": rmse(y, pred), "r2": float(r2_score(y, pred)) if n > 1 else 0.0}
+        return "baseline", base, metrics, test_mask
+
+    # Split robuste: garantit au moins 1 échantillon test
+    test_size = 0.2 if n >= 50 else max(0.1, min(0.2, 1.0 / max(n,1)))
+    # split sur les positions: même partition qu'un split du DataFrame
+    tr, te = train_test_split(np.arange(n), test_size=test_size, random_state=42)
+    test_mask[te] = True
+    y_tr, y_te = y.iloc[tr], y.iloc[te]
+    # sélection sur le CV du train (plus stable qu'un seul split), test = contrôle final
+    folds = max(2, min(args.cv, len(tr) // 5))
+    cv = KFold(n_splits=folds, shuffle=True, random_state=42)
+    timing["cv_folds"] = folds
+
+    search = not args.no_search and len(tr) >= SEARCH_MIN_ROWS
+    if not args.no_search and not search:
+        print(f"ℹ️ {len(tr)} lignes d'entraînement < {SEARCH_MIN_ROWS}: paramètres fixes, sans halving")
+    timing["search"] = search
+    models, metrics["search"] = {}, {}
+    for kind in ["lr", "rf", "hgb"] if search else ["lr", "rf"]:
+        name = MODEL_NAMES[kind]
+        with perf.step(f"select_{name}", rows=len(tr)):
+            Xt = design_matrix(kind, fs.Xt)
+            X_tr, X_te = Xt[tr], Xt[te]
+            if kind in SEARCH_SPACES and search:
+                est, summary, candidates = halving_search(kind, X_tr, y_tr, cv, args.n_jobs)
+                metrics["search"][name] = candidates
+            else:
+                est, summary, _ = cross_validate_fixed(kind, X_tr, y_tr, cv, args.n_jobs)
+            pred = est.predict(X_te)
+        metrics["models"][name] = {"rmse": rmse(y_te, pred), "r2": float(r2_score(y_te, pred)), **summary}
+        timing["fit_seconds"] += summary["fit_seconds"]
+        models[name] = assemble(kind, fs.pre, est, X)
+        print(f"  {name:<18} cv_rmse {summary['cv_rmse']:>12,.0f} | test rmse "
+              f"{metrics['models'][name]['rmse']:>12,.0f} | {summary['wall_seconds']:.1f}s")
 
-        lr = build_pipeline("lr")
-        rf = build_pipeline("rf")
+    best_name = min(models, key=lambda k: metrics["models"][k]["cv_rmse"])
+    return best_name, models[best_name], metrics, test_mask
 
-        lr.fit(X_tr, y_tr); p_lr = lr.predict(X_te)
-        rf.fit(X_tr, y_tr); p_rf = rf.predict(X_te)
+def new_state(name, model, X, y, keys, test_mask, baseline_rmse):
+    """État après un entraînement complet: toutes les lignes sont vues, le split test
+    devient le holdout qui sert à mesurer la dérive des mises à jour."""
+    state = {"best": name, "seen": np.unique(keys), "holdout": np.unique(keys[test_mask]),
+             "baseline_rmse": baseline_rmse, "n_train": int((~test_mask).sum())}
+    est = model.named_steps["est"]
+    if isinstance(est, RandomForestRegressor):
+        state["n_trees_full"] = est.n_estimators
+    elif isinstance(est, LinearRegression):
+        pre = model.named_steps["pre"]
+        state["linear_stats"] = linear_stats(pre, X[~test_mask], y[~test_mask])
+    return state
 
-        metrics["linear_regression"] = {"rmse": rmse(y_te, p_lr), "r2": float(r2_score(y_te, p_lr))}
-        metrics["random_forest"] = {"rmse": rmse(y_te, p_rf), "r2": float(r2_score(y_te, p_rf))}
+def train_incremental(X, y, keys, args):
+    """Met à jour le modèle sauvegardé avec les seules lignes jamais vues.
 
-        best_name = min(metrics, key=lambda k: metrics[k]["rmse"])
-        best = (best_name, lr if best_name == "linear_regression" else rf)
+    - forêt: warm_start, quelques arbres de plus entraînés sur les nouvelles lignes
+      (nombre proportionnel à leur part des données)
+    - régression linéaire: statistiques suffisantes cumulées puis résolution (exact)
+    Le préprocessing reste celui du dernier entraînement complet. Renvoie
+    (modèle, état, rapport), ou (None, None, raison) s'il faut tout ré-entraîner."""
+    if not STATE_PATH.exists() or not MODEL_PATH.exists():
+        return None, None, "pas d'état d'entraînement"
+    state, model = joblib.load(STATE_PATH), joblib.load(MODEL_PATH)
+    pre, est = model.named_steps["pre"], model.named_steps["est"]
+    if not isinstance(est, (RandomForestRegressor, LinearRegression)):
+        return None, None, f"{type(est).__name__}: pas de mise à jour incrémentale"
+
+    new = ~np.isin(keys, state["seen"])
+    report = {"n_rows": len(keys), "n_new": int(new.sum())}
+    if not new.any():
+        return model, state, {**report, "trees_added": 0}
+    cities = set(pre.named_transformers_["cat"].categories_[0])
+    unseen = set(X.loc[new, "city"]) - cities
+    if unseen:
+        return None, None, f"{len(unseen)} nouvelle(s) ville(s) hors de l'encodage"
+
+    hold_new = new & (keys % HOLDOUT_MOD == 0)
+    train_new = new & ~hold_new
+    report.update(n_train_new=int(train_new.sum()), n_holdout_new=int(hold_new.sum()), trees_added=0)
+
+    if train_new.any() and isinstance(est, RandomForestRegressor):
+        k = max(1, int(np.ceil(state["n_trees_full"] * train_new.sum() / state["n_train"])))
+        if est.n_estimators + k > args.max_trees:
+            return None, None, f"forêt > {args.max_trees} arbres"
+        est.set_params(warm_start=True, n_estimators=est.n_estimators + k)
+        est.fit(pre.transform(X[train_new]), y[train_new])
+        est.set_params(warm_start=False)
+        report["trees_added"] = k
+    elif train_new.any():
+        stats = state["linear_stats"]
+        for key, v in linear_stats(pre, X[train_new], y[train_new]).items():
+            stats[key] = stats[key] + v
+        est.coef_, est.intercept_ = solve_linear(stats)
+
+    # dérive: RMSE sur le holdout (ancien + nouvelles lignes réservées) vs référence
+    hold = np.isin(keys, state["holdout"]) | hold_new
+    holdout_rmse = rmse(y[hold], model.predict(X[hold]))
+    drift = holdout_rmse / state["baseline_rmse"] - 1
+    report.update(holdout_rows=int(hold.sum()), holdout_rmse=holdout_rmse,
+                  baseline_rmse=state["baseline_rmse"], drift=drift)
+    if drift > args.drift:
+        return None, None, f"dérive du RMSE holdout {drift:+.1%} > {args.drift:.0%}"
+
+    state["seen"] = np.union1d(state["seen"], keys[new])
+    state["holdout"] = np.union1d(state["holdout"], keys[hold_new])
+    state["n_train"] += int(train_new.sum())
+    return model, state, report
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Entraîne et sélectionne le modèle de prix")
+    ap.add_argument("--cv", type=int, default=5, help="nombre de folds du K-fold")
+    ap.add_argument("--n-jobs", type=int, default=-1, help="workers (-1 = tous les cœurs)")
+    ap.add_argument("--no-search", action="store_true",
+                    help="seulement LR + RF(200 arbres) à paramètres fixes, sans halving "
+                         f"(toujours le cas sous {SEARCH_MIN_ROWS} lignes d'entraînement)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="met à jour le modèle avec les nouvelles lignes seulement (repli: entraînement complet)")
+    ap.add_argument("--drift", type=float, default=0.15,
+                    help="hausse relative max du RMSE holdout avant un ré-entraînement complet")
+    ap.add_argument("--max-trees", type=int, default=600, help="taille max de la forêt en incrémental")
+    ap.add_argument("--refresh-features", action="store_true",
+                    help="recalcule les features même si le cache est à jour")
+    perf.add_profile_arg(ap)
+    return ap.parse_args(argv)
+
+def run(args, fs=None):
+    """Entraînement complet ou incrémental; `fs`: FeatureSet déjà chargé (pipeline.py),
+    sinon lu depuis le feature store. Renvoie les métriques écrites."""
+    t_wall, t_cpu = time.perf_counter(), time.process_time()
+    t0 = time.perf_counter()
+    with perf.step("features") as st:
+        if fs is None:
+            fs = load_features(refresh=args.refresh_features)
+        st["rows"] = len(fs.y)
+    X, y, fill = fs.X, fs.y, fs.fill
+    keys = row_keys(X, y)
+    perf.note(rows_in=len(y), features_cached=fs.from_cache)
+
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    timing = {"n_jobs": args.n_jobs, "cores": os.cpu_count(), "fit_seconds": 0.0,
+              "features_seconds": time.perf_counter() - t0, "features_cached": fs.from_cache,
+              "features_key": fs.key}
+    model = None
+    if args.incremental:
+        with perf.step("incremental"):
+            model, state, report = train_incremental(X, y, keys, args)
+        if model is None:
+            print(f"↻ Ré-entraînement complet: {report}")
+            fallback = report
+        else:
+            print(f"+ Incrémental: {report['n_new']} nouvelles lignes, {report['trees_added']} arbres ajoutés")
+            path = REPORTS_DIR / "training_metrics.json"
+            metrics = json.loads(path.read_text()) if path.exists() else {}
+            metrics["incremental"] = report
+            name = state["best"]
+
+    if model is None:
+        name, model, metrics, test_mask = train_full(fs, args, timing)
+        state = None
+        if test_mask.any():
+            state = new_state(name, model, X, y, keys, test_mask, metrics["models"][name]["rmse"])
+        if args.incremental:
+            metrics["incremental"] = {"fallback": fallback}
+
+    timing["wall_seconds"] = time.perf_counter() - t_wall
+    # temps CPU du processus principal; le CV tourne dans des workers -> fit_seconds
+    timing["cpu_seconds"] = time.process_time() - t_cpu
+    metrics["best"] = name
+    metrics["timing"] = timing
 
     # Sauvegardes
-    name, model = best
-    joblib.dump(model, MODELS_DIR / "price_model.joblib")
-    (REPORTS_DIR / "training_metrics.json").write_text(json.dumps(metrics, indent=2, ensure_ascii=False))
-    print(f"✅ Training done. Best: {name}. Model saved to {MODELS_DIR/'price_model.joblib'}")
+    with perf.step("save"):
+        joblib.dump(model, MODEL_PATH)
+        FEATURE_DEFAULTS_PATH.write_text(json.dumps(fill, indent=2))
+        if state is not None:
+            joblib.dump(state, STATE_PATH)
+        else:
+            STATE_PATH.unlink(missing_ok=True)
+        # format tableaux (mmap) pour le dashboard; sinon il recharge le joblib
+        if export_model(model):
+            print(f"Export tableaux → {ARRAYS_DIR}")
+        (REPORTS_DIR / "training_metrics.json").write_text(
+            json.dumps(metrics, indent=2, ensure_ascii=False, default=str))
+    perf.note(best=name, bytes_out=perf.size_of(MODEL_PATH) + perf.size_of(ARRAYS_DIR))
+    print(f"✅ Training done. Best: {name}. Model saved to {MODEL_PATH}")
+    return metrics
+
+def main():
+    args = parse_args()
+    with perf.stage("train", profile=args.profile, incremental=args.incremental):
+        run(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,213 @@
+# src/model_export.py
+"""Export du pipeline entraîné vers un format tableaux (.npy) chargé en mmap.
+
+Le pipeline sklearn (StandardScaler + OneHotEncoder + forêt / régression linéaire)
+est aplati en tableaux NumPy contigus, préprocessing replié dedans:
+
+- forêt: tous les arbres dans une seule table de nœuds (feature, threshold,
+  children, value); seuils des variables numériques ramenés dans l'espace brut
+  (x_scaled <= t  <=>  x <= r, r calculé exactement, voir _fold_thresholds); les
+  splits one-hot "city_c <= 0.5" restent tels quels sur des indicatrices de ville
+- linéaire: coefficients divisés par scale, intercept corrigé, une table de
+  coefficients par code de ville
+
+Chargement: np.load(mmap_mode="r") -> pas de désérialisation, et les pages du
+fichier sont partagées (page cache) entre processus/workers Streamlit.
+Ce module n'importe pas sklearn (sauf main(), qui dépickle le joblib).
+
+ml_train.py exporte après chaque entraînement; pour un price_model.joblib existant
+(image Docker, modèle versionné):
+
+    python src/model_export.py
+"""
+import argparse
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import MODELS_DIR
+
+MODEL_PATH = MODELS_DIR / "price_model.joblib"
+ARRAYS_DIR = MODELS_DIR / "price_model_arrays"
+NUMERIC = ["rooms", "area_sqm", "floor"]
+CATEGORICAL = "city"
+FOREST_ARRAYS = ["feature", "threshold", "children", "value", "roots"]
+LINEAR_ARRAYS = ["coef", "city_coef"]
+
+def _preprocessing(pipe):
+    """(mean, scale) des numériques et catégories de ville du ColumnTransformer."""
+    pre = pipe.named_steps["pre"]
+    scaler = pre.named_transformers_["num"]
+    onehot = pre.named_transformers_["cat"]
+    cats = [str(c) for c in onehot.categories_[0]]
+    return scaler.mean_, scaler.scale_, cats
+
+def _fold_thresholds(t, mean, scale):
+    """Plus grand x brut (float64) tel que float32((x - mean) / scale) <= t, le test
+    que fait l'arbre sklearn après le StandardScaler (les arbres travaillent en float32).
+    t * scale + mean seul peut tomber du mauvais côté d'un arrondi; on part de là et
+    on resserre par dichotomie jusqu'à deux doubles adjacents."""
+    def ok(x):
+        return np.float32((x - mean) / scale) <= t
+
+    r = t * scale + mean
+    d = (np.abs(t) + 1) * scale * 1e-5
+    lo, hi = r - d, r + d
+    while not (ok(lo).all() and not ok(hi).any()):
+        d *= 2
+        lo, hi = np.where(ok(lo), lo, r - d), np.where(ok(hi), r + d, hi)
+    for _ in range(80):
+        mid = lo + (hi - lo) / 2
+        m = ok(mid)
+        lo, hi = np.where(m, mid, lo), np.where(m, hi, mid)
+    return lo
+
+def _forest_arrays(forest, mean, scale, n_num):
+    """Table de nœuds unique; feature = indice dans [rooms, area_sqm, floor, one-hot ville]
+    (-1 pour une feuille), toujours le test x <= threshold; children[i] = (gauche, droite)."""
+    feats, thrs, children, values, roots = [], [], [], [], []
+    offset, max_depth = 0, 0
+    for est in forest.estimators_:
+        t = est.tree_
+        leaf = t.children_left == -1
+        f = t.feature.astype(np.int64)
+        thr = t.threshold.astype(np.float64)
+
+        num = ~leaf & (f < n_num)
+        thr[num] = _fold_thresholds(thr[num], mean[f[num]], scale[f[num]])
+        f[leaf], thr[leaf] = -1, 0.0
+
+        roots.append(offset)
+        feats.append(f.astype(np.int32))
+        thrs.append(thr)
+        children.append(np.where(leaf[:, None], 0, np.c_[t.children_left, t.children_right] + offset))
+        values.append(t.value[:, 0, 0].astype(np.float64))
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+    arrays = {
+        "feature": np.concatenate(feats), "threshold": np.concatenate(thrs),
+        "children": np.concatenate(children).astype(np.int32),
+        "value": np.concatenate(values), "roots": np.asarray(roots, dtype=np.int32),
+    }
+    return arrays, max_depth
+
+def export_model(pipe, out_dir=ARRAYS_DIR):
+    """Écrit le modèle en tableaux dans `out_dir`; renvoie False (et supprime un export
+    précédent, devenu périmé) si le type d'estimateur n'est pas pris en charge."""
+    out_dir = Path(out_dir)
+    est = pipe.named_steps["est"]
+    name = type(est).__name__
+    if name not in ("RandomForestRegressor", "LinearRegression"):
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return False
+
+    mean, scale, cats = _preprocessing(pipe)
+    n_num = len(NUMERIC)
+    meta = {"numeric": NUMERIC, "categorical": CATEGORICAL, "categories": cats, "estimator": name}
+    if name == "RandomForestRegressor":
+        arrays, max_depth = _forest_arrays(est, mean, scale, n_num)
+        meta.update(kind="forest", n_trees=len(est.estimators_), max_depth=int(max_depth))
+    else:
+        coef = np.asarray(est.coef_, dtype=np.float64).ravel()
+        w = coef[:n_num] / scale
+        arrays = {"coef": np.append(w, float(est.intercept_) - float(np.dot(w, mean))),
+                  "city_coef": coef[n_num:]}
+        meta.update(kind="linear")
+
+    # écrit à côté puis remplace: un lecteur ne voit jamais un export à moitié écrit
+    tmp = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for key, arr in arrays.items():
+        np.save(tmp / f"{key}.npy", np.ascontiguousarray(arr))
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2))
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tmp.rename(out_dir)
+    return True
+
+class ArrayModel:
+    """Prédiction sur les tableaux exportés; même interface que le pipeline:
+    predict(DataFrame[rooms, area_sqm, floor, city]) -> ndarray."""
+
+    def __init__(self, path=ARRAYS_DIR, mmap=True):
+        path = Path(path)
+        self.meta = json.loads((path / "meta.json").read_text())
+        names = FOREST_ARRAYS if self.meta["kind"] == "forest" else LINEAR_ARRAYS
+        # np.asarray: vue ndarray sur le mmap (évite le coût de la sous-classe memmap)
+        self.arrays = {k: np.asarray(np.load(path / f"{k}.npy", mmap_mode="r" if mmap else None))
+                       for k in names}
+        self.city_codes = {c: i for i, c in enumerate(self.meta["categories"])}
+
+    def city_codes_of(self, X: pd.DataFrame) -> np.ndarray:
+        """Code de ville; inconnue -> -1 (aucune indicatrice, comme handle_unknown="ignore")."""
+        return X[CATEGORICAL].astype(str).map(self.city_codes).fillna(-1).to_numpy(dtype=np.int64)
+
+    def predict(self, X: pd.DataFrame, chunk_rows=2048) -> np.ndarray:
+        num = X[NUMERIC].to_numpy(dtype=np.float64)
+        codes = self.city_codes_of(X)
+        if self.meta["kind"] == "linear":
+            a = self.arrays
+            city = np.where(codes >= 0, a["city_coef"][np.maximum(codes, 0)], 0.0)
+            return num @ a["coef"][:-1] + a["coef"][-1] + city
+        if not len(X):
+            return np.empty(0)
+        return np.concatenate([self._predict_forest(num[i:i + chunk_rows], codes[i:i + chunk_rows])
+                               for i in range(0, len(X), chunk_rows)])
+
+    def _predict_forest(self, num, codes):
+        """Descente simultanée de toutes les paires (ligne, arbre), un niveau par tour;
+        les paires arrivées à une feuille sont sommées puis retirées."""
+        a = self.arrays
+        feature, threshold, value = a["feature"], a["threshold"], a["value"]
+        children = a["children"].reshape(-1)
+        n, n_num, k = len(num), len(NUMERIC), len(self.meta["categories"])
+        width = n_num + k
+        x = np.zeros((n, width))
+        x[:, :n_num] = num
+        known = codes >= 0
+        x[np.flatnonzero(known), n_num + codes[known]] = 1.0
+        x = x.ravel()
+
+        t = len(a["roots"])
+        nd = np.tile(a["roots"], n)
+        rows = np.repeat(np.arange(n), t)
+        acc = np.zeros(n)
+        while len(nd):
+            f = feature[nd]
+            leaf = f < 0
+            if leaf.any():
+                acc += np.bincount(rows[leaf], weights=value[nd[leaf]], minlength=n)
+                keep = ~leaf
+                nd, rows, f = nd[keep], rows[keep], f[keep]
+            go_right = x[rows * width + f] > threshold[nd]
+            nd = children[2 * nd + go_right]
+        return acc / t
+
+def load_array_model(path=ARRAYS_DIR, source=MODEL_PATH):
+    """ArrayModel si un export existe et n'est pas plus ancien que le pickle `source`
+    (modèle ré-entraîné/remplacé sans export), sinon None."""
+    meta = Path(path) / "meta.json"
+    if not meta.exists():
+        return None
+    if Path(source).exists() and Path(source).stat().st_mtime > meta.stat().st_mtime:
+        return None
+    return ArrayModel(path)
+
+def main():
+    ap = argparse.ArgumentParser(description="Exporte price_model.joblib en tableaux mmap")
+    ap.add_argument("--model", default=str(MODEL_PATH))
+    ap.add_argument("--out", default=str(ARRAYS_DIR))
+    args = ap.parse_args()
+
+    import joblib
+    pipe = joblib.load(args.model)
+    if export_model(pipe, args.out):
+        print(f"✅ Export tableaux → {args.out}")
+    else:  # pas une erreur: le dashboard garde le joblib
+        print(f"⚠️ {type(pipe.named_steps['est']).__name__} non exportable, {args.out} supprimé")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# src/perf.py
+"""Instrumentation commune des étapes (clean, train, stats, load_db, pipeline).
+
+    with perf.stage("clean", profile=args.profile):
+        with perf.step("parse") as s:
+            df = parse(...)
+            s["rows"] = len(df)
+        perf.note(rows_out=len(df), bytes_out=perf.size_of(path))
+
+Chaque étape ajoute un enregistrement à l'historique reports/perf.json: temps mur et
+CPU, lignes/s, pic RSS, tailles d'entrée/sortie, et les mêmes mesures par sous-étape
+(une sous-étape répétée, ex. un chunk, est cumulée). perf.step() hors d'une étape ne
+fait rien: les fonctions de librairie peuvent s'instrumenter sans condition.
+
+Pic RSS (Linux): VmHWM remis à zéro au début de chaque (sous-)étape via
+/proc/self/clear_refs; il est propre au processus, donc approximatif quand le
+pipeline fait tourner plusieurs étapes en parallèle.
+
+--profile: cProfile (thread de l'étape) + tracemalloc écrits dans reports/profile/
+(<étape>-<date>.prof pour snakeviz/pstats, .txt: top fonctions et allocations).
+
+    python src/perf.py --last 10            # dernières mesures, écart à la médiane
+    python src/perf.py --path reports/bench.json   # historique des benchmarks
+"""
+import argparse
+import contextvars
+import cProfile
+import io
+import json
+import pstats
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import REPORTS_DIR
+
+PERF_PATH = REPORTS_DIR / "perf.json"
+PROFILE_DIR = REPORTS_DIR / "profile"
+HISTORY = 500  # enregistrements gardés dans perf.json
+
+_current = contextvars.ContextVar("perf_stage", default=None)
+_write_lock = threading.Lock()
+# tracemalloc est global au processus: démarré par la première étape profilée,
+# arrêté par la dernière (étapes en parallèle du pipeline)
+_trace_lock = threading.Lock()
+_trace_users = 0
+
+def _status_mb(key):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def _reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def peak_rss_mb():
+    """Pic RSS depuis le dernier _reset_peak (repli: pic du processus, ru_maxrss)."""
+    hwm = _status_mb("VmHWM")
+    return hwm if hwm is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def size_of(path) -> int:
+    """Taille en octets d'un fichier ou d'un dossier (0 s'il n'existe pas)."""
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+def add_profile_arg(ap):
+    ap.add_argument("--profile", action="store_true",
+                    help="cProfile + tracemalloc de l'étape → reports/profile/")
+
+class _Frame:
+    """Mesure en cours (étape ou sous-étape); les pics RSS remontent au parent."""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.peak = 0.0
+        if parent is not None:  # le pic du parent jusqu'ici serait perdu par le reset
+            parent.peak = max(parent.peak, peak_rss_mb() or 0.0)
+        _reset_peak()
+        self.t0, self.c0 = time.perf_counter(), time.process_time()
+
+    def close(self):
+        self.peak = max(self.peak, peak_rss_mb() or 0.0)
+        if self.parent is not None:
+            self.parent.peak = max(self.parent.peak, self.peak)
+        return time.perf_counter() - self.t0, time.process_time() - self.c0
+
+@contextmanager
+def step(name, rows=None):
+    """Sous-étape de l'étape courante; le dict renvoyé accepte "rows"."""
+    rec = _current.get()
+    out = {"rows": rows}
+    if rec is None:
+        yield out
+        return
+    frame = _Frame(rec["_frames"][-1])
+    rec["_frames"].append(frame)
+    try:
+        yield out
+    finally:
+        rec["_frames"].pop()
+        wall, _ = frame.close()
+        s = rec["steps"].setdefault(name, {"calls": 0, "wall_seconds": 0.0, "rows": None, "peak_rss_mb": 0.0})
+        s["calls"] += 1
+        s["wall_seconds"] += wall
+        s["peak_rss_mb"] = round(max(s["peak_rss_mb"], frame.peak), 1)
+        if out["rows"] is not None:
+            s["rows"] = (s["rows"] or 0) + int(out["rows"])
+
+def note(**fields):
+    """Complète l'étape courante: rows_in, rows_out, bytes_in, bytes_out ou autre métadonnée."""
+    rec = _current.get()
+    if rec is not None:
+        rec.update(fields)
+
+def _finish_steps(steps):
+    out = []
+    for name, s in steps.items():
+        s = {"name": name, **s, "wall_seconds": round(s["wall_seconds"], 4)}
+        if s["rows"] and s["wall_seconds"]:
+            s["rows_per_sec"] = round(s["rows"] / s["wall_seconds"], 1)
+        out.append(s)
+    return out
+
+def _dump_profile(name, prof, snapshot, traced_peak):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    base = PROFILE_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+    prof.dump_stats(base.with_suffix(".prof"))
+    buf = io.StringIO()
+    pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(40)
+    buf.write(f"\n=== tracemalloc: pic {traced_peak / 2**20:.1f} MB, top 25 allocations (ligne) ===\n")
+    for st in snapshot.statistics("lineno")[:25]:
+        buf.write(f"{st}\n")
+    base.with_suffix(".txt").write_text(buf.getvalue())
+    return str(base.with_suffix(".prof"))
+
+def _start_tracing():
+    global _trace_users
+    with _trace_lock:
+        if _trace_users == 0:
+            tracemalloc.start()
+        _trace_users += 1
+
+def _stop_tracing():
+    """(snapshot, pic tracé) puis arrêt de tracemalloc si plus aucune étape profilée."""
+    global _trace_users
+    with _trace_lock:
+        try:
+            return tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[1]
+        finally:
+            _trace_users -= 1
+            if _trace_users == 0:
+                tracemalloc.stop()
+
+def append_history(rec, path=PERF_PATH):
+    path = Path(path)
+    with _write_lock:
+        try:
+            runs = json.loads(path.read_text())["runs"]
+        except (OSError, ValueError, KeyError):
+            runs = []
+        runs = (runs + [rec])[-HISTORY:]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"runs": runs}, indent=1, ensure_ascii=False, default=str))
+        tmp.replace(path)
+
+@contextmanager
+def stage(name, profile=False, path=PERF_PATH, **meta):
+    """Mesure une étape complète et l'ajoute à l'historique, même si elle échoue."""
+    rec = {"stage": name, "started": time.strftime("%Y-%m-%d %H:%M:%S"), "status": "ok",
+           "steps": {}, **meta}
+    rec["_frames"] = [_Frame()]
+    token = _current.set(rec)
+    prof = None
+    if profile:
+        _start_tracing()
+        prof = cProfile.Profile()
+        prof.enable()
+    try:
+        yield rec
+    except BaseException:
+        rec["status"] = "failed"
+        raise
+    finally:
+        if prof is not None:
+            prof.disable()
+            # le profil ne doit jamais faire échouer une étape réussie
+            try:
+                rec["profile"] = _dump_profile(name, prof, *_stop_tracing())
+            except Exception as e:
+                rec["profile_error"] = repr(e)
+                print(f"⚠️ Profil de {name} non écrit: {e!r}")
+        _current.reset(token)
+        frame = rec.pop("_frames")[0]
+        wall, cpu = frame.close()
+        rec.update(wall_seconds=round(wall, 4), cpu_seconds=round(cpu, 4),
+                   peak_rss_mb=round(frame.peak, 1), steps=_finish_steps(rec["steps"]))
+        rows = rec.get("rows_in") or rec.get("rows_out")
+        if rows and wall:
+            rec["rows_per_sec"] = round(rows / wall, 1)
+        append_history(rec, path)
+
+# ===================== Lecture de l'historique =====================
+# métadonnées qui changent la nature du travail: on ne compare qu'à variante égale
+# (size, trees, fit_rows, models: options des benchmarks synthétiques, benchmarks/run_suite.py)
+VARIANT_KEYS = ("mode", "incremental", "pipeline", "size", "trees", "fit_rows", "models")
+
+def _variant(r):
+    return (r["stage"],) + tuple(r.get(k) for k in VARIANT_KEYS)
+
+def load_history(path=PERF_PATH):
+    try:
+        return json.loads(Path(path).read_text())["runs"]
+    except (OSError, ValueError, KeyError):
+        raise SystemExit(f"Pas d'historique dans {path}")
+
+def print_runs(runs, last=10):
+    """Les `last` derniers enregistrements de `runs`, avec l'écart au temps médian des
+    passages précédents de la même étape (même variante)."""
+    for i, r in enumerate(runs[-last:], start=max(0, len(runs) - last)):
+        prev = sorted(p["wall_seconds"] for p in runs[:i] if _variant(p) == _variant(r) and p["status"] == "ok")
+        delta = ""
+        if prev:
+            med = prev[len(prev) // 2]
+            delta = f" ({(r['wall_seconds'] / med - 1):+.0%} vs médiane)" if med else ""
+        rate = f"{r['rows_per_sec']:>12,.0f} rows/s" if r.get("rows_per_sec") else " " * 19
+        size = f" n={r['size']:,}" if r.get("size") else ""
+        print(f"{r['started']} {r['stage']:<9} {r['status']:<6} {r['wall_seconds']:8.2f}s{delta:<18} "
+              f"{rate} | peak {r['peak_rss_mb']:7.1f} MB{size}")
+        for s in r["steps"]:
+            srate = f" {s['rows_per_sec']:>12,.0f} rows/s" if s.get("rows_per_sec") else ""
+            calls = f" x{s['calls']}" if s["calls"] > 1 else ""
+            print(f"    {s['name']:<24}{calls:<6} {s['wall_seconds']:8.2f}s{srate} | peak {s['peak_rss_mb']:7.1f} MB")
+
+def main():
+    ap = argparse.ArgumentParser(description="Dernières mesures de reports/perf.json")
+    ap.add_argument("--last", type=int, default=10)
+    ap.add_argument("--stage", default=None)
+    ap.add_argument("--path", default=str(PERF_PATH),
+                    help="historique à lire (reports/bench.json: benchmarks/run_suite.py)")
+    args = ap.parse_args()
+
+    runs = load_history(args.path)
+    if args.stage:
+        runs = [r for r in runs if r["stage"] == args.stage]
+    print_runs(runs, args.last)
+
+if __name__ == "__main__":
+    main()
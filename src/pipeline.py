@@ -0,0 +1,262 @@
+# src/pipeline.py
+"""Chaîne complète scrape -> clean -> {features -> {train, stats}, load_db, summary} en un processus.
+
+Chaque étape déclare ses entrées (fichiers de données + son code) et ses sorties.
+Avant de lancer une étape on hashe le contenu de ses entrées: si le hash est celui
+du dernier passage réussi (data/processed/.pipeline_state.json) et que ses sorties
+existent, l'étape est sautée. Les étapes dont les dépendances sont prêtes tournent
+en parallèle (threads: stats, chargement Postgres et entraînement après features),
+et se passent leurs résultats en mémoire: annonces nettoyées -> load_db,
+FeatureSet -> train et stats. Une étape sautée dont le résultat est demandé est
+rechargée depuis le disque (dataset Parquet, cache du feature store).
+
+    python src/pipeline.py                 # clean (si le brut existe) + tout le reste
+    python src/pipeline.py --scrape --pages 3
+    python src/pipeline.py --force train   # relance train même si rien n'a changé
+    python src/pipeline.py --dry-run       # affiche ce qui tournerait
+"""
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+import perf
+from config import DATA_PARQUET, DATA_PROCESSED, DATA_RAW, DATABASE_URL, GAZETTEER, MODELS_DIR, REPORTS_DIR
+
+SRC = Path(__file__).resolve().parent
+DASHBOARD = SRC.parent / "dashboard"
+STATE_PATH = DATA_PROCESSED.parent / ".pipeline_state.json"
+CLEANED = [DATA_PARQUET, DATA_PROCESSED]
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable                      # run(ctx) -> résultat passé aux étapes suivantes
+    deps: list = field(default_factory=list)
+    inputs: list = field(default_factory=list)    # fichiers/dossiers hashés
+    outputs: list = field(default_factory=list)   # doivent exister pour sauter l'étape
+    params: dict = field(default_factory=dict)    # options qui changent le résultat
+    load: Optional[Callable] = None    # résultat depuis le disque si l'étape est sautée
+    disabled: Optional[Callable] = None  # -> raison de ne pas lancer l'étape, ou None
+    always: bool = False               # jamais "à jour" (scrape: la source change sans nous)
+
+def hash_paths(paths) -> str:
+    """Hash du contenu de fichiers / dossiers (récursif, chemins relatifs compris)."""
+    h = hashlib.sha1()
+    for path in map(Path, paths):
+        h.update(str(path).encode())
+        if not path.exists():
+            h.update(b"<missing>")
+            continue
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for p in files:
+            h.update(str(p.relative_to(path) if path.is_dir() else p.name).encode())
+            with open(p, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+    return h.hexdigest()
+
+def input_hash(stage: Stage) -> str:
+    return hashlib.sha1((hash_paths(stage.inputs)
+                         + json.dumps(stage.params, sort_keys=True, default=str)).encode()).hexdigest()
+
+def load_state(path=STATE_PATH) -> dict:
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=STATE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.replace(path)
+
+class Context:
+    """Résultats des étapes de ce passage; ceux des étapes sautées sont chargés à la demande."""
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def value(self, name):
+        with self._lock:
+            if name not in self.values:
+                load = self.stages[name].load
+                self.values[name] = load() if load else None
+            return self.values[name]
+
+def _measured(st, ctx, profile):
+    """Lance l'étape dans une mesure perf (reports/perf.json), dans son thread."""
+    with perf.stage(st.name, profile=profile, pipeline=True):
+        return st.run(ctx)
+
+def run_pipeline(stages, force=(), workers=3, state_path=STATE_PATH, dry_run=False, profile=()):
+    """Lance les étapes dans l'ordre du DAG; renvoie {étape: statut}.
+    `profile`: étapes à profiler (cProfile + tracemalloc), "all" = toutes."""
+    stages = {s.name: s for s in stages}
+    state = load_state(state_path)
+    ctx = Context(stages)
+    status, pending, running = {}, dict(stages), {}
+
+    def ready(st):
+        return all(status.get(d) in ("ran", "skipped", "disabled") for d in st.deps)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name, st in list(pending.items()):
+                if any(status.get(d) in ("failed", "blocked") for d in st.deps):
+                    status[name] = "blocked"
+                elif not ready(st):
+                    continue
+                elif st.disabled and (reason := st.disabled()):
+                    status[name] = "disabled"
+                    print(f"·  {name:<9} désactivée: {reason}")
+                else:
+                    h = input_hash(st)
+                    prev = state.get(name, {})
+                    if (not st.always and name not in force and "all" not in force and prev.get("inputs") == h
+                            and all(Path(p).exists() for p in st.outputs)):
+                        status[name] = "skipped"
+                        print(f"=  {name:<9} à jour (entrées inchangées depuis {prev.get('finished', '?')})")
+                    elif dry_run:
+                        status[name] = "ran"
+                        print(f"▶  {name:<9} tournerait")
+                    else:
+                        print(f"▶  {name:<9} ...")
+                        prof = name in profile or "all" in profile
+                        running[pool.submit(_measured, st, ctx, prof)] = (name, h, time.perf_counter())
+                        status[name] = "running"
+                del pending[name]
+
+            if not running:
+                if pending and not any(ready(st) for st in pending.values()):
+                    break
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name, h, t0 = running.pop(fut)
+                try:
+                    ctx.values[name] = fut.result()
+                except BaseException:  # SystemExit compris (clean sans brut, DB absente...)
+                    status[name] = "failed"
+                    print(f"✗  {name:<9} échec:\n{traceback.format_exc()}")
+                    continue
+                status[name] = "ran"
+                seconds = time.perf_counter() - t0
+                state[name] = {"inputs": h, "seconds": round(seconds, 2),
+                               "finished": time.strftime("%Y-%m-%d %H:%M:%S")}
+                save_state(state, state_path)
+                print(f"✓  {name:<9} {seconds:.1f}s")
+    return status
+
+# ===================== Étapes du projet =====================
+def build_stages(args):
+    """DAG du projet; imports à l'intérieur des étapes (Selenium, psycopg, sklearn ne
+    sont chargés que si l'étape tourne)."""
+    raw = Path(DATA_RAW)
+
+    def scrape(ctx):
+        import scrape_yad2
+        scrape_yad2.main(["--pages", str(args.pages), "--out", str(raw)]
+                         + (["--query", args.query] if args.query else []))
+
+    def clean(ctx):
+        import clean_listings
+        df = clean_listings.clean_frame(raw, incremental=True)
+        clean_listings.save(df)
+        return df
+
+    def load_cleaned():
+        from listings_store import read_listings
+        return read_listings()
+
+    def features(ctx):
+        from feature_store import load_features
+        fs = load_features()
+        perf.note(rows_out=len(fs.y), features_cached=fs.from_cache)
+        return fs
+
+    def train(ctx):
+        import ml_train
+        return ml_train.run(ml_train.parse_args([] if args.full_train else ["--incremental"]),
+                            fs=ctx.value("features"))
+
+    def stats(ctx):
+        import stats_modeling
+        return stats_modeling.run(stats_modeling.parse_args([]), df=ctx.value("features").frame)
+
+    def load_db(ctx):
+        import load_to_postgres
+        s = load_to_postgres.load(load_to_postgres.pg_dsn(DATABASE_URL), frame=ctx.value("clean"))
+        print(f"   {s['rows']} lignes: {s['inserted']} ajoutées, {s['updated']} mises à jour")
+        return s
+
+    def summary(ctx):
+        # KPIs de la première page du dashboard (dashboard/summary.py)
+        sys.path.insert(0, str(DASHBOARD))
+        import summary as dashboard_summary
+        ix = dashboard_summary.refresh_summary()
+        perf.note(rows_in=len(ix.df))
+
+    return [
+        Stage("scrape", scrape, outputs=[raw], params={"pages": args.pages, "query": args.query}, always=True,
+              disabled=lambda: None if args.scrape else "--scrape non demandé"),
+        Stage("clean", clean, deps=["scrape"], outputs=CLEANED, load=load_cleaned,
+              inputs=[raw, SRC / "clean_listings.py", SRC / "dedupe.py", SRC / "gazetteer.py", GAZETTEER,
+                      SRC / "listings_store.py"],
+              disabled=lambda: None if raw.exists() else f"{raw} absent, données nettoyées gardées"),
+        Stage("features", features, deps=["clean"], load=lambda: features(None),
+              inputs=CLEANED + [SRC / "feature_store.py", SRC / "listings_store.py"]),
+        Stage("train", train, deps=["features"],
+              inputs=CLEANED + [SRC / "feature_store.py", SRC / "ml_train.py", SRC / "model_export.py"],
+              outputs=[MODELS_DIR / "price_model.joblib", REPORTS_DIR / "training_metrics.json"],
+              params={"full_train": args.full_train}),
+        Stage("stats", stats, deps=["features"],
+              inputs=CLEANED + [SRC / "feature_store.py", SRC / "stats_modeling.py"],
+              outputs=[REPORTS_DIR / "stats.json"]),
+        Stage("load_db", load_db, deps=["clean"],
+              inputs=CLEANED + [SRC / "load_to_postgres.py"],
+              # hash de l'URL (pas l'URL: elle contient le mot de passe)
+              params={"db": hashlib.sha1((DATABASE_URL or "").encode()).hexdigest()},
+              disabled=lambda: None if DATABASE_URL else "DATABASE_URL non défini"),
+        Stage("summary", summary, deps=["clean"],
+              inputs=CLEANED + [DASHBOARD / "summary.py", DASHBOARD / "filter_index.py"],
+              outputs=[DATA_PROCESSED.parent / "dashboard_summary.json"]),
+    ]
+
+def main():
+    ap = argparse.ArgumentParser(description="Pipeline scrape -> clean -> features -> train/stats/DB")
+    ap.add_argument("--scrape", action="store_true", help="lance aussi le scraping (reprise du brut)")
+    ap.add_argument("--pages", type=int, default=3, help="pages à scraper")
+    ap.add_argument("--query", default=None)
+    ap.add_argument("--full-train", action="store_true",
+                    help="entraînement complet au lieu de la mise à jour incrémentale")
+    ap.add_argument("--force", nargs="*", default=[], metavar="STAGE",
+                    help="étapes à relancer même si leurs entrées n'ont pas changé (all = toutes)")
+    ap.add_argument("--workers", type=int, default=3, help="étapes indépendantes en parallèle")
+    ap.add_argument("--dry-run", action="store_true", help="affiche ce qui tournerait, sans rien lancer")
+    ap.add_argument("--profile", nargs="*", default=None, metavar="STAGE",
+                    help="cProfile + tracemalloc des étapes (sans nom: toutes) → reports/profile/")
+    args = ap.parse_args()
+    profile = set() if args.profile is None else set(args.profile) or {"all"}
+
+    t0 = time.perf_counter()
+    status = run_pipeline(build_stages(args), force=set(args.force), workers=args.workers,
+                          dry_run=args.dry_run, profile=profile)
+    print(f"Pipeline {time.perf_counter() - t0:.1f}s: "
+          + ", ".join(f"{k}={v}" for k, v in status.items()))
+    if any(v in ("failed", "blocked") for v in status.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
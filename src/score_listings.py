@@ -0,0 +1,104 @@
+# src/score_listings.py
+"""Score en masse un fichier d'annonces avec le modèle sauvegardé.
+
+Le fichier (CSV, fichier ou dataset Parquet) est lu par morceaux; chaque morceau
+passe en une fois dans le pipeline (model.predict vectorisé) et est écrit aussitôt
+avec `predicted_price` et, si le prix est connu, `residual` = prix - prédiction
+(`residual_pct` < 0: annonce moins chère que le modèle ne l'estime).
+
+    python src/score_listings.py --input data/processed/listings_parquet --out reports/scored.parquet
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from clean_listings import IMPUTE_DEFAULTS
+from config import DATA_PARQUET, DATA_PROCESSED, MODELS_DIR, REPORTS_DIR
+from feature_store import prepare_features
+from listings_store import iter_listings
+from ml_train import FEATURE_DEFAULTS_PATH
+
+MODEL_PATH = MODELS_DIR / "price_model.joblib"
+
+def load_model(path=MODEL_PATH):
+    """Pipeline entraîné + valeurs de remplissage des features (médianes d'entraînement)."""
+    model = joblib.load(path)
+    fill = dict(IMPUTE_DEFAULTS)
+    if FEATURE_DEFAULTS_PATH.exists():
+        fill.update(json.loads(FEATURE_DEFAULTS_PATH.read_text()))
+    return model, fill
+
+def predict_frame(model, fill, df: pd.DataFrame) -> np.ndarray:
+    return model.predict(prepare_features(df, fill))
+
+def score_chunk(model, fill, df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    out["predicted_price"] = predict_frame(model, fill, df)
+    if "price_shekels" in out.columns:
+        price = pd.to_numeric(out["price_shekels"], errors="coerce")
+        out["residual"] = price - out["predicted_price"]
+        out["residual_pct"] = out["residual"] / out["predicted_price"]
+    return out
+
+def iter_input(path, chunksize):
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        yield from pd.read_csv(path, chunksize=chunksize)
+    else:
+        yield from iter_listings(batch_size=chunksize, path=path, csv_path=path)
+
+def score_file(input_path, out_path, chunksize=100_000, model_path=MODEL_PATH):
+    """Score `input_path` vers `out_path` (.csv ou .parquet) par morceaux; renvoie des stats."""
+    model, fill = load_model(model_path)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    as_parquet = out_path.suffix.lower() == ".parquet"
+    writer, rows, t_predict = None, 0, 0.0
+    t0 = time.perf_counter()
+    try:
+        for i, chunk in enumerate(iter_input(input_path, chunksize)):
+            t1 = time.perf_counter()
+            scored = score_chunk(model, fill, chunk)
+            t_predict += time.perf_counter() - t1
+            if as_parquet:
+                table = pa.Table.from_pandas(scored, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                scored.to_csv(out_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    seconds = time.perf_counter() - t0
+    return {"rows": rows, "seconds": seconds,
+            "rows_per_sec": rows / seconds if seconds else 0.0,
+            "predict_rows_per_sec": rows / t_predict if t_predict else 0.0}
+
+def main():
+    ap = argparse.ArgumentParser(description="Prédit le prix d'un fichier d'annonces (CSV/Parquet)")
+    ap.add_argument("--input", help="CSV, fichier ou dossier Parquet (défaut: données nettoyées)")
+    ap.add_argument("--out", default=str(REPORTS_DIR / "scored_listings.parquet"),
+                    help="sortie .parquet ou .csv")
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    args = ap.parse_args()
+
+    if args.input is None:
+        args.input = str(DATA_PARQUET if DATA_PARQUET.exists() else DATA_PROCESSED)
+    elif not Path(args.input).exists():  # iter_listings retomberait sur listings_clean.csv
+        ap.error(f"--input introuvable: {args.input}")
+    s = score_file(args.input, args.out, chunksize=args.chunksize)
+    print(f"✅ {s['rows']} annonces scorées → {args.out} "
+          f"({s['seconds']:.2f}s, {s['rows_per_sec']:,.0f} lignes/s, "
+          f"modèle seul {s['predict_rows_per_sec']:,.0f} lignes/s)")
+
+if __name__ == "__main__":
+    main()
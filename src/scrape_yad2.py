@@ -1,16 +1,25 @@
 
+import argparse
+import asyncio
 import csv
+import json
+import os
 import time
 from pathlib import Path
+from urllib.parse import urljoin, urlsplit
 
+from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+from http_fetch import fetch_iter
+
 RAW_PATH = Path("data/raw/yad2_scraped_pagination.csv")
 RAW_PATH.parent.mkdir(parents=True, exist_ok=True)
 
@@ -27,6 +36,8 @@ TAGS_SELS = '.item-tags_itemTagsBox__Uz23E span'
 IMAGE_SEL = '[data-testid="image"]'
 URL_ATTR = 'href'
 
+FIELDS = ["title", "price", "location", "details", "tags", "image_url", "url"]
+
 def make_driver():
     options = Options()
     options.add_argument("--start-maximized")
@@ -34,55 +45,92 @@ def make_driver():
     service = Service(ChromeDriverManager().install())
     return webdriver.Chrome(service=service, options=options)
 
-def extract_ads_from_page(driver):
-    ads_data = []
+# Toute l'extraction d'une page en un seul aller-retour WebDriver: mêmes sélecteurs,
+# mêmes champs que _extract_ads_per_element (innerText ~ WebElement.text, .src/.href
+# ~ get_attribute: URL absolue)
+CARDS_JS = """
+const [cardSel, priceSel, titleSel, locSel, infoSel, tagsSel, imgSel, urlAttr] = arguments;
+const txt = el => (el ? el.innerText.trim() : "");
+return Array.from(document.querySelectorAll(cardSel)).map(card => {
+  const lines = card.querySelectorAll(infoSel);
+  const img = card.querySelector(imgSel);
+  const link = card.querySelector("a") || card.closest("a");
+  return {
+    title: txt(card.querySelector(titleSel)),
+    price: txt(card.querySelector(priceSel)),
+    location: txt(card.querySelector(locSel)),
+    details: lines.length > 1 ? txt(lines[1]) : "",
+    tags: Array.from(card.querySelectorAll(tagsSel)).map(txt).filter(Boolean).join(", "),
+    image_url: img ? (img.getAttribute("src") === null ? null : img.src) : "",
+    url: (link && link[urlAttr]) || "",
+  };
+});
+"""
+
+EXTRACT_MODES = ("script", "source", "elements")
+
+def extract_ads_from_page(driver, mode="script"):
+    """Extrait les cartes de la page courante.
+    mode="script": un seul execute_script renvoyant toutes les cartes (défaut);
+    mode="source": un seul page_source, parsé hors navigateur (parse_ads_html);
+    mode="elements": ancien chemin, find_element/get_attribute champ par champ."""
     WebDriverWait(driver, 20).until(
         EC.presence_of_all_elements_located((By.CSS_SELECTOR, CARD_SEL))
     )
+    if mode == "script":
+        return driver.execute_script(CARDS_JS, CARD_SEL, PRICE_SEL, TITLE_SEL, LOCATION_FIRST_LINE,
+                                     INFO_LINES, TAGS_SELS, IMAGE_SEL, URL_ATTR)
+    if mode == "source":
+        return parse_ads_html(driver.page_source, driver.current_url)
+    return _extract_ads_per_element(driver)
+
+def _extract_ads_per_element(driver):
+    """Une requête WebDriver par champ et par carte (~8 allers-retours chromedriver/carte)."""
+    ads_data = []
     cards = driver.find_elements(By.CSS_SELECTOR, CARD_SEL)
     for card in cards:
         try:
             price = card.find_element(By.CSS_SELECTOR, PRICE_SEL).text.strip()
-        except:
+        except WebDriverException:
             price = ""
 
         try:
             title = card.find_element(By.CSS_SELECTOR, TITLE_SEL).text.strip()
-        except:
+        except WebDriverException:
             title = ""
 
         try:
             location = card.find_element(By.CSS_SELECTOR, LOCATION_FIRST_LINE).text.strip()
-        except:
+        except WebDriverException:
             location = ""
 
         # info lines (e.g., "4 חדרים • קומה 3 • 95 מ״ר")
         try:
             lines = card.find_elements(By.CSS_SELECTOR, INFO_LINES)
             details_text = lines[1].text.strip() if len(lines) > 1 else ""
-        except:
+        except WebDriverException:
             details_text = ""
 
         try:
             tags_elements = card.find_elements(By.CSS_SELECTOR, TAGS_SELS)
             tags = ", ".join([t.text.strip() for t in tags_elements if t.text.strip()])
-        except:
+        except WebDriverException:
             tags = ""
 
         try:
             image = card.find_element(By.CSS_SELECTOR, IMAGE_SEL).get_attribute("src")
-        except:
+        except WebDriverException:
             image = ""
 
         # Try to fetch a direct URL from the anchor if available
         page_url = ""
         try:
             # The clickable area is usually an ancestor link; fallback: use data from image/link parents
-            parent_link = card.find_element(By.TAG_NAME, "a")
-            href = parent_link.get_attribute("href")
+            links = card.find_elements(By.TAG_NAME, "a") or card.find_elements(By.XPATH, "./ancestor::a[1]")
+            href = links[0].get_attribute("href") if links else None
             if href:
                 page_url = href
-        except:
+        except WebDriverException:
             page_url = ""
 
         ads_data.append(
@@ -98,36 +146,193 @@ def extract_ads_from_page(driver):
         )
     return ads_data
 
-def main():
-    driver = make_driver()
-    all_ads = []
+def _text(el):
+    """Texte visible d'un noeud, espaces normalisés (comme WebElement.text)."""
+    return " ".join(el.get_text(" ").split()) if el is not None else ""
+
+def parse_ads_html(html, page_url=BASE_URL):
+    """Même extraction que extract_ads_from_page, mais sur le HTML brut (BeautifulSoup)."""
+    soup = BeautifulSoup(html, "html.parser")
+    ads_data = []
+    for card in soup.select(CARD_SEL):
+        lines = card.select(INFO_LINES)
+        image = card.select_one(IMAGE_SEL)
+        # lien dans la carte, sinon la carte est elle-même dans le <a> cliquable
+        link = card.find("a") or card.find_parent("a")
+        href = link.get(URL_ATTR) if link is not None else None
+        ads_data.append(
+            {
+                "title": _text(card.select_one(TITLE_SEL)),
+                "price": _text(card.select_one(PRICE_SEL)),
+                "location": _text(card.select_one(LOCATION_FIRST_LINE)),
+                "details": _text(lines[1]) if len(lines) > 1 else "",
+                "tags": ", ".join(t for t in (_text(x) for x in card.select(TAGS_SELS)) if t),
+                "image_url": urljoin(page_url, image.get("src")) if image is not None and image.get("src") else "",
+                "url": urljoin(page_url, href) if href else "",
+            }
+        )
+    return ads_data
+
+def page_url(base_url, page):
+    return base_url if page == 1 else f"{base_url}?page={page}"
+
+# ---- Stockage brut: ajout page par page, checkpoint, dédoublonnage par url ----
+def checkpoint_path(out):
+    out = Path(out)
+    return out.with_name(out.stem + ".checkpoint.json")
 
-    for page in range(1, MAX_PAGES + 1):
-        url = BASE_URL if page == 1 else f"{BASE_URL}?page={page}"
+def load_checkpoint(out, base_url):
+    """Pages déjà écrites dans `out` pour cette recherche (vide si autre base_url)."""
+    path = checkpoint_path(out)
+    if not path.exists():
+        return set()
+    state = json.loads(path.read_text(encoding="utf-8"))
+    return set(state.get("pages_done", [])) if state.get("base_url") == base_url else set()
+
+def save_checkpoint(out, base_url, pages_done):
+    path = checkpoint_path(out)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"base_url": base_url, "pages_done": sorted(pages_done)}), encoding="utf-8")
+    os.replace(tmp, path)
+
+def url_key(url):
+    """Clé de dédoublonnage: l'annonce, sans query string (paramètres de tracking) ni fragment."""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}".rstrip("/")
+
+def load_seen_urls(out):
+    """Clés des annonces déjà présentes dans `out` (lecture de la seule colonne url)."""
+    out = Path(out)
+    if not out.exists():
+        return set()
+    with out.open(encoding="utf-8", newline="") as f:
+        return {k for k in (url_key(row.get("url")) for row in csv.DictReader(f)) if k}
+
+def start_raw(out):
+    """Nouveau fichier brut (en-tête seul) et checkpoint remis à zéro."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8", newline="") as f:
+        csv.DictWriter(f, fieldnames=FIELDS).writeheader()
+    checkpoint_path(out).unlink(missing_ok=True)
+
+def append_ads(out, ads, seen):
+    """Ajoute les annonces d'une page à `out`, sauf les urls déjà vues (mises à jour
+    dans `seen`). Les annonces sans url sont gardées. Renvoie le nb de lignes écrites."""
+    fresh = []
+    for ad in ads:
+        key = url_key(ad.get("url"))
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        fresh.append(ad)
+    with Path(out).open("a", encoding="utf-8", newline="") as f:
+        csv.DictWriter(f, fieldnames=FIELDS).writerows(fresh)
+    return len(fresh)
+
+def scrape_selenium(urls, on_page, driver=None, extract_mode="script"):
+    """Ancienne boucle: une page à la fois dans Chrome, captcha passé à la main.
+    Chaque page extraite est passée à on_page(page, ads)."""
+    driver = driver or make_driver()
+    for page, url in urls:
         print(f"➡️ Loading page {page}: {url}")
         driver.get(url)
 
         input("🛑 Pass any anti-bot/captcha in the opened browser, then press Enter here to continue...")
 
         try:
-            batch = extract_ads_from_page(driver)
-            print(f"🔍 Found {len(batch)} cards on this page.")
-            all_ads.extend(batch)
+            batch = extract_ads_from_page(driver, extract_mode)
         except Exception as e:
             print(f"❌ Error on page {page}: {e}")
+        else:
+            print(f"🔍 Found {len(batch)} cards on this page.")
+            # hors du try: une écriture ratée du brut / du checkpoint arrête le scraping
+            on_page(page, batch)
 
         time.sleep(2)
 
-    # Save CSV
-    with RAW_PATH.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=["title", "price", "location", "details", "tags", "image_url", "url"],
-        )
-        writer.writeheader()
-        writer.writerows(all_ads)
+def scrape_http(urls, on_page, concurrency=4, rate=1.0, retries=3, selenium_fallback=True,
+                extract_mode="script"):
+    """Pages téléchargées en parallèle (asyncio, débit limité) puis parsées avec bs4;
+    on_page(page, ads) est appelé dès qu'une page est prête (ordre d'arrivée).
+    Les pages bloquées par l'anti-bot repassent par Selenium si selenium_fallback."""
+    page_of = {u: p for p, u in urls}
+    challenged = []
+
+    async def consume():
+        async for res in fetch_iter([u for _, u in urls], concurrency=concurrency,
+                                    rate=rate, retries=retries):
+            page = page_of[res.url]
+            if res.ok:
+                batch = await asyncio.to_thread(parse_ads_html, res.text, res.url)
+                print(f"🔍 Page {page}: {len(batch)} cards ({res.attempts} attempt(s)).")
+                on_page(page, batch)
+            elif res.challenged:
+                print(f"🛑 Page {page}: anti-bot challenge.")
+                challenged.append((page, res.url))
+            else:
+                print(f"❌ Error on page {page}: {res.error}")
+
+    asyncio.run(consume())
+    if challenged and selenium_fallback:
+        print(f"🌐 Selenium fallback for {len(challenged)} page(s).")
+        scrape_selenium(sorted(challenged), on_page, extract_mode=extract_mode)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scraping des annonces Yad2 (ventes)")
+    ap.add_argument("--query", default=None,
+                    help="(non utilisé: les résultats viennent de --base-url)")
+    ap.add_argument("--pages", type=int, default=MAX_PAGES)
+    ap.add_argument("--out", default=str(RAW_PATH))
+    ap.add_argument("--base-url", default=BASE_URL,
+                    help="ex. http://localhost:8000/forsale pour des pages sauvegardées")
+    ap.add_argument("--concurrency", type=int, default=4, help="connexions HTTP simultanées max")
+    ap.add_argument("--rate", type=float, default=1.0, help="requêtes/seconde max")
+    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--selenium", action="store_true",
+                    help="ancien mode: toutes les pages dans Chrome")
+    ap.add_argument("--no-fallback", action="store_true",
+                    help="pas de Selenium pour les pages challengées")
+    ap.add_argument("--extract", choices=EXTRACT_MODES, default="script",
+                    help="extraction Selenium: script (1 appel JS), source (page_source + bs4), elements")
+    ap.add_argument("--resume", action="store_true",
+                    help="reprend un scraping interrompu: saute les pages du checkpoint, garde --out")
+    args = ap.parse_args(argv)
+
+    out = Path(args.out)
+    if args.resume and out.exists():
+        done = load_checkpoint(out, args.base_url)
+        seen = load_seen_urls(out)
+        print(f"⏩ Resume: {len(done)} page(s) already done, {len(seen)} known listings.")
+    else:
+        start_raw(out)
+        done, seen = set(), set()
+
+    stats = {"written": 0}
+
+    def on_page(page, ads):
+        # page écrite puis checkpoint: au pire une page est refaite, sans doublons d'url
+        n = append_ads(out, ads, seen)
+        done.add(page)
+        save_checkpoint(out, args.base_url, done)
+        stats["written"] += n
+        if n < len(ads):
+            print(f"   ↳ {len(ads) - n} duplicate listing(s) skipped.")
+
+    urls = [(p, page_url(args.base_url, p)) for p in range(1, args.pages + 1) if p not in done]
+    if args.selenium:
+        scrape_selenium(urls, on_page, extract_mode=args.extract)
+    else:
+        scrape_http(urls, on_page, concurrency=args.concurrency, rate=args.rate,
+                    retries=args.retries, selenium_fallback=not args.no_fallback,
+                    extract_mode=args.extract)
 
-    print(f"✅ Finished. Saved {len(all_ads)} ads to {RAW_PATH}")
+    missing = [p for p in range(1, args.pages + 1) if p not in done]
+    print(f"✅ Finished. Saved {stats['written']} new ads to {out}"
+          + (f" (pages still missing: {missing}, rerun with --resume)" if missing else ""))
 
 if __name__ == "__main__":
     main()
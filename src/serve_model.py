@@ -0,0 +1,124 @@
+# src/serve_model.py
+"""Petit serveur HTTP local de prédiction (modèle chargé une seule fois).
+
+Les requêtes concurrentes sont regroupées: chaque thread de requête dépose ses lignes
+dans une file, un thread unique les accumule (jusqu'à `max_batch` lignes ou
+`max_wait` secondes) et fait un seul model.predict pour tout le lot.
+
+    python src/serve_model.py --port 8765
+    curl -s localhost:8765/predict -d '{"area_sqm": 90, "rooms": 4, "floor": 3, "city": "תל אביב יפו"}'
+
+POST /predict: un objet ou une liste d'objets -> {"predictions": [...]}
+GET  /health
+"""
+import argparse
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from score_listings import MODEL_PATH, load_model, predict_frame
+
+class MicroBatcher:
+    """Regroupe les appels predict(rows) concurrents en un model.predict par lot."""
+
+    def __init__(self, model, fill, max_batch=512, max_wait=0.005):
+        self.model, self.fill = model, fill
+        self.max_batch, self.max_wait = max_batch, max_wait
+        self._queue = queue.Queue()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def predict(self, rows: list) -> list:
+        fut = Future()
+        self._queue.put((rows, fut))
+        return fut.result()
+
+    def _loop(self):
+        while True:
+            pending = [self._queue.get()]
+            n = len(pending[0][0])
+            # on attend au plus max_wait que d'autres requêtes rejoignent le lot
+            while n < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n += len(item[0])
+            try:
+                preds = predict_frame(self.model, self.fill,
+                                      pd.DataFrame([r for rows, _ in pending for r in rows]))
+            except Exception:
+                # une requête invalide ne doit pas faire échouer les autres du lot:
+                # on refait chaque requête seule, seule la fautive reçoit l'erreur
+                for rows, fut in pending:
+                    try:
+                        fut.set_result(predict_frame(self.model, self.fill, pd.DataFrame(rows)).tolist())
+                    except Exception as e:
+                        fut.set_exception(e)
+                continue
+            i = 0
+            for rows, fut in pending:
+                fut.set_result(preds[i:i + len(rows)].tolist())
+                i += len(rows)
+
+def make_server(batcher, host="127.0.0.1", port=8765):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                return self._send(404, {"error": "not found"})
+            try:
+                data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                rows = data if isinstance(data, list) else [data]
+                if not all(isinstance(r, dict) for r in rows):
+                    raise ValueError("expected an object or a list of objects")
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+            if not rows:
+                return self._send(200, {"predictions": []})
+            try:
+                self._send(200, {"predictions": batcher.predict(rows)})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+def main():
+    ap = argparse.ArgumentParser(description="Serveur HTTP local de prédiction de prix")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--max-batch", type=int, default=512, help="lignes max par model.predict")
+    ap.add_argument("--max-wait-ms", type=float, default=5.0, help="attente max pour remplir un lot")
+    args = ap.parse_args()
+
+    model, fill = load_model(MODEL_PATH)
+    batcher = MicroBatcher(model, fill, args.max_batch, args.max_wait_ms / 1000)
+    server = make_server(batcher, args.host, args.port)
+    print(f"Modèle prêt → http://{args.host}:{args.port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,174 @@
+# src/stats_modeling.py
+"""Statistiques descriptives et tests par ville / quartier.
+
+- descriptives (n, moyenne, écart-type, médiane du prix et du prix au m²) de toutes
+  les villes et de tous les quartiers: un groupby vectorisé par niveau
+- tests de Welch entre toutes les paires de villes (n >= --min-n), calculés en un
+  seul passage sur des tableaux à partir des moyennes/variances par ville, p-values
+  corrigées pour comparaisons multiples (Holm par défaut, ou Benjamini-Hochberg)
+- intervalles de confiance bootstrap de la médiane du prix au m² par ville,
+  villes réparties sur les cœurs (joblib)
+
+    python src/stats_modeling.py --metric price_per_sqm --correction holm --n-boot 1000
+
+Sorties: reports/stats.json (résumé), reports/stats_cities.csv,
+reports/stats_neighborhoods.csv, reports/stats_pairwise.csv.
+"""
+import argparse
 import json
 from pathlib import Path
-import pandas as pd
+
 import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
 from scipy import stats
-from config import DATA_PROCESSED, REPORTS_DIR
 
-def main():
-    df = pd.read_csv(DATA_PROCESSED)
+import perf
+from config import REPORTS_DIR
+from feature_store import load_features
+
+VALUE_COLS = ["price_shekels", "price_per_sqm"]
+# ville "Unknown" = adresse non reconnue: gardée dans les descriptives, pas dans les tests
+UNKNOWN = "Unknown"
+# paire de l'ancien rapport (clé t_test_telaviv_vs_jerusalem), noms hébreux ou anglais
+FOCUS_PAIR = (("תל אביב", "tel aviv"), ("ירושלים", "jerusalem"))
+
+def describe_groups(df, by, cols=VALUE_COLS):
+    """n, moyenne, écart-type (ddof=1) et médiane de `cols` pour chaque groupe `by`
+    (calculs en float64: le store garde le prix au m² en float32)."""
+    g = df.astype({c: "float64" for c in cols}).groupby(by, observed=True, sort=True)
+    out = g[cols].agg(["count", "mean", "std", "median"])
+    out.columns = [f"{c}_{s}" for c, s in out.columns]
+    out.insert(0, "n", g.size())
+    return out
+
+def adjust_pvalues(p, method="holm"):
+    """p-values corrigées (Holm: FWER, fdr_bh: Benjamini-Hochberg); NaN ignorés."""
+    p = np.asarray(p, dtype=float)
+    out = np.full_like(p, np.nan)
+    ok = ~np.isnan(p)
+    m = int(ok.sum())
+    if not m:
+        return out
+    order = np.argsort(p[ok])
+    ranked = p[ok][order]
+    if method == "holm":
+        adj = np.maximum.accumulate((m - np.arange(m)) * ranked)
+    elif method == "fdr_bh":
+        adj = np.minimum.accumulate((m / np.arange(m, 0, -1)) * ranked[::-1])[::-1]
+    else:
+        raise ValueError(f"correction inconnue: {method}")
+    res = np.empty(m)
+    res[order] = np.minimum(adj, 1.0)
+    out[ok] = res
+    return out
+
+def welch_all_pairs(groups, col, min_n=5, correction="holm", alpha=0.05):
+    """Test de Welch (comme stats.ttest_ind(equal_var=False)) pour toutes les paires de
+    groupes de `describe_groups`, depuis leurs n/moyenne/variance: O(paires), sans
+    relire les lignes."""
+    g = groups[(groups[f"{col}_count"] >= min_n) & (groups.index != UNKNOWN)]
+    n = g[f"{col}_count"].to_numpy(dtype=float)
+    m = g[f"{col}_mean"].to_numpy(dtype=float)
+    se = g[f"{col}_std"].to_numpy(dtype=float) ** 2 / n
+    i, j = np.triu_indices(len(g), 1)
+    se2 = se[i] + se[j]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (m[i] - m[j]) / np.sqrt(se2)
+        dof = se2 ** 2 / (se[i] ** 2 / (n[i] - 1) + se[j] ** 2 / (n[j] - 1))
+    p = 2 * stats.t.sf(np.abs(t), dof)
+    p_adj = adjust_pvalues(p, correction)
+    names = g.index.to_numpy()
+    return pd.DataFrame({
+        "a": names[i], "b": names[j], "n_a": n[i].astype(int), "n_b": n[j].astype(int),
+        "mean_a": m[i], "mean_b": m[j], "diff": m[i] - m[j],
+        "t_stat": t, "df": dof, "p_value": p, "p_adj": p_adj, "significant": p_adj < alpha,
+    })
+
+def _boot_medians(samples, seeds, n_boot, max_cells=2_000_000):
+    """Médianes bootstrap de chaque échantillon, par blocs de <= max_cells tirages."""
+    out = []
+    for x, seed in zip(samples, seeds):
+        rng = np.random.default_rng(seed)
+        meds = np.empty(n_boot)
+        step = max(1, max_cells // len(x))
+        for s in range(0, n_boot, step):
+            b = min(step, n_boot - s)
+            meds[s:s + b] = np.median(x[rng.integers(0, len(x), (b, len(x)))], axis=1)
+        out.append(meds)
+    return out
+
+def bootstrap_median_ci(df, by, col="price_per_sqm", n_boot=1000, level=0.95,
+                        min_n=5, n_jobs=-1, seed=42):
+    """IC percentile bootstrap de la médiane de `col` par groupe (n >= min_n).
+    Une graine par groupe (SeedSequence.spawn): même résultat quel que soit n_jobs."""
+    d = df[[by, col]].dropna()
+    groups = [(k, v.to_numpy(dtype=float)) for k, v in d.groupby(by, observed=True, sort=True)[col]
+              if len(v) >= min_n]
+    cols = [by, f"{col}_median", "ci_low", "ci_high"]
+    if not groups:
+        return pd.DataFrame(columns=cols).set_index(by)
+    seeds = np.random.SeedSequence(seed).spawn(len(groups))
+
+    # lots équilibrés en nombre de lignes (plus gros groupes d'abord, en tourniquet)
+    n_chunks = min(len(groups), 4 * effective_n_jobs(n_jobs))
+    order = sorted(range(len(groups)), key=lambda k: -len(groups[k][1]))
+    chunks = [order[c::n_chunks] for c in range(n_chunks)]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_boot_medians)([groups[k][1] for k in ch], [seeds[k] for k in ch], n_boot)
+        for ch in chunks)
+
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    rows = {}
+    for ch, meds in zip(chunks, results):
+        for k, b in zip(ch, meds):
+            lo, hi = np.percentile(b, q)
+            rows[k] = (groups[k][0], float(np.median(groups[k][1])), lo, hi)
+    return pd.DataFrame([rows[k] for k in range(len(groups))], columns=cols).set_index(by)
+
+def _find_city(names, patterns):
+    """Plus grande ville (ordre de `names`) dont le nom contient un des motifs."""
+    for name in names:
+        if any(p in str(name).lower() for p in patterns):
+            return name
+    return None
+
+def focus_test(cities, col="price_shekels", min_n=3):
+    """Test de l'ancien rapport (clé t_test_telaviv_vs_jerusalem): Welch Tel Aviv vs
+    Jérusalem sur le prix, mêmes champs qu'avant quelle que soit --metric; None si une
+    des deux villes manque ou a moins de `min_n` annonces."""
+    names = cities.sort_values("n", ascending=False).index
+    a, b = (_find_city(names, pats) for pats in FOCUS_PAIR)
+    if a is None or b is None:
+        return None
+    pair = welch_all_pairs(cities.loc[[a, b]], col, min_n=min_n)
+    if pair.empty:
+        return None
+    r = pair.iloc[0]  # une seule paire, dans l'ordre (a, b)
+    return {"t_stat": float(r["t_stat"]), "p_value": float(r["p_value"]),
+            "n_tel_aviv": int(r["n_a"]), "n_jerusalem": int(r["n_b"])}
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Statistiques par ville/quartier et tests entre villes")
+    ap.add_argument("--metric", default="price_per_sqm", choices=VALUE_COLS,
+                    help="variable des tests de Welch")
+    ap.add_argument("--min-n", type=int, default=5, help="annonces min. par ville pour les tests/IC")
+    ap.add_argument("--correction", default="holm", choices=["holm", "fdr_bh"])
+    ap.add_argument("--alpha", type=float, default=0.05)
+    ap.add_argument("--n-boot", type=int, default=1000, help="rééchantillonnages bootstrap")
+    ap.add_argument("--n-jobs", type=int, default=-1, help="workers du bootstrap (-1 = tous les cœurs)")
+    perf.add_profile_arg(ap)
+    return ap.parse_args(argv)
+
+def run(args, df=None):
+    """Calcule et écrit les rapports; `df`: frame du feature store déjà chargé
+    (pipeline.py). Renvoie le résumé de stats.json."""
+    if df is None:
+        with perf.step("features") as st:
+            # même lecture que l'entraînement (cache du feature store): prix > 0, features imputées
+            df = load_features().frame
+            st["rows"] = len(df)
+    perf.note(rows_in=len(df))
 
     # Descriptives
     desc = {
@@ -14,24 +176,41 @@ def main():
         "price_mean": float(df["price_shekels"].mean()),
         "price_median": float(df["price_shekels"].median()),
         "price_std": float(df["price_shekels"].std()),
-        "ppsqm_mean": float(df["price_per_sqm"].mean()),
+        "ppsqm_mean": float(df["price_per_sqm"].astype("float64").mean()),
         "rooms_dist": df["rooms"].value_counts().sort_index().to_dict()
     }
+    with perf.step("describe", rows=len(df)):
+        cities = describe_groups(df, "city")
+        neighborhoods = describe_groups(df.dropna(subset=["neighborhood"]), ["city", "neighborhood"])
+    with perf.step("bootstrap", rows=len(df)):
+        ci = bootstrap_median_ci(df, "city", n_boot=args.n_boot, min_n=args.min_n, n_jobs=args.n_jobs)
+    cities = cities.join(ci[["ci_low", "ci_high"]].add_prefix("price_per_sqm_median_"))
 
-    # T-test Tel Aviv vs Jerusalem (si présent)
-    tv = df[df["city"].str.contains("Tel Aviv", case=False, na=False)]["price_shekels"]
-    jr = df[df["city"].str.contains("Jerusalem", case=False, na=False)]["price_shekels"]
-    ttest = None
-    if len(tv) > 2 and len(jr) > 2:
-        t_stat, p_val = stats.ttest_ind(tv, jr, equal_var=False)
-        ttest = {"t_stat": float(t_stat), "p_value": float(p_val), "n_tel_aviv": int(len(tv)), "n_jerusalem": int(len(jr))}
+    # Tests de Welch entre toutes les paires de villes
+    with perf.step("welch_all_pairs"):
+        pairs = welch_all_pairs(cities, args.metric, args.min_n, args.correction, args.alpha)
+    tests = {"metric": args.metric, "correction": args.correction, "alpha": args.alpha,
+             "min_n": args.min_n, "n_cities": int(len(set(pairs["a"]) | set(pairs["b"]))),
+             "n_pairs": int(len(pairs)), "n_significant": int(pairs["significant"].sum())}
+    report = {"desc": desc, "welch_all_pairs": tests,
+              "t_test_telaviv_vs_jerusalem": focus_test(cities)}
 
     # Save
-    Path(REPORTS_DIR).mkdir(parents=True, exist_ok=True)
-    (Path(REPORTS_DIR) / "stats.json").write_text(json.dumps({"desc": desc, "t_test_telaviv_vs_jerusalem": ttest}, indent=2))
+    out = Path(REPORTS_DIR)
+    out.mkdir(parents=True, exist_ok=True)
+    cities.to_csv(out / "stats_cities.csv")
+    neighborhoods.to_csv(out / "stats_neighborhoods.csv")
+    pairs.sort_values("p_value").to_csv(out / "stats_pairwise.csv", index=False)
+    (out / "stats.json").write_text(json.dumps(report, indent=2, ensure_ascii=False))
 
-    print("Stats sauvegardées → reports/stats.json")
-    print(json.dumps({"desc": desc, "t_test_telaviv_vs_jerusalem": ttest}, indent=2))
+    print("Stats sauvegardées → reports/stats.json (+ stats_cities/neighborhoods/pairwise.csv)")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return report
+
+def main():
+    args = parse_args()
+    with perf.stage("stats", profile=args.profile):
+        run(args)
 
 if __name__ == "__main__":
     main()